@@ -184,7 +184,8 @@ def main():
         "instance_type": DEFAULT_EC2_INSTANCE_TYPE,
         "security_group": DEFAULT_SECURITY_GROUP_NAME,
         "aws_access_key": aws_access_credentials.get('AWS_ACCESS_KEY_ID'),
-        "aws_secret_key": aws_access_credentials.get('AWS_SECRET_ACCESS_KEY')
+        "aws_secret_key": aws_access_credentials.get('AWS_SECRET_ACCESS_KEY'),
+        "aws_session_token": aws_access_credentials.get('AWS_SESSION_TOKEN')
     }
     print("Launching EC2 instances...")
     run_playbook("ec2_generator_playbook.yml", extra_vars=extra_vars)
@@ -214,7 +215,7 @@ def main():
 
     # Run playbook to install Apache2
     print("Installing Apache2 on selected group...")
-    apache_install_extra_vars = get_aws_access_credentials()
+    apache_install_extra_vars = dict(aws_access_credentials)
     apache_install_extra_vars["target_group"] = target_group
     run_playbook(
         "install_apache_playbook.yml",
@@ -1,4 +1,5 @@
-from src.utils.config import DEFAULT_NAMESPACE
+from src.utils.config import DEFAULT_NAMESPACE, METRIC_DATA_MAX_QUERIES
+from src.utils.list_utils import chunk_list
 
 
 class CloudWatchController:
@@ -29,6 +30,24 @@ class CloudWatchController:
         )
         return response['Datapoints']
 
+    def get_metric_data(self, queries, start_time, end_time):
+        """
+        Retrieve the data of many metrics with batched, paginated get_metric_data calls.
+
+        :param queries: A list of MetricDataQuery dicts, each with a unique 'Id'.
+        :param start_time: The starting time for the data retrieval.
+        :param end_time: The ending time for the data retrieval.
+        :return: dict of query ID to a list of (timestamp, value) tuples, oldest first.
+        """
+        results = {query['Id']: [] for query in queries}
+        paginator = self.cw_client.get_paginator('get_metric_data')
+        for chunk in chunk_list(list(queries), METRIC_DATA_MAX_QUERIES):
+            for page in paginator.paginate(MetricDataQueries=chunk, StartTime=start_time, EndTime=end_time,
+                                           ScanBy='TimestampAscending'):
+                for result in page['MetricDataResults']:
+                    results[result['Id']].extend(zip(result['Timestamps'], result['Values']))
+        return results
+
     def set_alarm(self, alarm_name, comparison_operator, metric_name, statistic, threshold, evaluation_periods, period,
                   actions_enabled=True, alarm_actions=None, dimensions=None):
         """
@@ -1,25 +1,95 @@
-from src.utils.config import DEFAULT_REGION, DEFAULT_VOLUME_TYPE, DEFAULT_DEVICE_NAME, DEFAULT_SNAPSHOT_NAME
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from botocore.exceptions import ClientError
+
+from src.controller.EC2Controller import build_tag_filters, build_tag_specifications
+from src.model.Records import VolumeRecord, SnapshotRecord, VolumeModificationRecord
+from src.utils.config import DEFAULT_REGION, DEFAULT_VOLUME_TYPE, DEFAULT_DEVICE_NAME, DEFAULT_SNAPSHOT_NAME, \
+    WAITER_DEFAULT_TIMEOUT_SECONDS, EBS_DESCRIBE_PAGE_SIZE, EBS_SNAPSHOT_MAX_WORKERS, \
+    EBS_SNAPSHOT_REQUESTS_PER_SECOND, EBS_RESTORE_MAX_WORKERS, EBS_CREATE_VOLUME_REQUESTS_PER_SECOND, \
+    EBS_FAST_RESTORE_TIMEOUT_SECONDS, EBS_MODIFY_MAX_WORKERS, EBS_MODIFY_VOLUME_REQUESTS_PER_SECOND, \
+    EBS_MODIFICATION_DESCRIBE_CHUNK_SIZE, EBS_MODIFICATION_PROGRESS_DETAIL_LIMIT, WAITER_MIN_DELAY_SECONDS, \
+    WAITER_MAX_DELAY_SECONDS, WAITER_BACKOFF_FACTOR, EBS_COPY_MAX_IN_FLIGHT_PER_REGION, EBS_COPY_DESCRIBE_CHUNK_SIZE, \
+    EBS_COPY_TIMEOUT_SECONDS, EBS_PLACEHOLDER_VOLUME_ID
+from src.utils.inventory_cache import InventoryCache, inventory_cache
+from src.utils.list_utils import chunk_list
+from src.utils.rate_limiter import RateLimiter
+from src.utils.snapshot_retention import RetentionPolicy, RetentionPlan, plan_retention, apply_retention
+from src.utils.waiter_multiplexer import waiter_multiplexer, fast_restore_id, is_transient_error
 
 
 class EBSController:
-    def __init__(self, ec2, ec2_client):
+    def __init__(self, ec2, ec2_client, cache: InventoryCache = None):
         """
         Initialise the EBSController with a boto3 EBS service client.
         :param ec2: Boto3 EC2 resource object.
+        :param ec2_client: Boto3 EC2 client object.
+        :param cache: InventoryCache for listings (default is the shared inventory_cache).
         """
         self.ec2 = ec2
         self.ec2_client = ec2_client
+        self.region = ec2_client.meta.region_name
+        self.cache = cache if cache is not None else inventory_cache
 
-    def list_existing_volumes(self):
+    def list_existing_volumes(self, states: list = None, availability_zones: list = None, volume_types: list = None,
+                              tags: dict = None, attached: bool = None):
         """
-        List all existing EBS volumes in the specified region.
-        :return: List of all EBS volumes Resource objects.
+        List existing EBS volumes in the specified region, optionally filtered (see iter_volumes).
+        Results are served from the inventory cache until they expire or a volume is changed.
+        :param states: Optional list of volume states (e.g., ['available']).
+        :param availability_zones: Optional list of Availability Zones.
+        :param volume_types: Optional list of volume types (e.g., ['gp2']).
+        :param tags: Optional dict of tag key to value or list of values (None matches any value).
+        :param attached: True for attached volumes only, False for unattached volumes only.
+        :return: List of VolumeRecord objects.
         """
-        volumes = self.ec2.volumes.all()
-        volume_list = []
-        for volume in volumes:
-            volume_list.append(volume)
-        return volume_list
+        filters = {'states': states, 'availability_zones': availability_zones, 'volume_types': volume_types,
+                   'tags': tags, 'attached': attached}
+        return list(self.cache.get_or_load('ebs_volumes', self.region, filters,
+                                           lambda: tuple(self.iter_volumes(**filters))))
+
+    def iter_volumes(self, states: list = None, availability_zones: list = None, volume_types: list = None,
+                     tags: dict = None, attached: bool = None, page_size: int = EBS_DESCRIBE_PAGE_SIZE):
+        """
+        Lazily yield EBS volumes matching the filters, one describe_volumes page at a time.
+        All filters are applied server-side, so only matching volumes are downloaded.
+        :param states: Optional list of volume states (e.g., ['available', 'in-use']).
+        :param availability_zones: Optional list of Availability Zones.
+        :param volume_types: Optional list of volume types (e.g., ['gp2']).
+        :param tags: Optional dict of tag key to value or list of values (None matches any value).
+        :param attached: True for attached volumes only ('in-use'), False for unattached volumes only ('available').
+        :param page_size: Number of volumes requested per page (MaxResults, 5-500).
+        :return: Generator of VolumeRecord objects.
+        """
+        if attached is not None:
+            attached_state = 'in-use' if attached else 'available'
+            if states and attached_state not in states:
+                return
+            states = [attached_state]
+
+        filters = []
+        if states:
+            filters.append({'Name': 'status', 'Values': list(states)})
+        if availability_zones:
+            filters.append({'Name': 'availability-zone', 'Values': list(availability_zones)})
+        if volume_types:
+            filters.append({'Name': 'volume-type', 'Values': list(volume_types)})
+        filters += build_tag_filters(tags)
+
+        paginator = self.ec2_client.get_paginator('describe_volumes')
+        for page in paginator.paginate(Filters=filters, PaginationConfig={'PageSize': page_size}):
+            for volume in page['Volumes']:
+                yield VolumeRecord.from_response(volume, self.region)
+
+    def get_volume_index(self, **filters):
+        """
+        Build a VolumeIndex from one (cached) listing of the volumes.
+        :param filters: Optional filters, see list_existing_volumes.
+        :return: VolumeIndex
+        """
+        return VolumeIndex(self.list_existing_volumes(**filters))
 
     def create_volume(self, size, availability_zone: str = DEFAULT_REGION, volume_type: str = DEFAULT_VOLUME_TYPE):
         """
@@ -34,6 +104,7 @@ class EBSController:
             AvailabilityZone=availability_zone,
             VolumeType=volume_type
         )
+        self.cache.invalidate('ebs_volumes', self.region)
         return response
 
     def attach_volume_to_instance(self, volume_id, instance_id, device: str = DEFAULT_DEVICE_NAME):
@@ -48,6 +119,7 @@ class EBSController:
             VolumeId=volume_id,
             Device=device
         )
+        self.cache.invalidate('ebs_volumes', self.region)
         return response
 
     def detach_volume_from_instance(self, volume_id, instance_id):
@@ -60,6 +132,7 @@ class EBSController:
         response = self.ec2.Instance(instance_id).detach_volume(
             VolumeId=volume_id
         )
+        self.cache.invalidate('ebs_volumes', self.region)
         return response
 
     def modify_volume_capacity(self, volume_id, new_size: int):
@@ -73,8 +146,97 @@ class EBSController:
             VolumeId=volume_id,
             Size=new_size
         )
+        self.cache.invalidate('ebs_volumes', self.region)
         return response
 
+    def modify_volumes(self, volume_ids, size: int = None, volume_type: str = None, iops: int = None,
+                       throughput: int = None, max_workers: int = EBS_MODIFY_MAX_WORKERS,
+                       requests_per_second: float = EBS_MODIFY_VOLUME_REQUESTS_PER_SECOND):
+        """
+        Modify the size, type, IOPS and/or throughput of many volumes, with concurrent modify_volume calls.
+        Parameters left as None are not changed. Track the modifications with track_volume_modifications.
+        :param volume_ids: IDs of the EBS volumes to modify.
+        :param size: New size in GiB.
+        :param volume_type: New volume type (e.g., 'gp3').
+        :param iops: New provisioned IOPS (gp3, io1, io2).
+        :param throughput: New throughput in MiB/s (gp3).
+        :param max_workers: Maximum number of concurrent modify_volume calls.
+        :param requests_per_second: Maximum modify_volume calls started per second.
+        :return: dict of volume ID to VolumeModificationRecord (with error set if the call failed).
+        """
+        changes = {'Size': size, 'VolumeType': volume_type, 'Iops': iops, 'Throughput': throughput}
+        changes = {key: value for key, value in changes.items() if value is not None}
+        if not changes:
+            return {}
+        return self.apply_volume_modifications({volume_id: changes for volume_id in volume_ids}, max_workers,
+                                               requests_per_second)
+
+    def apply_volume_modifications(self, changes_by_volume: dict, max_workers: int = EBS_MODIFY_MAX_WORKERS,
+                                   requests_per_second: float = EBS_MODIFY_VOLUME_REQUESTS_PER_SECOND):
+        """
+        Apply different modifications to many volumes, with concurrent modify_volume calls
+        (e.g., the changes of right-sizing recommendations). Track them with track_volume_modifications.
+        :param changes_by_volume: dict of volume ID to modify_volume parameters
+            (e.g., {'vol-123': {'VolumeType': 'gp3', 'Iops': 3000, 'Throughput': 125}}).
+        :param max_workers: Maximum number of concurrent modify_volume calls.
+        :param requests_per_second: Maximum modify_volume calls started per second.
+        :return: dict of volume ID to VolumeModificationRecord (with error set if the call failed).
+        """
+        changes_by_volume = {volume_id: changes for volume_id, changes in changes_by_volume.items() if changes}
+        if not changes_by_volume:
+            return {}
+
+        rate_limiter = RateLimiter(requests_per_second)
+
+        def modify(volume_id):
+            rate_limiter.acquire()
+            response = self.ec2_client.modify_volume(VolumeId=volume_id, **changes_by_volume[volume_id])
+            return VolumeModificationRecord.from_response(response['VolumeModification'])
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(changes_by_volume))) as executor:
+            futures = {volume_id: executor.submit(modify, volume_id) for volume_id in changes_by_volume}
+            for volume_id, future in futures.items():
+                try:
+                    results[volume_id] = future.result()
+                except Exception as e:
+                    changes = changes_by_volume[volume_id]
+                    results[volume_id] = VolumeModificationRecord(volume_id, 'failed', 0, changes.get('Size'),
+                                                                  changes.get('VolumeType'), changes.get('Iops'),
+                                                                  changes.get('Throughput'), None, None, None,
+                                                                  error=str(e))
+        self.cache.invalidate('ebs_volumes', self.region)
+        return results
+
+    def get_volume_modifications(self, volume_ids):
+        """
+        Get the latest modification of each volume, with batched describe_volumes_modifications calls.
+        :param volume_ids: IDs of the EBS volumes.
+        :return: dict of volume ID to VolumeModificationRecord (volumes never modified are left out).
+        """
+        modifications = {}
+        paginator = self.ec2_client.get_paginator('describe_volumes_modifications')
+        for chunk in chunk_list(list(volume_ids), EBS_MODIFICATION_DESCRIBE_CHUNK_SIZE):
+            for page in paginator.paginate(Filters=[{'Name': 'volume-id', 'Values': chunk}]):
+                for modification in page['VolumesModifications']:
+                    record = VolumeModificationRecord.from_response(modification)
+                    latest = modifications.get(record.id)
+                    if latest is None or (record.start_time and latest.start_time
+                                          and record.start_time > latest.start_time):
+                        modifications[record.id] = record
+        return modifications
+
+    def track_volume_modifications(self, volume_ids, target_state: str = 'completed',
+                                   timeout: float = WAITER_DEFAULT_TIMEOUT_SECONDS):
+        """
+        Create a tracker for volume modifications; call its run method (e.g., as a background job) to poll them.
+        :param volume_ids: IDs of the modified EBS volumes.
+        :param target_state: 'optimizing' (the new settings are usable) or 'completed'.
+        :param timeout: Seconds to poll before giving up.
+        :return: VolumeModificationTracker
+        """
+        return VolumeModificationTracker(self, volume_ids, target_state, timeout)
+
     def delete_volume(self, volume_id):
         """
         Delete an EBS volume.
@@ -82,28 +244,149 @@ class EBSController:
         :return: Response from the delete_volume call.
         """
         response = self.ec2.Volume(volume_id).delete()
+        self.cache.invalidate('ebs_volumes', self.region)
         return response
 
     def list_snapshots(self):
         """
-        List all EBS snapshots in the specified region.
-        :return: List of all EBS snapshots Resource objects.
+        List all EBS snapshots owned by the account in the specified region.
+        Results are served from the inventory cache until they expire or a snapshot is changed.
+        :return: List of SnapshotRecord objects.
         """
-        snapshots = self.ec2.snapshots.filter(OwnerIds=['self'])
+        return list(self.cache.get_or_load('ebs_snapshots', self.region, (), self._load_snapshots))
+
+    def _load_snapshots(self):
         snapshot_list = []
-        for snapshot in snapshots:
-            snapshot_list.append(snapshot)
-        return snapshot_list
+        for page in self.ec2_client.get_paginator('describe_snapshots').paginate(OwnerIds=['self']):
+            for snapshot in page['Snapshots']:
+                snapshot_list.append(SnapshotRecord.from_response(snapshot, self.region))
+        return tuple(snapshot_list)
 
-    def take_snapshot_of_volume(self, volume_id, description: str = DEFAULT_SNAPSHOT_NAME):
+    def take_snapshot_of_volume(self, volume_id, description: str = DEFAULT_SNAPSHOT_NAME, tags: dict = None):
         """
         Take a snapshot of an EBS volume.
         :param volume_id: The ID of the EBS volume to snapshot.
         :param description: Description for the snapshot.
-        :return: The created snapshot's information.
+        :param tags: Optional dict of tag key to value applied to the snapshot at creation.
+        :return: SnapshotRecord of the created snapshot.
         """
-        response = self.ec2.Volume(volume_id).create_snapshot(Description=description)
-        return response
+        params = {'VolumeId': volume_id, 'Description': description}
+        tag_specifications = build_tag_specifications(tags, ['snapshot'])
+        if tag_specifications:
+            params['TagSpecifications'] = tag_specifications
+        response = self.ec2_client.create_snapshot(**params)
+        self.cache.invalidate('ebs_snapshots', self.region)
+        return SnapshotRecord.from_response(response, self.region)
+
+    def snapshot_instance(self, instance_id, description: str = DEFAULT_SNAPSHOT_NAME, tags: dict = None,
+                          exclude_boot_volume: bool = False, rate_limiter: RateLimiter = None):
+        """
+        Take crash-consistent snapshots of every EBS volume attached to an instance with one create_snapshots call.
+        The snapshots are tagged at creation with tags and with the tags of their source volume.
+        :param instance_id: The ID of the EC2 instance.
+        :param description: Description for the snapshots.
+        :param tags: Optional dict of tag key to value applied to every snapshot.
+        :param exclude_boot_volume: If True, skip the instance's root volume.
+        :param rate_limiter: Optional RateLimiter shared by concurrent callers.
+        :return: List of SnapshotRecord objects, one per volume.
+        """
+        params = {
+            'InstanceSpecification': {'InstanceId': instance_id, 'ExcludeBootVolume': exclude_boot_volume},
+            'Description': description,
+            'CopyTagsFromSource': 'volume'
+        }
+        tag_specifications = build_tag_specifications(tags, ['snapshot'])
+        if tag_specifications:
+            params['TagSpecifications'] = tag_specifications
+
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        response = self.ec2_client.create_snapshots(**params)
+        self.cache.invalidate('ebs_snapshots', self.region)
+        return [SnapshotRecord.from_response(snapshot, self.region) for snapshot in response['Snapshots']]
+
+    def snapshot_instances(self, instance_ids, description: str = DEFAULT_SNAPSHOT_NAME, tags: dict = None,
+                           exclude_boot_volume: bool = False, max_workers: int = EBS_SNAPSHOT_MAX_WORKERS,
+                           requests_per_second: float = EBS_SNAPSHOT_REQUESTS_PER_SECOND):
+        """
+        Snapshot every volume of many instances, one create_snapshots call per instance.
+        Calls run on a bounded thread pool and share a rate limiter, so large batches stay under the API rate
+        limits; throttled calls are also retried by the client's adaptive retry mode.
+        :param instance_ids: IDs of the EC2 instances.
+        :param description: Description for the snapshots.
+        :param tags: Optional dict of tag key to value applied to every snapshot.
+        :param exclude_boot_volume: If True, skip each instance's root volume.
+        :param max_workers: Maximum number of concurrent create_snapshots calls.
+        :param requests_per_second: Maximum create_snapshots calls started per second.
+        :return: SnapshotBatchResult
+        """
+        rate_limiter = RateLimiter(requests_per_second)
+        result = SnapshotBatchResult()
+        instance_ids = list(dict.fromkeys(instance_ids))
+        if not instance_ids:
+            return result
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(instance_ids))) as executor:
+            futures = {instance_id: executor.submit(self.snapshot_instance, instance_id, description, tags,
+                                                    exclude_boot_volume, rate_limiter)
+                       for instance_id in instance_ids}
+            for instance_id, future in futures.items():
+                try:
+                    result.results[instance_id] = future.result()
+                except Exception as e:
+                    result.errors[instance_id] = e
+        return result
+
+    def copy_snapshots(self, snapshots, destination_clients: dict, description: str = None, tags: dict = None,
+                       max_in_flight: int = EBS_COPY_MAX_IN_FLIGHT_PER_REGION,
+                       timeout: float = EBS_COPY_TIMEOUT_SECONDS):
+        """
+        Create a pipeline that copies snapshots of this region to other regions; call its run method
+        (e.g., as a background job) to copy them.
+        :param snapshots: SnapshotRecord objects to copy (e.g., from list_snapshots).
+        :param destination_clients: dict of destination region name to a boto3 EC2 client of that region.
+        :param description: Description for the copies (default names the source snapshot and region).
+        :param tags: Optional dict of tag key to value applied to every copy, on top of the source snapshot's tags.
+        :param max_in_flight: Maximum number of copies in progress per destination region.
+        :param timeout: Seconds to run before giving up on the copies not completed.
+        :return: SnapshotCopyPipeline
+        """
+        return SnapshotCopyPipeline(self, snapshots, destination_clients, description, tags, max_in_flight, timeout)
+
+    @staticmethod
+    def _retention_group(snapshot):
+        if not snapshot.volume_id or snapshot.volume_id == EBS_PLACEHOLDER_VOLUME_ID:
+            return snapshot.id
+        return snapshot.volume_id
+
+    def prune_snapshots(self, policy: RetentionPolicy, volume_ids: list = None, dry_run: bool = True):
+        """
+        Apply a retention policy to the account's completed snapshots, grouped by source volume.
+        Snapshots without a real source volume (copies made with CopySnapshot report EBS_PLACEHOLDER_VOLUME_ID) are
+        unrelated to each other, so each is its own group: count rules keep it, and only max_age_days can delete it.
+        :param policy: RetentionPolicy to apply to each volume's snapshots.
+        :param volume_ids: Only prune snapshots of these volumes (default is every volume).
+        :param dry_run: If True, only report what would be deleted.
+        :return: RetentionResult
+        """
+        snapshots = [snapshot for snapshot in self.list_snapshots()
+                     if snapshot.state == 'completed' and (not volume_ids or snapshot.volume_id in volume_ids)]
+        plan = plan_retention(snapshots, policy, self._retention_group, lambda snapshot: snapshot.start_time)
+        return self.apply_snapshot_retention(plan, dry_run)
+
+    def apply_snapshot_retention(self, plan: RetentionPlan, dry_run: bool = False):
+        """
+        Delete the snapshots of a retention plan, e.g. the plan of a dry run the user has reviewed, so exactly the
+        snapshots shown are deleted.
+        :param plan: RetentionPlan from prune_snapshots.
+        :param dry_run: If True, only report what would be deleted.
+        :return: RetentionResult
+        """
+        result = apply_retention(plan, lambda snapshot_id: self.ec2_client.delete_snapshot(SnapshotId=snapshot_id),
+                                 dry_run)
+        if result.deleted:
+            self.cache.invalidate('ebs_snapshots', self.region)
+        return result
 
     def create_volume_from_snapshot(self, snapshot_id, availability_zone, volume_type: str = DEFAULT_VOLUME_TYPE):
         """
@@ -118,8 +401,156 @@ class EBSController:
             AvailabilityZone=availability_zone,
             VolumeType=volume_type
         )
+        self.cache.invalidate('ebs_volumes', self.region)
         return response
 
+    def restore_volumes(self, specs, tags: dict = None, fast_snapshot_restore: bool = False, wait: bool = True,
+                        max_workers: int = EBS_RESTORE_MAX_WORKERS,
+                        requests_per_second: float = EBS_CREATE_VOLUME_REQUESTS_PER_SECOND,
+                        timeout: float = WAITER_DEFAULT_TIMEOUT_SECONDS):
+        """
+        Create many volumes from snapshots concurrently.
+        With fast_snapshot_restore, fast snapshot restore is first enabled for each snapshot in the Availability
+        Zones it is restored to, so the new volumes are fully initialised instead of loading blocks lazily.
+        It is disabled again once the volumes are created, except where it was already enabled.
+        :param specs: Iterable of (snapshot ID, Availability Zone) or (snapshot ID, Availability Zone, volume type).
+        :param tags: Optional dict of tag key to value applied to every volume at creation.
+        :param fast_snapshot_restore: If True, enable fast snapshot restore before creating the volumes.
+        :param wait: If True, wait for every volume to be 'available' with batched describe_volumes polls.
+        :param max_workers: Maximum number of concurrent create_volume calls.
+        :param requests_per_second: Maximum create_volume calls started per second.
+        :param timeout: Seconds to wait for the volumes to be available.
+        :return: VolumeRestoreResult
+        :raises Exception: If no volume could be created, so a background job running the restore fails.
+        """
+        specs = [(spec[0], spec[1], spec[2] if len(spec) > 2 else DEFAULT_VOLUME_TYPE) for spec in specs]
+        result = VolumeRestoreResult()
+        if not specs:
+            return result
+
+        enabled_pairs = []
+        if fast_snapshot_restore:
+            enabled_pairs = self.enable_fast_snapshot_restores({(spec[0], spec[1]) for spec in specs}, result)
+
+        rate_limiter = RateLimiter(requests_per_second)
+        tag_specifications = build_tag_specifications(tags, ['volume'])
+
+        def create(snapshot_id, availability_zone, volume_type):
+            params = {'SnapshotId': snapshot_id, 'AvailabilityZone': availability_zone, 'VolumeType': volume_type}
+            if tag_specifications:
+                params['TagSpecifications'] = tag_specifications
+            rate_limiter.acquire()
+            return VolumeRecord.from_response(self.ec2_client.create_volume(**params), self.region)
+
+        try:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(specs))) as executor:
+                futures = [(spec, executor.submit(create, *spec)) for spec in specs]
+                for spec, future in futures:
+                    try:
+                        result.volumes.append((spec, future.result()))
+                    except Exception as e:
+                        result.errors.append((spec, e))
+        finally:
+            self.cache.invalidate('ebs_volumes', self.region)
+            if enabled_pairs:
+                self.disable_fast_snapshot_restores(enabled_pairs, result)
+        if not result.volumes:
+            spec, error = result.errors[0]
+            raise Exception(f"All {len(result.errors)} create_volume call(s) failed, e.g. for snapshot {spec[0]} "
+                            f"in {spec[1]}: {error}. {result.summary()}")
+        if wait and result.volumes:
+            result.states = self.wait_for_volumes([volume.id for _, volume in result.volumes], 'available', timeout)
+        return result
+
+    def get_fast_snapshot_restore_states(self, snapshot_ids):
+        """
+        Get the fast snapshot restore state of snapshots in every Availability Zone where it is set.
+        :param snapshot_ids: IDs of the EBS snapshots.
+        :return: dict of (snapshot ID, Availability Zone) to state (e.g., 'optimizing', 'enabled').
+        """
+        states = {}
+        paginator = self.ec2_client.get_paginator('describe_fast_snapshot_restores')
+        for page in paginator.paginate(Filters=[{'Name': 'snapshot-id', 'Values': sorted(set(snapshot_ids))}]):
+            for fast_restore in page['FastSnapshotRestores']:
+                states[(fast_restore['SnapshotId'], fast_restore['AvailabilityZone'])] = fast_restore['State']
+        return states
+
+    def enable_fast_snapshot_restores(self, pairs, result=None, timeout: float = EBS_FAST_RESTORE_TIMEOUT_SECONDS):
+        """
+        Enable fast snapshot restore for (snapshot, Availability Zone) pairs and wait until it is 'enabled'.
+        Pairs where it is already set are left as they are. One call is made per Availability Zone.
+        :param pairs: Iterable of (snapshot ID, Availability Zone) tuples.
+        :param result: Optional VolumeRestoreResult whose fast_restore_errors collects pairs that failed.
+        :param timeout: Seconds to wait for the pairs to be enabled.
+        :return: List of the pairs this call enabled.
+        """
+        result = result if result is not None else VolumeRestoreResult()
+        pairs = set(pairs)
+        existing = self.get_fast_snapshot_restore_states(snapshot_id for snapshot_id, _ in pairs)
+        already_set = {pair for pair, state in existing.items() if state in ('enabling', 'optimizing', 'enabled')}
+        snapshot_ids_by_zone = {}
+        for snapshot_id, availability_zone in pairs - already_set:
+            snapshot_ids_by_zone.setdefault(availability_zone, []).append(snapshot_id)
+
+        enabled = []
+        for availability_zone, snapshot_ids in snapshot_ids_by_zone.items():
+            try:
+                response = self.ec2_client.enable_fast_snapshot_restores(AvailabilityZones=[availability_zone],
+                                                                         SourceSnapshotIds=sorted(snapshot_ids))
+            except Exception as e:
+                for snapshot_id in snapshot_ids:
+                    result.fast_restore_errors[(snapshot_id, availability_zone)] = str(e)
+                continue
+            enabled += [(item['SnapshotId'], item['AvailabilityZone']) for item in response.get('Successful', [])]
+            for item in response.get('Unsuccessful', []):
+                for error in item.get('FastSnapshotRestoreStateErrors', []):
+                    result.fast_restore_errors[(item['SnapshotId'], error.get('AvailabilityZone'))] = \
+                        error.get('Error', {}).get('Message')
+
+        # the pairs enabled so far are returned even if the wait fails, so the caller can disable them again
+        try:
+            futures = {pair: waiter_multiplexer.wait_for(self.ec2_client, 'ebs_fast_snapshot_restore',
+                                                         fast_restore_id(*pair), 'enabled', timeout)
+                       for pair in enabled}
+            for pair, state in waiter_multiplexer.wait_all(futures).items():
+                if state != 'enabled':
+                    result.fast_restore_errors[pair] = f"fast snapshot restore is '{state}', volumes load lazily"
+        except Exception as e:
+            for pair in enabled:
+                result.fast_restore_errors.setdefault(pair, f"waiting for fast snapshot restore failed: {e}")
+        return enabled
+
+    def disable_fast_snapshot_restores(self, pairs, result=None):
+        """
+        Disable fast snapshot restore for (snapshot, Availability Zone) pairs, one call per Availability Zone.
+        A failed call does not stop the others, since fast snapshot restore is billed per hour in each zone.
+        :param pairs: Iterable of (snapshot ID, Availability Zone) tuples.
+        :param result: Optional VolumeRestoreResult whose fast_restore_errors collects pairs left enabled.
+        :return: VolumeRestoreResult with the pairs that could not be disabled in fast_restore_errors.
+        """
+        result = result if result is not None else VolumeRestoreResult()
+        snapshot_ids_by_zone = {}
+        for snapshot_id, availability_zone in pairs:
+            snapshot_ids_by_zone.setdefault(availability_zone, []).append(snapshot_id)
+        for availability_zone, snapshot_ids in snapshot_ids_by_zone.items():
+            try:
+                response = self.ec2_client.disable_fast_snapshot_restores(AvailabilityZones=[availability_zone],
+                                                                          SourceSnapshotIds=sorted(snapshot_ids))
+            except Exception as e:
+                for snapshot_id in snapshot_ids:
+                    result.fast_restore_left_enabled.add((snapshot_id, availability_zone))
+                    result.fast_restore_errors[(snapshot_id, availability_zone)] = \
+                        f"could not disable fast snapshot restore, still billed: {e}"
+                continue
+            for item in response.get('Unsuccessful', []):
+                for error in item.get('FastSnapshotRestoreStateErrors', []):
+                    message = error.get('Error', {}).get('Message')
+                    pair = (item['SnapshotId'], error.get('AvailabilityZone'))
+                    result.fast_restore_left_enabled.add(pair)
+                    result.fast_restore_errors[pair] = \
+                        f"could not disable fast snapshot restore, still billed: {message}"
+        return result
+
     def delete_snapshot(self, snapshot_id):
         """
         Delete an EBS snapshot.
@@ -127,17 +558,517 @@ class EBSController:
         :return: Response from the delete_snapshot call.
         """
         response = self.ec2.Snapshot(snapshot_id).delete()
+        self.cache.invalidate('ebs_snapshots', self.region)
         return response
 
-    def create_snapshot(self, volume_id, description: str = DEFAULT_SNAPSHOT_NAME):
+    def wait_for_volumes(self, volume_ids, target_state: str = 'available',
+                         timeout: float = WAITER_DEFAULT_TIMEOUT_SECONDS):
         """
-        Take a snapshot of an EBS volume.
-        :param volume_id: The ID of the EBS volume to snapshot.
-        :param description: Description for the snapshot.
-        :return: The created snapshot's information.
+        Wait for many EBS volumes to reach a state, polled with batched describe_volumes calls.
+        :param volume_ids: IDs of the EBS volumes to wait for.
+        :param target_state: Volume state to wait for (e.g., 'available', 'in-use', 'deleted').
+        :param timeout: Seconds to wait before giving up on a volume.
+        :return: dict of volume ID to the last state seen (target_state unless the wait failed or timed out).
         """
-        response = self.ec2.create_snapshot(
-            VolumeId=volume_id,
-            Description=description
-        )
-        return response
+        futures = {volume_id: waiter_multiplexer.wait_for(self.ec2_client, 'ebs_volume', volume_id, target_state,
+                                                          timeout)
+                   for volume_id in volume_ids}
+        states = waiter_multiplexer.wait_all(futures)
+        self.cache.invalidate('ebs_volumes', self.region)
+        return states
+
+    def wait_for_snapshots(self, snapshot_ids, target_state: str = 'completed',
+                           timeout: float = WAITER_DEFAULT_TIMEOUT_SECONDS):
+        """
+        Wait for many EBS snapshots to reach a state, polled with batched describe_snapshots calls.
+        :param snapshot_ids: IDs of the EBS snapshots to wait for.
+        :param target_state: Snapshot state to wait for (e.g., 'completed').
+        :param timeout: Seconds to wait before giving up on a snapshot.
+        :return: dict of snapshot ID to the last state seen (target_state unless the wait failed or timed out).
+        """
+        futures = {snapshot_id: waiter_multiplexer.wait_for(self.ec2_client, 'ebs_snapshot', snapshot_id,
+                                                            target_state, timeout)
+                   for snapshot_id in snapshot_ids}
+        states = waiter_multiplexer.wait_all(futures)
+        self.cache.invalidate('ebs_snapshots', self.region)
+        return states
+
+
+class VolumeRestoreResult:
+    def __init__(self):
+        """
+        Results of a bulk restore of volumes from snapshots.
+        volumes lists (spec, VolumeRecord) for each created volume, errors lists (spec, exception) for each
+        failed one, fast_restore_errors maps (snapshot ID, Availability Zone) to why fast snapshot restore was not
+        used or not disabled, fast_restore_left_enabled holds the pairs that could not be disabled (and are still
+        billed), and states maps volume ID to the state it reached if the restore waited.
+        """
+        self.volumes = []
+        self.errors = []
+        self.fast_restore_errors = {}
+        self.fast_restore_left_enabled = set()
+        self.states = {}
+
+    def summary(self):
+        """
+        Describe the result in one line.
+        :return: Summary string.
+        """
+        available = sum(1 for state in self.states.values() if state == 'available')
+        text = f"Created {len(self.volumes)} volume(s), {len(self.errors)} failed"
+        if self.states:
+            text += f", {available} available"
+        not_used = len(self.fast_restore_errors) - len(self.fast_restore_left_enabled)
+        if not_used:
+            text += f", fast snapshot restore not used for {not_used} snapshot/zone pair(s)"
+        if self.fast_restore_left_enabled:
+            pairs = ', '.join(f"{snapshot_id} in {zone}"
+                              for snapshot_id, zone in sorted(self.fast_restore_left_enabled))
+            text += f", fast snapshot restore STILL ENABLED (billed hourly, disable it manually) for {pairs}"
+        return text + "."
+
+
+class VolumeModificationTracker:
+    FINAL_STATES = ('completed', 'failed')
+
+    def __init__(self, ebs_controller, volume_ids, target_state: str = 'completed',
+                 timeout: float = WAITER_DEFAULT_TIMEOUT_SECONDS):
+        """
+        Poll the modifications of many volumes with batched describe_volumes_modifications calls and keep their
+        latest state and percent complete. The poll delay backs off while no progress is made.
+        :param ebs_controller: EBSController of the volumes' region.
+        :param volume_ids: IDs of the modified EBS volumes.
+        :param target_state: 'optimizing' (the new settings are usable) or 'completed'.
+        :param timeout: Seconds to poll before giving up.
+        """
+        self.ebs_controller = ebs_controller
+        self.volume_ids = list(dict.fromkeys(volume_ids))
+        self.target_state = target_state
+        self.timeout = timeout
+        self.modifications = {}
+        self.polls = 0
+        self.poll_error = None
+        self.timed_out = False
+
+    def _is_done(self, record):
+        return record.state in self.FINAL_STATES or (self.target_state == 'optimizing'
+                                                     and record.state == 'optimizing')
+
+    def poll(self):
+        """
+        Refresh the modifications of the volumes that are not done yet.
+        :return: dict of volume ID to VolumeModificationRecord.
+        """
+        pending = [volume_id for volume_id in self.volume_ids
+                   if volume_id not in self.modifications or not self._is_done(self.modifications[volume_id])]
+        if pending:
+            self.polls += 1
+            self.modifications.update(self.ebs_controller.get_volume_modifications(pending))
+        return self.modifications
+
+    def is_done(self):
+        """
+        :return: True once every volume has reached the target state or failed.
+        """
+        return all(volume_id in self.modifications and self._is_done(self.modifications[volume_id])
+                   for volume_id in self.volume_ids)
+
+    def run(self):
+        """
+        Poll until every volume is done or the timeout expires. Throttled, server and network errors are retried with
+        backoff until the timeout; volumes not done by then are reported as timed out.
+        :return: self, so a background job's result describes the modifications.
+        """
+        deadline = time.monotonic() + self.timeout
+        delay = WAITER_MIN_DELAY_SECONDS
+        while True:
+            before = {volume_id: (record.state, record.progress) for volume_id, record in self.modifications.items()}
+            try:
+                self.poll()
+                self.poll_error = None
+            except Exception as e:
+                if not is_transient_error(e):
+                    raise
+                self.poll_error = e
+            if self.is_done() or time.monotonic() >= deadline:
+                break
+            after = {volume_id: (record.state, record.progress) for volume_id, record in self.modifications.items()}
+            if self.poll_error is not None:
+                delay = min(delay * 2, WAITER_MAX_DELAY_SECONDS)
+            elif after != before:
+                delay = WAITER_MIN_DELAY_SECONDS
+            else:
+                delay = min(delay * WAITER_BACKOFF_FACTOR, WAITER_MAX_DELAY_SECONDS)
+            time.sleep(delay)
+        self.timed_out = not self.is_done()
+        self.ebs_controller.cache.invalidate('ebs_volumes', self.ebs_controller.region)
+        return self
+
+    def summary(self):
+        """
+        Describe the progress of the modifications, per volume for small batches. After a run that timed out, the
+        volumes not at the target state are shown as timed out.
+        :return: Summary string.
+        """
+        records = [self.modifications.get(volume_id) for volume_id in self.volume_ids]
+
+        def describe(record):
+            state = f"{record.state} {record.progress}%" if record else 'pending'
+            if self.timed_out and not (record and self._is_done(record)):
+                return f"timed out ({state})"
+            return state
+
+        if len(records) <= EBS_MODIFICATION_PROGRESS_DETAIL_LIMIT:
+            text = ', '.join(f"{volume_id} {describe(record)}" for volume_id, record in zip(self.volume_ids, records))
+        else:
+            counts = {}
+            for record in records:
+                state = record.state if record else 'pending'
+                if self.timed_out and not (record and self._is_done(record)):
+                    state = 'timed out'
+                counts[state] = counts.get(state, 0) + 1
+            average = sum(record.progress or 0 for record in records if record) / len(records)
+            text = f"{', '.join(f'{count} {state}' for state, count in sorted(counts.items()))}, {average:.0f}% average"
+        if self.poll_error is not None:
+            text += f" (last poll failed: {self.poll_error})"
+        return text
+
+
+class _SnapshotCopy:
+    __slots__ = ('source', 'region', 'copy_id', 'state', 'progress', 'error')
+
+    def __init__(self, source, region):
+        self.source = source
+        self.region = region
+        self.copy_id = None
+        self.state = 'queued'
+        self.progress = 0
+        self.error = None
+
+    @property
+    def size(self):
+        return self.source.volume_size or 0
+
+
+class SnapshotCopyPipeline:
+    FINAL_STATES = ('completed', 'error')
+
+    def __init__(self, ebs_controller, snapshots, destination_clients: dict, description: str = None,
+                 tags: dict = None, max_in_flight: int = EBS_COPY_MAX_IN_FLIGHT_PER_REGION,
+                 timeout: float = EBS_COPY_TIMEOUT_SECONDS):
+        """
+        Copy snapshots to other regions, keeping at most max_in_flight copies in progress per destination region.
+        Each region's queue starts with the largest snapshots, so the copy window depends on the total size rather
+        than on the order of the snapshots. Source snapshots still pending wait until they complete before they
+        are queued, and sources in 'error' state fail straight away. Copies in progress are polled with one batched
+        describe_snapshots call per region, and their progress gives the throughput and ETA.
+        :param ebs_controller: EBSController of the source region.
+        :param snapshots: SnapshotRecord objects to copy.
+        :param destination_clients: dict of destination region name to a boto3 EC2 client of that region.
+        :param description: Description for the copies (default names the source snapshot and region).
+        :param tags: Optional dict of tag key to value applied to every copy, on top of the source snapshot's tags.
+        :param max_in_flight: Maximum number of copies in progress per destination region.
+        :param timeout: Seconds to run before giving up on the copies not completed.
+        """
+        self.ebs_controller = ebs_controller
+        self.destination_clients = destination_clients
+        self.description = description
+        self.tags = tags or {}
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        snapshots = sorted({snapshot.id: snapshot for snapshot in snapshots}.values(),
+                           key=lambda snapshot: snapshot.volume_size or 0, reverse=True)
+        self.copies = [_SnapshotCopy(snapshot, region) for region in destination_clients for snapshot in snapshots]
+        for copy in self.copies:
+            if copy.source.state == 'error':
+                copy.state, copy.error = 'error', "Source snapshot is in 'error' state"
+            elif copy.source.state != 'completed':
+                # CopySnapshot rejects snapshots still being created
+                copy.state = 'waiting'
+        self.poll_error = None
+        self.started_at = None
+        self.finished_at = None
+
+    def _start(self, copy):
+        source_region = self.ebs_controller.region
+        params = {
+            'SourceRegion': source_region,
+            'SourceSnapshotId': copy.source.id,
+            'Description': self.description or f"Copy of {copy.source.id} from {source_region}"
+        }
+        tag_specifications = build_tag_specifications({**dict(copy.source.tags), **self.tags}, ['snapshot'])
+        if tag_specifications:
+            params['TagSpecifications'] = tag_specifications
+        response = self.destination_clients[copy.region].copy_snapshot(**params)
+        copy.copy_id = response['SnapshotId']
+        copy.state = 'pending'
+
+    def _fill(self, region):
+        """
+        Start queued copies to a region until max_in_flight copies are in progress there.
+        :return: True if a copy was started or failed to start.
+        """
+        changed = False
+        in_flight = sum(1 for copy in self.copies if copy.region == region and copy.state == 'pending')
+        for copy in self.copies:
+            if in_flight >= self.max_in_flight:
+                break
+            if copy.region != region or copy.state != 'queued':
+                continue
+            try:
+                self._start(copy)
+                in_flight += 1
+            except ClientError as e:
+                # the region's concurrent copy limit is lower than max_in_flight; retry after the next poll
+                if e.response.get('Error', {}).get('Code') == 'ResourceLimitExceeded':
+                    break
+                copy.state, copy.error = 'error', str(e)
+            except Exception as e:
+                copy.state, copy.error = 'error', str(e)
+            changed = True
+        return changed
+
+    def _poll_sources(self):
+        """
+        Queue the copies whose source snapshot has completed, with batched describe_snapshots calls in the source
+        region.
+        :return: True if any copy changed.
+        """
+        waiting = {}
+        for copy in self.copies:
+            if copy.state == 'waiting':
+                waiting.setdefault(copy.source.id, []).append(copy)
+        states = {}
+        for chunk in chunk_list(list(waiting), EBS_COPY_DESCRIBE_CHUNK_SIZE):
+            for page in self.ebs_controller.ec2_client.get_paginator('describe_snapshots').paginate(
+                    Filters=[{'Name': 'snapshot-id', 'Values': chunk}]):
+                for snapshot in page['Snapshots']:
+                    states[snapshot['SnapshotId']] = snapshot['State']
+
+        changed = False
+        for snapshot_id, copies in waiting.items():
+            state = states.get(snapshot_id)
+            for copy in copies:
+                if state == 'completed':
+                    copy.state = 'queued'
+                elif state is None or state == 'error':
+                    copy.state = 'error'
+                    copy.error = "Source snapshot no longer exists" if state is None else \
+                        "Source snapshot is in 'error' state"
+                else:
+                    continue
+                changed = True
+        return changed
+
+    def poll(self):
+        """
+        Queue the copies whose source snapshot has completed, and refresh the state and progress of the copies in
+        progress, one batched call per destination region.
+        :return: True if any copy changed.
+        """
+        changed = self._poll_sources()
+        for region, client in self.destination_clients.items():
+            in_flight = {copy.copy_id: copy for copy in self.copies if copy.region == region
+                         and copy.state == 'pending'}
+            for chunk in chunk_list(list(in_flight), EBS_COPY_DESCRIBE_CHUNK_SIZE):
+                for page in client.get_paginator('describe_snapshots').paginate(
+                        Filters=[{'Name': 'snapshot-id', 'Values': chunk}]):
+                    for snapshot in page['Snapshots']:
+                        copy = in_flight[snapshot['SnapshotId']]
+                        progress = int((snapshot.get('Progress') or '0').rstrip('%') or 0)
+                        if (snapshot['State'], progress) != (copy.state, copy.progress):
+                            changed = True
+                        copy.state, copy.progress = snapshot['State'], progress
+                        if copy.state == 'completed':
+                            copy.progress = 100
+                        elif copy.state == 'error':
+                            copy.error = snapshot.get('StateMessage') or 'Snapshot copy failed'
+        return changed
+
+    def is_done(self):
+        """
+        :return: True once every copy has completed or failed.
+        """
+        return all(copy.state in self.FINAL_STATES for copy in self.copies)
+
+    def run(self):
+        """
+        Start and poll copies until every copy is done or the timeout expires. Failed polls are retried with backoff
+        until the timeout; copies still waiting, queued or in progress then are reported as timed out in errors().
+        :return: self, so a background job's result describes the copies.
+        """
+        self.started_at = time.monotonic()
+        deadline = self.started_at + self.timeout
+        delay = WAITER_MIN_DELAY_SECONDS
+        while True:
+            changed = any([self._fill(region) for region in self.destination_clients])
+            if self.is_done() or time.monotonic() >= deadline:
+                break
+            time.sleep(delay)
+            try:
+                changed = self.poll() or changed
+                self.poll_error = None
+            except Exception as e:
+                # throttled or unreachable: back off and try again until the deadline
+                self.poll_error = e
+                changed = False
+            delay = WAITER_MIN_DELAY_SECONDS if changed else min(delay * WAITER_BACKOFF_FACTOR,
+                                                                 WAITER_MAX_DELAY_SECONDS)
+        for copy in self.copies:
+            if copy.state not in self.FINAL_STATES:
+                error = f"Timed out after {self.timeout:.0f}s while {copy.state}"
+                if copy.copy_id:
+                    error += f" (copy {copy.copy_id} may still complete)"
+                if self.poll_error is not None:
+                    error += f"; last poll failed: {self.poll_error}"
+                copy.state, copy.error = 'error', error
+        self.finished_at = time.monotonic()
+        for region in self.destination_clients:
+            self.ebs_controller.cache.invalidate('ebs_snapshots', region)
+        return self
+
+    def total_gib(self):
+        """
+        :return: Total GiB to copy, counting each snapshot once per destination region.
+        """
+        return sum(copy.size for copy in self.copies)
+
+    def copied_gib(self):
+        """
+        :return: GiB copied so far, estimated from the progress of each copy.
+        """
+        return sum(copy.size * copy.progress / 100 for copy in self.copies if copy.state != 'error')
+
+    def throughput(self):
+        """
+        :return: Average copy throughput in MiB/s since the pipeline started, or 0 before it starts.
+        """
+        if self.started_at is None:
+            return 0
+        elapsed = (self.finished_at or time.monotonic()) - self.started_at
+        return self.copied_gib() * 1024 / elapsed if elapsed > 0 else 0
+
+    def eta(self):
+        """
+        :return: Estimated time left as a timedelta at the current throughput, or None if unknown.
+        """
+        throughput = self.throughput()
+        if not throughput:
+            return None
+        remaining = sum(copy.size * (100 - copy.progress) / 100 for copy in self.copies
+                        if copy.state not in self.FINAL_STATES)
+        return timedelta(seconds=round(remaining * 1024 / throughput))
+
+    def results(self):
+        """
+        :return: dict of (source snapshot ID, region) to the ID of the completed copy.
+        """
+        return {(copy.source.id, copy.region): copy.copy_id for copy in self.copies if copy.state == 'completed'}
+
+    def errors(self):
+        """
+        :return: dict of (source snapshot ID, region) to the error of each failed copy.
+        """
+        return {(copy.source.id, copy.region): copy.error for copy in self.copies if copy.state == 'error'}
+
+    def summary(self):
+        """
+        Describe the progress of the copies with their throughput and ETA.
+        :return: Summary string.
+        """
+        counts = {}
+        for copy in self.copies:
+            counts[copy.state] = counts.get(copy.state, 0) + 1
+        eta = self.eta()
+        text = (f"{', '.join(f'{count} {state}' for state, count in sorted(counts.items()))}; "
+                f"{self.copied_gib():.1f}/{self.total_gib()} GiB, {self.throughput():.1f} MiB/s")
+        if not self.is_done():
+            text += f", ETA {eta if eta is not None else 'unknown'}"
+            if self.poll_error is not None:
+                text += f", retrying after poll error: {self.poll_error}"
+        return text
+
+
+class SnapshotBatchResult:
+    def __init__(self):
+        """
+        Results of a bulk instance snapshot.
+        results maps instance ID to the list of SnapshotRecord objects created for it,
+        errors maps instance ID to the exception raised for it.
+        """
+        self.results = {}
+        self.errors = {}
+
+    def snapshots(self):
+        """
+        :return: List of every SnapshotRecord created, across all instances.
+        """
+        return [snapshot for snapshots in self.results.values() for snapshot in snapshots]
+
+
+class VolumeIndex:
+    def __init__(self, volumes):
+        """
+        Two-way index between EBS volumes and the instances they are attached to, built from one pass over the
+        volumes' attachments.
+        :param volumes: Iterable of VolumeRecord objects.
+        """
+        self.volumes = {}
+        self.volume_ids_by_instance = {}
+        for volume in volumes:
+            self.volumes[volume.id] = volume
+            for attachment in volume.attachments:
+                self.volume_ids_by_instance.setdefault(attachment.instance_id, []).append(volume.id)
+
+    def instance_ids_of(self, volume_id):
+        """
+        Get the instances a volume is attached to.
+        :param volume_id: ID of the EBS volume.
+        :return: Tuple of instance IDs (empty if the volume is unattached or unknown).
+        """
+        volume = self.volumes.get(volume_id)
+        return volume.instance_ids if volume is not None else ()
+
+    def volumes_of(self, instance_id):
+        """
+        Get the volumes attached to an instance.
+        :param instance_id: ID of the EC2 instance.
+        :return: List of VolumeRecord objects.
+        """
+        return [self.volumes[volume_id] for volume_id in self.volume_ids_by_instance.get(instance_id, [])]
+
+    def devices_of(self, instance_id):
+        """
+        Get the device names in use on an instance.
+        :param instance_id: ID of the EC2 instance.
+        :return: Set of device names (e.g., {'/dev/xvda', '/dev/sdf'}).
+        """
+        return {attachment.device
+                for volume in self.volumes_of(instance_id)
+                for attachment in volume.attachments if attachment.instance_id == instance_id}
+
+    def next_free_device(self, instance_id, device: str = DEFAULT_DEVICE_NAME):
+        """
+        Suggest a device name that is not in use on an instance, starting from device and moving up the last letter.
+        :param instance_id: ID of the EC2 instance.
+        :param device: Preferred device name.
+        :return: The first free device name, or device if every letter up to 'z' is taken.
+        """
+        in_use = self.devices_of(instance_id)
+        prefix, letter = device[:-1], device[-1]
+        for code in range(ord(letter), ord('z') + 1):
+            if prefix + chr(code) not in in_use:
+                return prefix + chr(code)
+        return device
+
+    def attached(self):
+        """
+        :return: List of VolumeRecord objects attached to at least one instance.
+        """
+        return [volume for volume in self.volumes.values() if volume.attachments]
+
+    def unattached(self):
+        """
+        :return: List of VolumeRecord objects not attached to any instance.
+        """
+        return [volume for volume in self.volumes.values() if not volume.attachments]
@@ -1,46 +1,145 @@
-from src.utils.config import EC2_KEY_PAIR_NAME, DEFAULT_EC2_INSTANCE_TYPE
-from src.utils.list_utils import EC2ListType
+from dataclasses import replace
+
+from botocore.exceptions import ClientError
+
+from src.model.Records import InstanceRecord, InstanceStateChangeRecord
+from src.utils.config import EC2_KEY_PAIR_NAME, DEFAULT_EC2_INSTANCE_TYPE, EC2_DESCRIBE_PAGE_SIZE, \
+    EC2_BULK_ACTION_CHUNK_SIZE, EC2_WAIT_TIMEOUT_SECONDS, EC2_RUN_INSTANCES_MAX_COUNT
+from src.utils.inventory_cache import InventoryCache, inventory_cache
+from src.utils.list_utils import EC2ListType, chunk_list
+from src.utils.waiter_multiplexer import waiter_multiplexer
+
+# bulk action name -> (client method, response key, state the instances settle in)
+BULK_ACTIONS = {
+    'start': ('start_instances', 'StartingInstances', 'running'),
+    'stop': ('stop_instances', 'StoppingInstances', 'stopped'),
+    'terminate': ('terminate_instances', 'TerminatingInstances', 'terminated')
+}
+
+
+class PartialLaunchError(Exception):
+    def __init__(self, instances, requested, errors):
+        """
+        Raised when a launch starts fewer instances than requested, e.g. for lack of capacity.
+        :param instances: InstanceRecord objects of the instances that were launched.
+        :param requested: Number of instances requested.
+        :param errors: Errors reported by the API for the missing instances.
+        """
+        details = '; '.join(f"{error.get('ErrorCode')} {error.get('ErrorMessage')}" for error in errors[:3])
+        super().__init__(f"Launched {len(instances)} of {requested} instance(s): {details or 'no error reported'}")
+        self.instances = instances
+        self.requested = requested
+        self.errors = errors
 
 
 class EC2Controller:
-    def __init__(self, ec2, ec2_client):
+    def __init__(self, ec2, ec2_client, cache: InventoryCache = None):
         """
         Initialise the EC2Controller with a boto3 EC2 resource.
         :param ec2: Boto3 EC2 resource object.
         :param ec2_client: Boto3 EC2 client object.
+        :param cache: InventoryCache for listings (default is the shared inventory_cache).
         :return: None
         """
         self.ec2 = ec2
         self.ec2_client = ec2_client
+        self.region = ec2_client.meta.region_name
+        self.cache = cache if cache is not None else inventory_cache
         self.list_options = {
             1: "All Instances",
             2: "Running Instances",
             3: "Stopped Instances"
         }
 
-    def get_ec2_instances(self, list_type: EC2ListType = EC2ListType.SPLIT):
+    def get_ec2_instances(self, list_type: EC2ListType = EC2ListType.SPLIT, tags: dict = None,
+                          instance_types: list = None, instance_ids: list = None,
+                          page_size: int = EC2_DESCRIBE_PAGE_SIZE):
         """
-        List all EC2 instances in the specified region.
+        List EC2 instances in the specified region.
+        RUNNING and STOPPED only fetch instances in that state ('stopped' for STOPPED), ALL and SPLIT fetch every state.
+        Results are served from the inventory cache until they expire or an instance is changed.
         :param list_type: EC2ListType indicating which instances to list (ALL, SPLIT, RUNNING, STOPPED).
-        :return: List of all EC2 instances Resource objects.
+        :param tags: Optional tag filters, see iter_ec2_instances.
+        :param instance_types: Optional list of instance types to include.
+        :param instance_ids: Optional list of instance IDs to include.
+        :param page_size: Number of instances requested per describe_instances page.
+        :return: dict of EC2ListType to lists of InstanceRecord objects.
         """
+        filters = {'tags': tags, 'instance_types': instance_types, 'instance_ids': instance_ids,
+                   'page_size': page_size}
+        instances = self.cache.get_or_load('ec2_instances', self.region, (list_type.name, filters),
+                                           lambda: self._load_ec2_instances(list_type, filters))
+        # callers replace the lists with IDs, so hand out fresh lists over the cached tuples
+        return {key: list(value) for key, value in instances.items()}
 
+    def _load_ec2_instances(self, list_type: EC2ListType, filters: dict):
         if list_type == EC2ListType.ALL:
-            return {EC2ListType.ALL: list(self.ec2.instances.all())}
+            return {EC2ListType.ALL: tuple(self.iter_ec2_instances(**filters))}
+        if list_type == EC2ListType.RUNNING:
+            return {EC2ListType.RUNNING: tuple(self.iter_ec2_instances(states=['running'], **filters))}
+        if list_type == EC2ListType.STOPPED:
+            return {EC2ListType.STOPPED: tuple(self.iter_ec2_instances(states=['stopped'], **filters))}
 
         running_instances = []
         other_instances = []
-        for instance in self.ec2.instances.all():
-            if instance.state['Name'] == 'running':
+        for instance in self.iter_ec2_instances(**filters):
+            if instance.state == 'running':
                 running_instances.append(instance)
             else:
                 other_instances.append(instance)
 
         return {
-            EC2ListType.RUNNING: running_instances,
-            EC2ListType.STOPPED: other_instances
+            EC2ListType.RUNNING: tuple(running_instances),
+            EC2ListType.STOPPED: tuple(other_instances)
         }
 
+    def iter_ec2_instances(self, states: list = None, tags: dict = None, instance_types: list = None,
+                           instance_ids: list = None, page_size: int = EC2_DESCRIBE_PAGE_SIZE):
+        """
+        Lazily yield EC2 instances matching the filters, one describe_instances page at a time.
+        All filters are applied server-side, so only matching instances are downloaded.
+        :param states: Optional list of instance state names (e.g., ['running']).
+        :param tags: Optional dict of tag key to value or list of values. A value of None matches any instance
+        that has the tag key.
+        :param instance_types: Optional list of instance types (e.g., ['t3.micro']).
+        :param instance_ids: Optional list of instance IDs.
+        :param page_size: Number of instances requested per page (MaxResults, 5-1000).
+        :return: Generator of InstanceRecord objects.
+        """
+        params = {'Filters': build_instance_filters(states, tags, instance_types)}
+        if instance_ids:
+            # describe_instances does not accept MaxResults together with InstanceIds
+            params['InstanceIds'] = list(instance_ids)
+        else:
+            params['PaginationConfig'] = {'PageSize': page_size}
+
+        region = self.ec2_client.meta.region_name
+        paginator = self.ec2_client.get_paginator('describe_instances')
+        for page in paginator.paginate(**params):
+            for reservation in page['Reservations']:
+                for instance in reservation['Instances']:
+                    yield InstanceRecord.from_response(instance, region)
+
+    def stream_ec2_instances(self, states: list = None, page_size: int = EC2_DESCRIBE_PAGE_SIZE):
+        """
+        Yield EC2 instances as describe_instances pages arrive, so callers can show the first page early.
+        A fresh cached listing is replayed instead; a listing that is iterated to the end is cached.
+        :param states: Optional list of instance state names (e.g., ['running']).
+        :param page_size: Number of instances requested per describe_instances page.
+        :return: Generator of InstanceRecord objects.
+        """
+        params = ('stream', states, page_size)
+        cached = self.cache.get('ec2_instances', self.region, params)
+        if cached is not None:
+            yield from cached
+            return
+
+        instances = []
+        for instance in self.iter_ec2_instances(states=states, page_size=page_size):
+            instances.append(instance)
+            yield instance
+        self.cache.put('ec2_instances', self.region, params, tuple(instances))
+
     def stop_instance(self, instance_id):
         """
         Stop an EC2 instance by its ID.
@@ -49,18 +148,22 @@ class EC2Controller:
         """
         instance = self.ec2.Instance(instance_id)
         response = instance.stop()
+        self.cache.invalidate('ec2_instances', self.region)
         return response
 
-    def start_instance(self, instance_id):
+    def start_instance(self, instance_id, wait: bool = True):
         """
         Start an EC2 instance by its ID.
         :param instance_id: The ID of the EC2 instance to start.
+        :param wait: If True, block until the instance is running (use wait_for_instance_running in a job otherwise).
         :return: Response from the start_instances call.
         """
         instance = self.ec2.Instance(instance_id)
         response = instance.start()
-        print(f"Waiting for instance {instance_id} to enter 'running' state...")
-        self.wait_for_instance_running(instance_id)
+        self.cache.invalidate('ec2_instances', self.region)
+        if wait:
+            print(f"Waiting for instance {instance_id} to enter 'running' state...")
+            self.wait_for_instance_running(instance_id)
         return response
 
     def launch_instance(self, ami_id):
@@ -71,9 +174,107 @@ class EC2Controller:
             InstanceType=DEFAULT_EC2_INSTANCE_TYPE,
             KeyName=EC2_KEY_PAIR_NAME
         )
+        self.cache.invalidate('ec2_instances', self.region)
         instance = instances[0]
         return instance
 
+    def launch_instances(self, count: int, ami_id: str = None, instance_type: str = DEFAULT_EC2_INSTANCE_TYPE,
+                         tags: dict = None, launch_template: dict = None, wait: bool = False):
+        """
+        Launch many EC2 instances with as few API calls as possible.
+        Up to EC2_RUN_INSTANCES_MAX_COUNT instances are launched by a single run_instances call (MinCount=MaxCount).
+        Larger batches use one instant create_fleet call when a launch template is given, otherwise several
+        run_instances calls. Tags are applied at creation to the instances and their volumes.
+        :param count: Number of instances to launch.
+        :param ami_id: AMI ID (optional if the launch template sets it).
+        :param instance_type: Instance type (ignored when a launch template is given).
+        :param tags: Optional dict of tag key to value applied at creation.
+        :param launch_template: Optional launch template spec, e.g. {'LaunchTemplateId': 'lt-...', 'Version': '$Latest'}
+        or {'LaunchTemplateName': '...'}.
+        :param wait: If True, wait until all instances are running before returning.
+        :return: List of InstanceRecord objects, as returned by the API (state 'pending' unless wait is True).
+        :raises PartialLaunchError: If only some of the instances were launched (create_fleet fell short, or a later
+            run_instances batch failed); its instances attribute lists the ones launched.
+        """
+        tag_specifications = build_tag_specifications(tags, ['instance', 'volume'])
+
+        if count > EC2_RUN_INSTANCES_MAX_COUNT and launch_template:
+            try:
+                records = self._create_fleet(count, launch_template, tag_specifications)
+            except PartialLaunchError:
+                self.cache.invalidate('ec2_instances', self.region)
+                raise
+        else:
+            records = []
+            remaining = count
+            while remaining > 0:
+                batch_size = min(remaining, EC2_RUN_INSTANCES_MAX_COUNT)
+                try:
+                    records.extend(self._run_instances(batch_size, ami_id, instance_type, launch_template,
+                                                       tag_specifications))
+                except Exception as e:
+                    if not records:
+                        raise
+                    # earlier batches are running; report them rather than leave them untracked
+                    self.cache.invalidate('ec2_instances', self.region)
+                    code = e.response.get('Error', {}).get('Code') if isinstance(e, ClientError) else \
+                        type(e).__name__
+                    raise PartialLaunchError(records, count, [{'ErrorCode': code, 'ErrorMessage': str(e)}]) from e
+                remaining -= batch_size
+        self.cache.invalidate('ec2_instances', self.region)
+
+        if wait:
+            states = self.wait_for_instance_states([record.id for record in records], 'running')
+            records = [replace(record, state=states.get(record.id) or record.state) for record in records]
+
+        return records
+
+    def _run_instances(self, count, ami_id, instance_type, launch_template, tag_specifications):
+        params = {'MinCount': count, 'MaxCount': count}
+        if launch_template:
+            params['LaunchTemplate'] = launch_template
+        else:
+            params['InstanceType'] = instance_type
+            params['KeyName'] = EC2_KEY_PAIR_NAME
+        if ami_id:
+            params['ImageId'] = ami_id
+        if tag_specifications:
+            params['TagSpecifications'] = tag_specifications
+
+        response = self.ec2_client.run_instances(**params)
+        return [InstanceRecord.from_response(instance, self.region) for instance in response['Instances']]
+
+    def _create_fleet(self, count, launch_template, tag_specifications):
+        params = {
+            'Type': 'instant',
+            'LaunchTemplateConfigs': [{'LaunchTemplateSpecification': dict(launch_template)}],
+            'TargetCapacitySpecification': {'TotalTargetCapacity': count, 'DefaultTargetCapacityType': 'on-demand'}
+        }
+        params['LaunchTemplateConfigs'][0]['LaunchTemplateSpecification'].setdefault('Version', '$Latest')
+        # instant fleets only accept instance tags at creation
+        instance_tags = [spec for spec in tag_specifications if spec['ResourceType'] == 'instance']
+        if instance_tags:
+            params['TagSpecifications'] = instance_tags
+
+        response = self.ec2_client.create_fleet(**params)
+        records = []
+        for fleet_instances in response.get('Instances', []):
+            overrides = fleet_instances.get('LaunchTemplateAndOverrides', {}).get('Overrides', {})
+            for instance_id in fleet_instances.get('InstanceIds', []):
+                records.append(InstanceRecord.from_response({
+                    'InstanceId': instance_id,
+                    'State': {'Name': 'pending'},
+                    'InstanceType': fleet_instances.get('InstanceType'),
+                    'Placement': {'AvailabilityZone': overrides.get('AvailabilityZone')},
+                    'Tags': instance_tags[0]['Tags'] if instance_tags else []
+                }, self.region))
+        if not records and response.get('Errors'):
+            error = response['Errors'][0]
+            raise Exception(f"create_fleet launched no instances: {error.get('ErrorCode')} {error.get('ErrorMessage')}")
+        if len(records) < count:
+            raise PartialLaunchError(records, count, response.get('Errors', []))
+        return records
+
     def terminate_instance(self, instance_id):
         """
         Terminate an EC2 instance by its ID.
@@ -82,6 +283,7 @@ class EC2Controller:
         """
         instance = self.ec2.Instance(instance_id)
         response = instance.terminate()
+        self.cache.invalidate('ec2_instances', self.region)
         return response
 
     def wait_for_instance_running(self, instance_id):
@@ -90,7 +292,135 @@ class EC2Controller:
         :param instance_id: The ID of the EC2 instance to wait for.
         :return: None
         """
-        waiter = self.ec2_client.get_waiter('instance_running')
-        waiter.wait(
-            InstanceIds=[instance_id]
-        )
+        waiter_multiplexer.wait_for(self.ec2_client, 'ec2_instance', instance_id, 'running').result()
+        self.cache.invalidate('ec2_instances', self.region)
+
+    def start_instances(self, instance_ids, wait: bool = False):
+        """
+        Start any number of EC2 instances, see bulk_instance_action.
+        :param instance_ids: IDs of the EC2 instances to start.
+        :param wait: If True, wait until every started instance is running.
+        :return: dict of instance ID to InstanceStateChangeRecord.
+        """
+        return self.bulk_instance_action('start', instance_ids, wait)
+
+    def stop_instances(self, instance_ids, wait: bool = False):
+        """
+        Stop any number of EC2 instances, see bulk_instance_action.
+        :param instance_ids: IDs of the EC2 instances to stop.
+        :param wait: If True, wait until every stopped instance is stopped.
+        :return: dict of instance ID to InstanceStateChangeRecord.
+        """
+        return self.bulk_instance_action('stop', instance_ids, wait)
+
+    def terminate_instances(self, instance_ids, wait: bool = False):
+        """
+        Terminate any number of EC2 instances, see bulk_instance_action.
+        :param instance_ids: IDs of the EC2 instances to terminate.
+        :param wait: If True, wait until every terminated instance is terminated.
+        :return: dict of instance ID to InstanceStateChangeRecord.
+        """
+        return self.bulk_instance_action('terminate', instance_ids, wait)
+
+    def bulk_instance_action(self, action, instance_ids, wait: bool = False):
+        """
+        Start, stop or terminate many EC2 instances with one API call per EC2_BULK_ACTION_CHUNK_SIZE IDs.
+        If a chunk is rejected (e.g. one invalid ID), its instances are retried one by one so the error is
+        reported against the instance that caused it.
+        :param action: 'start', 'stop' or 'terminate'.
+        :param instance_ids: IDs of the EC2 instances to act on.
+        :param wait: If True, wait for all instances with batched polling, see wait_for_instance_states.
+        :return: dict of instance ID to InstanceStateChangeRecord.
+        """
+        method_name, response_key, target_state = BULK_ACTIONS[action]
+        api_call = getattr(self.ec2_client, method_name)
+        instance_ids = list(dict.fromkeys(instance_ids))
+
+        results = {}
+        for chunk in chunk_list(instance_ids, EC2_BULK_ACTION_CHUNK_SIZE):
+            try:
+                response = api_call(InstanceIds=chunk)
+                for state_change in response[response_key]:
+                    record = InstanceStateChangeRecord.from_response(state_change)
+                    results[record.id] = record
+            except ClientError as e:
+                if len(chunk) == 1:
+                    results[chunk[0]] = InstanceStateChangeRecord(chunk[0], None, None, str(e))
+                    continue
+                for instance_id in chunk:
+                    try:
+                        response = api_call(InstanceIds=[instance_id])
+                        record = InstanceStateChangeRecord.from_response(response[response_key][0])
+                    except ClientError as instance_error:
+                        record = InstanceStateChangeRecord(instance_id, None, None, str(instance_error))
+                    results[instance_id] = record
+        self.cache.invalidate('ec2_instances', self.region)
+
+        if wait:
+            pending = [instance_id for instance_id, record in results.items() if record.error is None]
+            final_states = self.wait_for_instance_states(pending, target_state)
+            for instance_id, state in final_states.items():
+                results[instance_id] = replace(results[instance_id], current_state=state)
+
+        return results
+
+    def wait_for_instance_states(self, instance_ids, target_state, timeout: float = EC2_WAIT_TIMEOUT_SECONDS):
+        """
+        Wait for many EC2 instances to reach a state.
+        The waits are registered with the shared waiter multiplexer, which polls all pending instances
+        with batched describe_instances calls.
+        :param instance_ids: IDs of the EC2 instances to wait for.
+        :param target_state: Instance state name to wait for (e.g., 'running').
+        :param timeout: Seconds to wait before giving up on an instance.
+        :return: dict of instance ID to the last state seen (target_state unless the wait failed or timed out).
+        """
+        futures = {instance_id: waiter_multiplexer.wait_for(self.ec2_client, 'ec2_instance', instance_id,
+                                                            target_state, timeout)
+                   for instance_id in instance_ids}
+        states = waiter_multiplexer.wait_all(futures)
+        self.cache.invalidate('ec2_instances', self.region)
+        return states
+
+def build_instance_filters(states: list = None, tags: dict = None, instance_types: list = None):
+    """
+    Build the describe_instances Filters list for the given criteria.
+    :param states: Optional list of instance state names.
+    :param tags: Optional dict of tag key to value or list of values (None matches any value).
+    :param instance_types: Optional list of instance types.
+    :return: List of filter dicts.
+    """
+    filters = []
+    if states:
+        filters.append({'Name': 'instance-state-name', 'Values': list(states)})
+    if instance_types:
+        filters.append({'Name': 'instance-type', 'Values': list(instance_types)})
+    return filters + build_tag_filters(tags)
+
+
+def build_tag_filters(tags: dict):
+    """
+    Build describe Filters for tags, shared by every EC2 describe call that supports tag filters.
+    :param tags: Optional dict of tag key to value or list of values (None matches any value).
+    :return: List of filter dicts.
+    """
+    filters = []
+    for key, value in (tags or {}).items():
+        if value is None:
+            filters.append({'Name': 'tag-key', 'Values': [key]})
+        else:
+            values = [value] if isinstance(value, str) else list(value)
+            filters.append({'Name': f'tag:{key}', 'Values': values})
+    return filters
+
+
+def build_tag_specifications(tags: dict, resource_types: list):
+    """
+    Build a TagSpecifications list applying the same tags to each resource type.
+    :param tags: dict of tag key to value (None or empty for no tags).
+    :param resource_types: Resource types to tag at creation (e.g., ['instance', 'volume']).
+    :return: List of tag specification dicts (empty if there are no tags).
+    """
+    if not tags:
+        return []
+    tag_list = [{'Key': key, 'Value': str(value)} for key, value in tags.items()]
+    return [{'ResourceType': resource_type, 'Tags': tag_list} for resource_type in resource_types]
@@ -1,19 +1,44 @@
+from src.model.Records import DBInstanceRecord, DBSnapshotRecord
 from src.utils.config import DEFAULT_RDS_DB_INSTANCE_CLASS, DEFAULT_DB_STORAGE_GIB
 from src.utils.credentials_handler import get_rds_master_credentials
+from src.utils.inventory_cache import InventoryCache, inventory_cache
+from src.utils.snapshot_retention import RetentionPolicy, RetentionPlan, plan_retention, apply_retention
+from src.utils.waiter_multiplexer import waiter_multiplexer, DELETED_STATE
 
 
 class RDSController:
-    def __init__(self, rds_client):
+    def __init__(self, rds_client, cache: InventoryCache = None):
+        """
+        Initialise the RDSController with a boto3 RDS client.
+        :param rds_client: Boto3 RDS client object.
+        :param cache: InventoryCache for listings (default is the shared inventory_cache).
+        """
         self.rds_client = rds_client
-        self.credentials = get_rds_master_credentials()
+        self.region = rds_client.meta.region_name
+        self.cache = cache if cache is not None else inventory_cache
+
+    @property
+    def credentials(self):
+        """
+        RDS master credentials, read on first use instead of when the controller is created.
+        :return: dict with 'RDS_MASTER_USERNAME' and 'RDS_MASTER_PASSWORD'
+        """
+        return get_rds_master_credentials()
 
     def list_db_instances(self):
         """
         List all RDS DB instances in the account.
-        :return: List of RDS DB instance identifiers.
+        Results are served from the inventory cache until they expire or a DB instance is changed.
+        :return: List of DBInstanceRecord objects.
         """
-        response = self.rds_client.describe_db_instances()
-        return response['DBInstances']
+        return list(self.cache.get_or_load('rds_instances', self.region, (), self._load_db_instances))
+
+    def _load_db_instances(self):
+        db_instances = []
+        for page in self.rds_client.get_paginator('describe_db_instances').paginate():
+            for db_instance in page['DBInstances']:
+                db_instances.append(DBInstanceRecord.from_response(db_instance, self.region))
+        return tuple(db_instances)
 
     def create_db_instance(self, db_name, db_id, engine, availability_zone):
         """
@@ -36,6 +61,7 @@ class RDSController:
             MultiAZ=False,
             PubliclyAccessible=True
         )
+        self.cache.invalidate('rds_instances', self.region)
         return response['DBInstance']['DBInstanceIdentifier']
 
     def delete_db_instance(self, db_id):
@@ -48,6 +74,7 @@ class RDSController:
             DBInstanceIdentifier=db_id,
             SkipFinalSnapshot=True
         )
+        self.cache.invalidate('rds_instances', self.region)
         return response['DBInstance']['DBInstanceIdentifier']
 
     def reboot_db_instance(self, db_id):
@@ -59,15 +86,23 @@ class RDSController:
         response = self.rds_client.reboot_db_instance(
             DBInstanceIdentifier=db_id
         )
+        self.cache.invalidate('rds_instances', self.region)
         return response['DBInstance']['DBInstanceIdentifier']
 
     def list_db_snapshots(self):
         """
         List all RDS DB snapshots in the account.
-        :return: List of RDS DB snapshot identifiers.
+        Results are served from the inventory cache until they expire or a DB snapshot is changed.
+        :return: List of DBSnapshotRecord objects.
         """
-        response = self.rds_client.describe_db_snapshots()
-        return response['DBSnapshots']
+        return list(self.cache.get_or_load('rds_snapshots', self.region, (), self._load_db_snapshots))
+
+    def _load_db_snapshots(self):
+        db_snapshots = []
+        for page in self.rds_client.get_paginator('describe_db_snapshots').paginate():
+            for db_snapshot in page['DBSnapshots']:
+                db_snapshots.append(DBSnapshotRecord.from_response(db_snapshot, self.region))
+        return tuple(db_snapshots)
 
     def create_db_snapshot(self, db_snapshot_id, db_instance_id):
         """
@@ -80,6 +115,7 @@ class RDSController:
             DBSnapshotIdentifier=db_snapshot_id,
             DBInstanceIdentifier=db_instance_id
         )
+        self.cache.invalidate('rds_snapshots', self.region)
         return response['DBSnapshot']['DBSnapshotIdentifier']
 
     def delete_db_snapshot(self, db_snapshot_id):
@@ -91,8 +127,40 @@ class RDSController:
         response = self.rds_client.delete_db_snapshot(
             DBSnapshotIdentifier=db_snapshot_id
         )
+        self.cache.invalidate('rds_snapshots', self.region)
         return response['DBSnapshot']['DBSnapshotIdentifier']
 
+    def prune_db_snapshots(self, policy: RetentionPolicy, db_instance_ids: list = None, dry_run: bool = True):
+        """
+        Apply a retention policy to the available manual DB snapshots, grouped by DB instance.
+        Automated snapshots are managed by RDS's own retention period and are left alone.
+        :param policy: RetentionPolicy to apply to each DB instance's snapshots.
+        :param db_instance_ids: Only prune snapshots of these DB instances (default is every DB instance).
+        :param dry_run: If True, only report what would be deleted.
+        :return: RetentionResult
+        """
+        db_snapshots = [db_snapshot for db_snapshot in self.list_db_snapshots()
+                        if db_snapshot.snapshot_type == 'manual' and db_snapshot.status == 'available'
+                        and db_snapshot.create_time is not None
+                        and (not db_instance_ids or db_snapshot.db_instance_id in db_instance_ids)]
+        plan = plan_retention(db_snapshots, policy, lambda db_snapshot: db_snapshot.db_instance_id,
+                              lambda db_snapshot: db_snapshot.create_time)
+        return self.apply_db_snapshot_retention(plan, dry_run)
+
+    def apply_db_snapshot_retention(self, plan: RetentionPlan, dry_run: bool = False):
+        """
+        Delete the DB snapshots of a retention plan, e.g. the plan of a dry run the user has reviewed, so exactly the
+        DB snapshots shown are deleted.
+        :param plan: RetentionPlan from prune_db_snapshots.
+        :param dry_run: If True, only report what would be deleted.
+        :return: RetentionResult
+        """
+        result = apply_retention(plan, lambda db_snapshot_id: self.rds_client.delete_db_snapshot(
+            DBSnapshotIdentifier=db_snapshot_id), dry_run)
+        if result.deleted:
+            self.cache.invalidate('rds_snapshots', self.region)
+        return result
+
     def restore_db_instance_from_snapshot(self, db_snapshot_id, db_instance_id):
         """
         Restore an RDS DB instance from a snapshot.
@@ -106,4 +174,32 @@ class RDSController:
             MultiAZ=False,
             PubliclyAccessible=True
         )
+        self.cache.invalidate('rds_instances', self.region)
         return response['DBInstance']['DBInstanceIdentifier']
+
+    def wait_for_db_instance_available(self, db_id):
+        """
+        Wait for an RDS DB instance to reach the 'available' state.
+        :param db_id: Identifier of the DB instance to wait for.
+        :return: None
+        """
+        waiter_multiplexer.wait_for(self.rds_client, 'rds_instance', db_id, 'available').result()
+        self.cache.invalidate('rds_instances', self.region)
+
+    def wait_for_db_snapshot_available(self, db_snapshot_id):
+        """
+        Wait for an RDS DB snapshot to reach the 'available' state.
+        :param db_snapshot_id: Identifier of the DB snapshot to wait for.
+        :return: None
+        """
+        waiter_multiplexer.wait_for(self.rds_client, 'rds_snapshot', db_snapshot_id, 'available').result()
+        self.cache.invalidate('rds_snapshots', self.region)
+
+    def wait_for_db_snapshot_deleted(self, db_snapshot_id):
+        """
+        Wait for an RDS DB snapshot to be deleted.
+        :param db_snapshot_id: Identifier of the DB snapshot to wait for.
+        :return: None
+        """
+        waiter_multiplexer.wait_for(self.rds_client, 'rds_snapshot', db_snapshot_id, DELETED_STATE).result()
+        self.cache.invalidate('rds_snapshots', self.region)
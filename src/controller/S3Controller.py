@@ -1,65 +1,257 @@
-from src.utils.config import DEFAULT_REGION
+import heapq
+import os
+
+from src.model.Records import BucketRecord, ObjectRecord, ObjectVersionRecord
+from src.utils.config import DEFAULT_REGION, S3_SYNC_MAX_WORKERS, S3_LIST_PAGE_SIZE, S3_PARALLEL_LIST_MAX_WORKERS, \
+    S3_BULK_DELETE_MAX_WORKERS, S3_RANGED_PART_SIZE_BYTES, S3_RANGED_MAX_WORKERS
+from src.utils.inventory_cache import InventoryCache, inventory_cache
+from src.utils.s3_bulk_delete import S3BulkDelete
+from src.utils.s3_parallel_list import ParallelLister
+from src.utils.s3_ranged_download import RangedDownload
+from src.utils.s3_sync import S3DirectorySync, UPLOAD
+from src.utils.s3_transfer import TransferProfile, TransferMonitor, TRANSFER_PROFILES
 
 
 class S3Controller:
-    def __init__(self, s3_service):
+    def __init__(self, s3_service, cache: InventoryCache = None):
+        """
+        Initialise the S3Controller with a boto3 S3 resource.
+        :param s3_service: Boto3 S3 resource object.
+        :param cache: InventoryCache for listings (default is the shared inventory_cache).
+        """
         self.s3_service = s3_service
+        self.region = s3_service.meta.client.meta.region_name
+        self.cache = cache if cache is not None else inventory_cache
 
     def list_buckets(self):
         """
         List all S3 buckets in the account.
-        :return: List of S3 bucket names.
+        Results are served from the inventory cache until they expire or a bucket is created or deleted.
+        :return: List of BucketRecord objects.
         """
-        buckets = self.s3_service.buckets.all()
-        bucket_names = [bucket.name for bucket in buckets]
-        return bucket_names
+        return list(self.cache.get_or_load('s3_buckets', self.region, (), self._load_buckets))
+
+    def _load_buckets(self):
+        response = self.s3_service.meta.client.list_buckets()
+        return tuple(BucketRecord.from_response(bucket) for bucket in response['Buckets'])
 
-    def list_objects(self, bucket_name):
+    def list_objects(self, bucket_name, prefix: str = '', delimiter: str = None, start_after: str = None,
+                     page_size: int = S3_LIST_PAGE_SIZE, max_items: int = None):
         """
-        List all objects in a specified S3 bucket.
+        List the objects in a specified S3 bucket, one list_objects_v2 page at a time.
+        Only the current page is held in memory, so the first objects are available as soon as the first page
+        arrives, whatever the size of the bucket.
         :param bucket_name: The name of the S3 bucket.
-        :return: List of object keys in the bucket.
+        :param prefix: Only list keys starting with this prefix.
+        :param delimiter: Group keys by this delimiter (e.g., '/' to browse folders); the groups are listed as
+            ObjectRecord objects with is_prefix set.
+        :param start_after: Only list keys after this key.
+        :param page_size: Number of keys per list_objects_v2 call (at most 1000).
+        :param max_items: Stop after this many objects and prefixes (default is no limit).
+        :return: Generator of ObjectRecord objects, in key order.
         """
-        bucket = self.s3_service.Bucket(bucket_name)
-        objects = bucket.objects.all()
-        object_keys = [obj.key for obj in objects]
-        return object_keys
+        params = {'Bucket': bucket_name, 'Prefix': prefix}
+        if delimiter:
+            params['Delimiter'] = delimiter
+        if start_after:
+            params['StartAfter'] = start_after
+        if max_items is not None and max_items <= 0:
+            return
+
+        count = 0
+        paginator = self.s3_service.meta.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(**params, PaginationConfig={'PageSize': page_size}):
+            records = heapq.merge((ObjectRecord.from_response(obj) for obj in page.get('Contents', [])),
+                                  (ObjectRecord.from_common_prefix(common_prefix)
+                                   for common_prefix in page.get('CommonPrefixes', [])),
+                                  key=lambda record: record.key)
+            for record in records:
+                yield record
+                count += 1
+                if max_items is not None and count >= max_items:
+                    return
 
-    def upload_object(self, bucket_name, object_key, file_path):
+    def list_object_versions(self, bucket_name, prefix: str = '', page_size: int = S3_LIST_PAGE_SIZE):
+        """
+        List every version and delete marker of the objects in a specified S3 bucket, one list_object_versions page
+        at a time.
+        :param bucket_name: The name of the S3 bucket.
+        :param prefix: Only list keys starting with this prefix.
+        :param page_size: Number of versions per list_object_versions call (at most 1000).
+        :return: Generator of ObjectVersionRecord objects.
+        """
+        paginator = self.s3_service.meta.client.get_paginator('list_object_versions')
+        for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix, PaginationConfig={'PageSize': page_size}):
+            for version in page.get('Versions', []):
+                yield ObjectVersionRecord.from_response(version)
+            for delete_marker in page.get('DeleteMarkers', []):
+                yield ObjectVersionRecord.from_response(delete_marker, is_delete_marker=True)
+
+    def is_versioned(self, bucket_name):
+        """
+        Check whether a bucket has (or had) versioning enabled, so it may hold object versions and delete markers.
+        :param bucket_name: The name of the S3 bucket.
+        :return: True if versioning is enabled or suspended.
+        """
+        response = self.s3_service.meta.client.get_bucket_versioning(Bucket=bucket_name)
+        return response.get('Status') in ('Enabled', 'Suspended')
+
+    def list_objects_parallel(self, bucket_name, prefix: str = '', ordered: bool = False,
+                              max_workers: int = S3_PARALLEL_LIST_MAX_WORKERS):
+        """
+        List every object in a specified S3 bucket with concurrent list_objects_v2 calls over key-range shards,
+        for full-bucket inventories that would take hours one page at a time.
+        :param bucket_name: The name of the S3 bucket.
+        :param prefix: Only list keys starting with this prefix.
+        :param ordered: If True, yield the objects in key order; otherwise as each page arrives.
+        :param max_workers: Number of concurrent list_objects_v2 callers.
+        :return: ParallelLister, an iterable of ObjectRecord objects that also counts pages, shards and splits.
+        """
+        return ParallelLister(self.s3_service.meta.client, bucket_name, prefix, ordered, max_workers)
+
+    def upload_object(self, bucket_name, object_key, file_path, profile: TransferProfile = None, progress=None):
         """
         Upload an object to a specified S3 bucket.
         :param bucket_name: The name of the S3 bucket.
         :param object_key: The key (name) for the uploaded object.
         :param file_path: The local file path of the object to upload.
-        :return: None
+        :param profile: TransferProfile with the multipart and concurrency settings (default is the 'default' one).
+        :param progress: Optional callable taking (bytes transferred, total bytes), called as the upload progresses.
+        :return: TransferMonitor with the throughput and part timings of the upload.
         """
+        profile = profile or TRANSFER_PROFILES['default']
         bucket = self.s3_service.Bucket(bucket_name)
-        bucket.upload_file(file_path, object_key)
+        monitor = TransferMonitor(os.path.getsize(file_path), progress)
+        with monitor.attach(self.s3_service.meta.client, bucket_name, object_key):
+            bucket.upload_file(file_path, object_key, Callback=monitor, Config=profile.transfer_config())
+        return monitor
 
-    def download_object(self, bucket_name, object_key, download_path, file_extension):
+    def download_object(self, bucket_name, object_key, download_path, file_extension,
+                        profile: TransferProfile = None, progress=None):
         """
         Download an object from a specified S3 bucket.
         :param bucket_name: The name of the S3 bucket.
         :param object_key: The key (name) of the object to download.
         :param download_path: The local file path to save the downloaded object.
         :param file_extension: The file extension to append to the downloaded file.
-        :return: None
+        :param profile: TransferProfile with the multipart and concurrency settings (default is the 'default' one).
+        :param progress: Optional callable taking (bytes transferred, total bytes), called as the download progresses.
+        :return: TransferMonitor with the throughput and part timings of the download.
         """
-        bucket = self.s3_service.Bucket(bucket_name)
         file_extension = '.' + file_extension if not file_extension.startswith('.') else file_extension
-        bucket.download_file(object_key, download_path + '/' + object_key + file_extension)
+        return self.download_file(bucket_name, object_key, download_path + '/' + object_key + file_extension,
+                                  profile, progress)
 
-    def delete_bucket(self, bucket_name):
+    def download_file(self, bucket_name, object_key, file_path, profile: TransferProfile = None, progress=None):
         """
-        Delete a specified S3 bucket.
-        :param bucket_name: The name of the S3 bucket to delete.
-        :return: None
+        Download an object from a specified S3 bucket to a local file path.
+        :param bucket_name: The name of the S3 bucket.
+        :param object_key: The key (name) of the object to download.
+        :param file_path: The local file path to save the object as.
+        :param profile: TransferProfile with the multipart and concurrency settings (default is the 'default' one).
+        :param progress: Optional callable taking (bytes transferred, total bytes), called as the download progresses.
+        :return: TransferMonitor with the throughput and part timings of the download.
         """
+        profile = profile or TRANSFER_PROFILES['default']
         bucket = self.s3_service.Bucket(bucket_name)
+        client = self.s3_service.meta.client
+        total_bytes = None
+        if progress is not None:
+            total_bytes = client.head_object(Bucket=bucket_name, Key=object_key)['ContentLength']
+        monitor = TransferMonitor(total_bytes, progress)
+        with monitor.attach(client, bucket_name, object_key):
+            bucket.download_file(object_key, file_path, Callback=monitor, Config=profile.transfer_config())
+        return monitor
+
+    def download_object_ranged(self, bucket_name, object_key, file_path, part_size: int = S3_RANGED_PART_SIZE_BYTES,
+                               max_workers: int = S3_RANGED_MAX_WORKERS, progress=None):
+        """
+        Create a resumable download of a large object with concurrent Range GETs into a memory-mapped file; call its
+        run method (e.g., as a background job) to download the missing ranges.
+        :param bucket_name: The name of the S3 bucket.
+        :param object_key: The key (name) of the object to download.
+        :param file_path: The local file path to save the object as.
+        :param part_size: Size of each range, for objects without part checksums.
+        :param max_workers: Number of concurrent Range GETs.
+        :param progress: Optional callable taking (bytes transferred, total bytes), called as each range completes.
+        :return: RangedDownload
+        """
+        return RangedDownload(self.s3_service.meta.client, bucket_name, object_key, file_path, part_size,
+                              max_workers, progress=progress)
+
+    def delete_keys(self, bucket_name, object_keys):
+        """
+        Delete up to 1000 objects with one delete_objects call.
+        :param bucket_name: The name of the S3 bucket.
+        :param object_keys: Keys of the objects to delete.
+        :return: dict of key to error message, for the keys that could not be deleted.
+        """
+        errors = self.delete_object_batch(bucket_name, [(key, None) for key in object_keys])
+        return {key: f"{code}: {message}" for (key, _), (code, message) in errors.items()}
+
+    def delete_object_batch(self, bucket_name, objects):
+        """
+        Delete up to 1000 objects or object versions with one delete_objects call.
+        :param bucket_name: The name of the S3 bucket.
+        :param objects: (key, version id) tuples; a version id of None deletes the current object.
+        :return: dict of (key, version id) to (error code, error message), for the objects that could not be deleted.
+        """
+        response = self.s3_service.meta.client.delete_objects(
+            Bucket=bucket_name,
+            Delete={'Objects': [{'Key': key, 'VersionId': version_id} if version_id else {'Key': key}
+                                for key, version_id in objects], 'Quiet': True}
+        )
+        return {(error['Key'], error.get('VersionId')): (error.get('Code'), error.get('Message'))
+                for error in response.get('Errors', [])}
+
+    def bulk_delete(self, bucket_name, prefix: str = '', versions: bool = None, dry_run: bool = False,
+                    max_workers: int = S3_BULK_DELETE_MAX_WORKERS):
+        """
+        Create a bulk deletion of the objects under a prefix; call its run method (e.g., as a background job) to
+        delete them with concurrent delete_objects calls.
+        :param bucket_name: The name of the S3 bucket.
+        :param prefix: Only delete keys starting with this prefix ('' for the whole bucket).
+        :param versions: If True, delete every version and delete marker (default is True for versioned buckets).
+        :param dry_run: If True, only count what would be deleted.
+        :param max_workers: Number of concurrent delete_objects callers.
+        :return: S3BulkDelete
+        """
+        if versions is None:
+            versions = self.is_versioned(bucket_name)
+        return S3BulkDelete(self, bucket_name, prefix, versions, dry_run, max_workers)
+
+    def sync_directory(self, local_dir, bucket_name, prefix: str = '', direction: str = UPLOAD, delete: bool = False,
+                       profile: TransferProfile = None, max_workers: int = S3_SYNC_MAX_WORKERS):
+        """
+        Create a sync between a local directory and a bucket prefix; call its run method (e.g., as a background job)
+        to transfer the new and changed files.
+        :param local_dir: Local directory.
+        :param bucket_name: The name of the S3 bucket.
+        :param prefix: Key prefix the directory maps to.
+        :param direction: UPLOAD (directory to bucket) or DOWNLOAD (bucket to directory).
+        :param delete: If True, delete destination files or objects that are missing from the source.
+        :param profile: TransferProfile for each file transfer.
+        :param max_workers: Maximum number of concurrent file transfers.
+        :return: S3DirectorySync
+        """
+        return S3DirectorySync(self, local_dir, bucket_name, prefix, direction, delete, profile, max_workers)
+
+    def delete_bucket(self, bucket_name, deletion: S3BulkDelete = None):
+        """
+        Delete a specified S3 bucket, after deleting all of its objects, object versions and delete markers.
+        :param bucket_name: The name of the S3 bucket to delete.
+        :param deletion: Bulk deletion of the whole bucket to empty it with, e.g., to follow its progress
+            (default is a new one from bulk_delete).
+        :return: S3BulkDelete that emptied the bucket.
+        """
         # First, delete all objects in the bucket
-        bucket.objects.all().delete()
+        deletion = (deletion or self.bulk_delete(bucket_name)).run()
+        if deletion.errors:
+            raise RuntimeError(f"Could not empty bucket {bucket_name}: {deletion.summary()}")
         # Then, delete the bucket itself
-        bucket.delete()
+        self.s3_service.Bucket(bucket_name).delete()
+        self.cache.invalidate('s3_buckets', self.region)
+        return deletion
 
     def create_bucket(self, bucket_name, region: str = DEFAULT_REGION):
         """
@@ -75,3 +267,4 @@ class S3Controller:
                 Bucket=bucket_name,
                 CreateBucketConfiguration={'LocationConstraint': region}
             )
+        self.cache.invalidate('s3_buckets', self.region)
@@ -0,0 +1,361 @@
+from dataclasses import dataclass
+from datetime import datetime
+
+
+def _tags_from_response(tag_list):
+    """
+    Convert a boto3 tag list into an immutable tuple of (key, value) pairs.
+    :param tag_list: List of {'Key': ..., 'Value': ...} dicts, or None.
+    :return: Tuple of (key, value) tuples sorted by key.
+    """
+    return tuple(sorted((tag['Key'], tag['Value']) for tag in tag_list or []))
+
+
+class _TaggedRecord:
+    __slots__ = ()
+
+    def tag(self, key, default=None):
+        """
+        Get the value of a tag.
+        :param key: Tag key.
+        :param default: Value returned if the tag is not set.
+        :return: The tag value, or default.
+        """
+        for tag_key, tag_value in self.tags:
+            if tag_key == key:
+                return tag_value
+        return default
+
+
+@dataclass(frozen=True, slots=True)
+class InstanceRecord(_TaggedRecord):
+    id: str
+    name: str
+    state: str
+    instance_type: str
+    launch_time: datetime
+    public_ip_address: str
+    private_ip_address: str
+    availability_zone: str
+    region: str
+    tags: tuple = ()
+
+    @classmethod
+    def from_response(cls, instance: dict, region: str = None):
+        """
+        Build an InstanceRecord from a describe_instances instance dict.
+        :param instance: Instance dict from a describe_instances reservation.
+        :param region: Region the instance was listed in.
+        :return: InstanceRecord
+        """
+        tags = _tags_from_response(instance.get('Tags'))
+        return cls(
+            id=instance['InstanceId'],
+            name=dict(tags).get('Name', ''),
+            state=instance['State']['Name'],
+            instance_type=instance.get('InstanceType'),
+            launch_time=instance.get('LaunchTime'),
+            public_ip_address=instance.get('PublicIpAddress'),
+            private_ip_address=instance.get('PrivateIpAddress'),
+            availability_zone=instance.get('Placement', {}).get('AvailabilityZone'),
+            region=region,
+            tags=tags
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class VolumeAttachment:
+    instance_id: str
+    device: str
+    state: str
+
+    def __str__(self):
+        return f"{self.instance_id} ({self.device}, {self.state})"
+
+
+@dataclass(frozen=True, slots=True)
+class VolumeRecord(_TaggedRecord):
+    id: str
+    size: int
+    state: str
+    volume_type: str
+    availability_zone: str
+    iops: int
+    throughput: int
+    snapshot_id: str
+    create_time: datetime
+    attachments: tuple
+    region: str
+    tags: tuple = ()
+
+    @property
+    def instance_ids(self):
+        """
+        IDs of the instances the volume is attached to.
+        :return: Tuple of instance IDs.
+        """
+        return tuple(attachment.instance_id for attachment in self.attachments)
+
+    @classmethod
+    def from_response(cls, volume: dict, region: str = None):
+        """
+        Build a VolumeRecord from a describe_volumes volume dict.
+        :param volume: Volume dict from describe_volumes.
+        :param region: Region the volume was listed in.
+        :return: VolumeRecord
+        """
+        return cls(
+            id=volume['VolumeId'],
+            size=volume.get('Size'),
+            state=volume.get('State'),
+            volume_type=volume.get('VolumeType'),
+            availability_zone=volume.get('AvailabilityZone'),
+            iops=volume.get('Iops'),
+            throughput=volume.get('Throughput'),
+            snapshot_id=volume.get('SnapshotId') or None,
+            create_time=volume.get('CreateTime'),
+            attachments=tuple(
+                VolumeAttachment(attachment.get('InstanceId'), attachment.get('Device'), attachment.get('State'))
+                for attachment in volume.get('Attachments', [])
+            ),
+            region=region,
+            tags=_tags_from_response(volume.get('Tags'))
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class SnapshotRecord(_TaggedRecord):
+    id: str
+    volume_id: str
+    volume_size: int
+    state: str
+    progress: str
+    description: str
+    start_time: datetime
+    encrypted: bool
+    region: str
+    tags: tuple = ()
+
+    @classmethod
+    def from_response(cls, snapshot: dict, region: str = None):
+        """
+        Build a SnapshotRecord from a describe_snapshots snapshot dict.
+        :param snapshot: Snapshot dict from describe_snapshots.
+        :param region: Region the snapshot was listed in.
+        :return: SnapshotRecord
+        """
+        return cls(
+            id=snapshot['SnapshotId'],
+            volume_id=snapshot.get('VolumeId'),
+            volume_size=snapshot.get('VolumeSize'),
+            state=snapshot.get('State'),
+            progress=snapshot.get('Progress'),
+            description=snapshot.get('Description'),
+            start_time=snapshot.get('StartTime'),
+            encrypted=snapshot.get('Encrypted', False),
+            region=region,
+            tags=_tags_from_response(snapshot.get('Tags'))
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class VolumeModificationRecord:
+    id: str
+    state: str
+    progress: int
+    target_size: int
+    target_volume_type: str
+    target_iops: int
+    target_throughput: int
+    status_message: str
+    start_time: datetime
+    end_time: datetime
+    error: str = None
+
+    @classmethod
+    def from_response(cls, modification: dict):
+        """
+        Build a VolumeModificationRecord from a modify_volume or describe_volumes_modifications modification dict.
+        :param modification: VolumeModification dict.
+        :return: VolumeModificationRecord
+        """
+        return cls(
+            id=modification['VolumeId'],
+            state=modification.get('ModificationState'),
+            progress=modification.get('Progress', 0),
+            target_size=modification.get('TargetSize'),
+            target_volume_type=modification.get('TargetVolumeType'),
+            target_iops=modification.get('TargetIops'),
+            target_throughput=modification.get('TargetThroughput'),
+            status_message=modification.get('StatusMessage'),
+            start_time=modification.get('StartTime'),
+            end_time=modification.get('EndTime')
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class DBInstanceRecord:
+    id: str
+    db_name: str
+    engine: str
+    status: str
+    instance_class: str
+    allocated_storage: int
+    availability_zone: str
+    endpoint_address: str
+    create_time: datetime
+    region: str
+
+    @classmethod
+    def from_response(cls, db_instance: dict, region: str = None):
+        """
+        Build a DBInstanceRecord from a describe_db_instances DB instance dict.
+        :param db_instance: DB instance dict from describe_db_instances.
+        :param region: Region the DB instance was listed in.
+        :return: DBInstanceRecord
+        """
+        return cls(
+            id=db_instance['DBInstanceIdentifier'],
+            db_name=db_instance.get('DBName'),
+            engine=db_instance.get('Engine'),
+            status=db_instance.get('DBInstanceStatus'),
+            instance_class=db_instance.get('DBInstanceClass'),
+            allocated_storage=db_instance.get('AllocatedStorage'),
+            availability_zone=db_instance.get('AvailabilityZone'),
+            endpoint_address=db_instance.get('Endpoint', {}).get('Address'),
+            create_time=db_instance.get('InstanceCreateTime'),
+            region=region
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class DBSnapshotRecord:
+    id: str
+    db_instance_id: str
+    snapshot_type: str
+    status: str
+    engine: str
+    allocated_storage: int
+    create_time: datetime
+    region: str
+
+    @classmethod
+    def from_response(cls, db_snapshot: dict, region: str = None):
+        """
+        Build a DBSnapshotRecord from a describe_db_snapshots DB snapshot dict.
+        :param db_snapshot: DB snapshot dict from describe_db_snapshots.
+        :param region: Region the DB snapshot was listed in.
+        :return: DBSnapshotRecord
+        """
+        return cls(
+            id=db_snapshot['DBSnapshotIdentifier'],
+            db_instance_id=db_snapshot.get('DBInstanceIdentifier'),
+            snapshot_type=db_snapshot.get('SnapshotType', 'manual'),
+            status=db_snapshot.get('Status'),
+            engine=db_snapshot.get('Engine'),
+            allocated_storage=db_snapshot.get('AllocatedStorage'),
+            create_time=db_snapshot.get('SnapshotCreateTime'),
+            region=region
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class BucketRecord:
+    name: str
+    creation_date: datetime
+    region: str
+
+    @classmethod
+    def from_response(cls, bucket: dict):
+        """
+        Build a BucketRecord from a list_buckets bucket dict.
+        :param bucket: Bucket dict from list_buckets.
+        :return: BucketRecord
+        """
+        return cls(
+            name=bucket['Name'],
+            creation_date=bucket.get('CreationDate'),
+            region=bucket.get('BucketRegion')
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class ObjectRecord:
+    key: str
+    size: int = None
+    etag: str = None
+    storage_class: str = None
+    last_modified: datetime = None
+    is_prefix: bool = False
+
+    @classmethod
+    def from_response(cls, obj: dict):
+        """
+        Build an ObjectRecord from a list_objects_v2 Contents entry.
+        :param obj: Object dict from list_objects_v2.
+        :return: ObjectRecord
+        """
+        return cls(
+            key=obj['Key'],
+            size=obj.get('Size'),
+            etag=obj.get('ETag'),
+            storage_class=obj.get('StorageClass'),
+            last_modified=obj.get('LastModified')
+        )
+
+    @classmethod
+    def from_common_prefix(cls, common_prefix: dict):
+        """
+        Build an ObjectRecord for a folder-style common prefix of a delimited listing.
+        :param common_prefix: CommonPrefixes entry from list_objects_v2.
+        :return: ObjectRecord with is_prefix set.
+        """
+        return cls(key=common_prefix['Prefix'], is_prefix=True)
+
+
+@dataclass(frozen=True, slots=True)
+class ObjectVersionRecord:
+    key: str
+    version_id: str
+    size: int = None
+    is_latest: bool = False
+    is_delete_marker: bool = False
+    last_modified: datetime = None
+
+    @classmethod
+    def from_response(cls, version: dict, is_delete_marker: bool = False):
+        """
+        Build an ObjectVersionRecord from a list_object_versions Versions or DeleteMarkers entry.
+        :param version: Version or delete marker dict from list_object_versions.
+        :param is_delete_marker: True if the entry is from DeleteMarkers.
+        :return: ObjectVersionRecord
+        """
+        return cls(
+            key=version['Key'],
+            version_id=version['VersionId'],
+            size=version.get('Size'),
+            is_latest=version.get('IsLatest', False),
+            is_delete_marker=is_delete_marker,
+            last_modified=version.get('LastModified')
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class InstanceStateChangeRecord:
+    id: str
+    previous_state: str
+    current_state: str
+    error: str = None
+
+    @classmethod
+    def from_response(cls, state_change: dict):
+        """
+        Build an InstanceStateChangeRecord from a start/stop/terminate_instances state change dict.
+        :param state_change: Entry of StartingInstances, StoppingInstances or TerminatingInstances.
+        :return: InstanceStateChangeRecord
+        """
+        return cls(
+            id=state_change['InstanceId'],
+            previous_state=state_change.get('PreviousState', {}).get('Name'),
+            current_state=state_change.get('CurrentState', {}).get('Name')
+        )
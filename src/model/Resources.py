@@ -1,47 +1,135 @@
+import threading
+
 import boto3
+from botocore.config import Config
+
+from src.utils.config import DEFAULT_REGION, AWS_MAX_POOL_CONNECTIONS, AWS_CONNECT_TIMEOUT_SECONDS, \
+    AWS_READ_TIMEOUT_SECONDS, AWS_TCP_KEEPALIVE, AWS_RETRY_MODE, AWS_MAX_RETRY_ATTEMPTS
+from src.utils.credentials_handler import create_botocore_session, get_cred_file_mtime
+
+DEFAULT_CLIENT_CONFIG = Config(
+    max_pool_connections=AWS_MAX_POOL_CONNECTIONS,
+    connect_timeout=AWS_CONNECT_TIMEOUT_SECONDS,
+    read_timeout=AWS_READ_TIMEOUT_SECONDS,
+    tcp_keepalive=AWS_TCP_KEEPALIVE,
+    retries={'mode': AWS_RETRY_MODE, 'max_attempts': AWS_MAX_RETRY_ATTEMPTS}
+)
+
+# process-wide cache shared by every Resource so menus reuse loaded service models and warm connection pools
+_cache_lock = threading.Lock()
+_session = None
+_session_cred_file_mtime = None
+_clients = {}
+_resources = {}
+
+
+def get_session(cred_file_mtime=None):
+    """
+    Get the process-wide boto3 session, creating it on first use.
+    Credentials are resolved by the session the first time a client needs them, not at import time.
+    The session caches the credentials it resolved, so it is created again when usercred.txt changes; clients and
+    resources built with the previous credentials are dropped then too.
+    :param cred_file_mtime: Current usercred.txt mtime (default is to read it).
+    :return: boto3.Session shared by all Resource objects.
+    """
+    global _session, _session_cred_file_mtime
+    if cred_file_mtime is None:
+        cred_file_mtime = get_cred_file_mtime()
+    with _cache_lock:
+        if _session is None or _session_cred_file_mtime != cred_file_mtime:
+            _session = boto3.Session(botocore_session=create_botocore_session())
+            _session_cred_file_mtime = cred_file_mtime
+            _clients.clear()
+            _resources.clear()
+        return _session
 
-from src.utils.config import DEFAULT_REGION
-from src.utils.credentials_handler import get_aws_access_credentials
 
-aws_access_credentials = get_aws_access_credentials()
+def clear_cache():
+    """
+    Drop the shared session and every cached client and resource.
+    The next call to any Resource factory method builds them again.
+    :return: None
+    """
+    global _session
+    with _cache_lock:
+        _session = None
+        _clients.clear()
+        _resources.clear()
 
 
 class Resource:
-    def __init__(self, region=None):
+    def __init__(self, region=None, config: Config = None):
+        """
+        Initialise the Resource factory.
+        :param region: AWS region for the clients and resources (default is DEFAULT_REGION).
+        :param config: botocore Config for the clients (default is DEFAULT_CLIENT_CONFIG).
+        """
         # use default region if
         if region is None:
             self.region = DEFAULT_REGION
         else:
             self.region = region
-        self.access_key_id = aws_access_credentials['AWS_ACCESS_KEY_ID']
-        self.secret_access_key = aws_access_credentials['AWS_SECRET_ACCESS_KEY']
+        self.config = config if config is not None else DEFAULT_CLIENT_CONFIG
+
+    def _cache_key(self, service_name):
+        # clients resolve static credentials once, so a rotated usercred.txt (new mtime) needs new clients;
+        # Config has identity equality, so callers sharing one share clients
+        return service_name, self.region, self.config, get_cred_file_mtime()
+
+    def _client(self, service_name):
+        """
+        Get a cached boto3 client for the service, creating it on first use.
+        Clients are thread-safe, so a single client is shared by every caller.
+        :param service_name: AWS service name (e.g., 'ec2').
+        :return: boto3 client.
+        """
+        key = self._cache_key(service_name)
+        client = _clients.get(key)
+        if client is not None:
+            return client
+
+        session = get_session(key[-1])
+        with _cache_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = session.client(service_name,
+                                        region_name=self.region,
+                                        config=self.config)
+                _clients[key] = client
+            return client
+
+    def _resource(self, service_name):
+        """
+        Get a cached boto3 resource for the service, creating it on first use.
+        :param service_name: AWS service name (e.g., 's3').
+        :return: boto3 service resource.
+        """
+        key = self._cache_key(service_name)
+        resource = _resources.get(key)
+        if resource is not None:
+            return resource
+
+        session = get_session(key[-1])
+        with _cache_lock:
+            resource = _resources.get(key)
+            if resource is None:
+                resource = session.resource(service_name,
+                                            region_name=self.region,
+                                            config=self.config)
+                _resources[key] = resource
+            return resource
 
     def ec2_resource(self):
-        return boto3.resource('ec2',
-                              aws_access_key_id=self.access_key_id,
-                              aws_secret_access_key=self.secret_access_key,
-                              region_name=self.region)
+        return self._resource('ec2')
 
     def ec2_client(self):
-        return boto3.client('ec2',
-                            aws_access_key_id=self.access_key_id,
-                            aws_secret_access_key=self.secret_access_key,
-                            region_name=self.region)
+        return self._client('ec2')
 
     def s3_resource(self):
-        return boto3.resource('s3',
-                              aws_access_key_id=self.access_key_id,
-                              aws_secret_access_key=self.secret_access_key,
-                              region_name=self.region)
+        return self._resource('s3')
 
     def cw_client(self):
-        return boto3.client('cloudwatch',
-                            aws_access_key_id=self.access_key_id,
-                            aws_secret_access_key=self.secret_access_key,
-                            region_name=self.region)
+        return self._client('cloudwatch')
 
     def rds_client(self):
-        return boto3.client('rds',
-                            aws_access_key_id=self.access_key_id,
-                            aws_secret_access_key=self.secret_access_key,
-                            region_name=self.region)
+        return self._client('rds')
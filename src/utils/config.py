@@ -33,3 +33,134 @@ DATETIME_COMPACT_FORMAT = '%Y%m%d%H%M%S'
 
 ## Security Group Defaults
 DEFAULT_SECURITY_GROUP_NAME = 'default'
+
+## Boto3 Connection Defaults
+AWS_MAX_POOL_CONNECTIONS = 50
+AWS_CONNECT_TIMEOUT_SECONDS = 5
+AWS_READ_TIMEOUT_SECONDS = 60
+AWS_TCP_KEEPALIVE = True
+AWS_RETRY_MODE = 'adaptive'
+AWS_MAX_RETRY_ATTEMPTS = 5
+
+## STS Temporary Credentials Defaults
+STS_ROLE_SESSION_NAME = 'AWSBoto3CloudAutomation'
+STS_ROLE_DURATION_SECONDS = 3600
+
+## Multi-Region Scan Defaults
+REGION_SCAN_MAX_WORKERS = 12
+
+## Pagination Defaults
+EC2_DESCRIBE_PAGE_SIZE = 1000
+EBS_DESCRIBE_PAGE_SIZE = 500
+
+## Inventory Cache Defaults (seconds)
+INVENTORY_CACHE_TTL_SECONDS = {
+    'ec2_instances': 30,
+    'ebs_volumes': 60,
+    'ebs_snapshots': 120,
+    'rds_instances': 60,
+    'rds_snapshots': 120,
+    's3_buckets': 300
+}
+INVENTORY_CACHE_DEFAULT_TTL_SECONDS = 60
+INVENTORY_CACHE_MAX_ENTRIES = 256
+
+## EC2 Bulk Action Defaults
+EC2_BULK_ACTION_CHUNK_SIZE = 1000
+EC2_RUN_INSTANCES_MAX_COUNT = 100
+EC2_WAIT_TIMEOUT_SECONDS = 600
+
+## EBS Snapshot Defaults
+EBS_SNAPSHOT_MAX_WORKERS = 10
+EBS_SNAPSHOT_REQUESTS_PER_SECOND = 5
+# volume ID EC2 reports for snapshots not taken from a volume, e.g. copies made with CopySnapshot
+EBS_PLACEHOLDER_VOLUME_ID = 'vol-ffffffff'
+
+## EBS Volume Restore Defaults
+EBS_RESTORE_MAX_WORKERS = 10
+EBS_CREATE_VOLUME_REQUESTS_PER_SECOND = 5
+EBS_FAST_RESTORE_TIMEOUT_SECONDS = 3600
+
+## EBS Volume Modification Defaults
+EBS_MODIFY_MAX_WORKERS = 10
+EBS_MODIFY_VOLUME_REQUESTS_PER_SECOND = 5
+EBS_MODIFICATION_DESCRIBE_CHUNK_SIZE = 200
+EBS_MODIFICATION_PROGRESS_DETAIL_LIMIT = 10
+
+## Background Job Defaults
+JOB_MAX_WORKERS = 8
+
+## Waiter Multiplexer Defaults (seconds)
+WAITER_MIN_DELAY_SECONDS = 2
+WAITER_MAX_DELAY_SECONDS = 30
+WAITER_BACKOFF_FACTOR = 1.5
+WAITER_DEFAULT_TIMEOUT_SECONDS = 3600
+
+## List Rendering Defaults
+LIST_PAGE_SIZE = 25
+
+## Option Picker Defaults
+OPTION_SEARCH_LIMIT = 10
+OPTION_FUZZY_CUTOFF = 0.6
+
+## Snapshot Retention Defaults
+SNAPSHOT_DELETE_MAX_WORKERS = 8
+SNAPSHOT_DELETE_REQUESTS_PER_SECOND = 5
+
+## Volume Right-Sizing Defaults
+EBS_METRICS_NAMESPACE = 'AWS/EBS'
+METRIC_DATA_MAX_QUERIES = 500
+RIGHTSIZE_LOOKBACK_DAYS = 14
+RIGHTSIZE_PERIOD_SECONDS = 300
+RIGHTSIZE_PERCENTILE = 99
+RIGHTSIZE_HEADROOM = 1.2
+RIGHTSIZE_QUEUE_LENGTH_THRESHOLD = 1.0
+RIGHTSIZE_MIN_CHANGE_RATIO = 0.1
+GP3_BASELINE_IOPS = 3000
+GP3_BASELINE_THROUGHPUT_MIBPS = 125
+GP3_MAX_IOPS = 16000
+GP3_MAX_THROUGHPUT_MIBPS = 1000
+GP3_MAX_IOPS_PER_GIB = 500
+GP3_MAX_THROUGHPUT_PER_IOPS = 0.25
+IO_MIN_IOPS = 100
+
+## EBS Snapshot Copy Defaults
+EBS_COPY_MAX_IN_FLIGHT_PER_REGION = 5
+EBS_COPY_DESCRIBE_CHUNK_SIZE = 200
+EBS_COPY_TIMEOUT_SECONDS = 12 * 3600
+
+## S3 Transfer Defaults
+S3_MULTIPART_THRESHOLD_BYTES = 8 * 1024 * 1024
+S3_MULTIPART_CHUNK_SIZE_BYTES = 8 * 1024 * 1024
+S3_MAX_CONCURRENCY = 10
+S3_LARGE_MULTIPART_THRESHOLD_BYTES = 64 * 1024 * 1024
+S3_LARGE_MULTIPART_CHUNK_SIZE_BYTES = 64 * 1024 * 1024
+S3_LARGE_MAX_CONCURRENCY = 64
+S3_PROGRESS_INTERVAL_SECONDS = 0.5
+
+## S3 Sync Defaults
+S3_SYNC_MAX_WORKERS = 16
+S3_SYNC_MANIFEST_DIR = '~/.cache/cloud-automation/s3-sync'
+S3_DELETE_BATCH_SIZE = 1000
+
+## S3 Listing Defaults
+S3_LIST_PAGE_SIZE = 1000
+S3_LIST_MAX_ITEMS = 10000
+
+## S3 Parallel Listing Defaults
+S3_PARALLEL_LIST_MAX_WORKERS = 16
+S3_SHARDS_PER_WORKER = 4
+S3_SHARD_SPLIT_PAGES = 2
+S3_SHARD_SPLIT_FACTOR = 4
+S3_SHARD_DISCOVERY_PAGES = 1
+
+## S3 Bulk Delete Defaults
+S3_BULK_DELETE_MAX_WORKERS = 16
+S3_BULK_DELETE_MAX_ATTEMPTS = 5
+S3_BULK_DELETE_RETRY_SECONDS = 1.0
+
+## S3 Ranged Download Defaults
+S3_RANGED_PART_SIZE_BYTES = 64 * 1024 * 1024
+S3_RANGED_MAX_WORKERS = 32
+S3_RANGED_MAX_ATTEMPTS = 3
+S3_RANGED_STATE_SUFFIX = '.download-state.json'
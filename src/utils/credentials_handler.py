@@ -1,17 +1,61 @@
 import os
+import threading
+
+import botocore.session
+from botocore.credentials import CredentialProvider, CredentialResolver, Credentials, RefreshableCredentials, \
+    create_credential_resolver
+
+from src.utils.config import DEFAULT_REGION, STS_ROLE_SESSION_NAME, STS_ROLE_DURATION_SECONDS
+
+CRED_FILE_PATH = os.path.join(os.path.dirname(__file__), '../../usercred.txt')
+
+# parsed usercred.txt contents, re-read only when the file's mtime changes
+_cred_file_lock = threading.Lock()
+_cred_file_cache = {'mtime': None, 'values': {}}
+
+# resolved AWS credentials, resolved again only when usercred.txt changes
+_credentials_lock = threading.Lock()
+_credentials_cache = {'mtime': None, 'credentials': None}
 
 
 def get_aws_access_credentials():
     """
-    Retrieve AWS access credentials from usercred.txt file.
-    :return: dict with 'AWS_ACCESS_KEY_ID' and 'AWS_SECRET_ACCESS_KEY'
+    Retrieve AWS access credentials from the credential chain.
+    Sources are tried in order: usercred.txt (optionally assuming AWS_ROLE_ARN through STS), environment variables,
+    then the standard shared-credentials chain (~/.aws/credentials, ~/.aws/config, instance metadata).
+    :return: dict with 'AWS_ACCESS_KEY_ID' and 'AWS_SECRET_ACCESS_KEY' (and 'AWS_SESSION_TOKEN' if temporary)
+    """
+    credentials = get_credentials()
+    if credentials is None:
+        raise Exception("No AWS credentials found in usercred.txt, environment variables or shared credentials.")
+
+    frozen = credentials.get_frozen_credentials()
+    aws_access_credentials = {
+        'AWS_ACCESS_KEY_ID': frozen.access_key,
+        'AWS_SECRET_ACCESS_KEY': frozen.secret_key
+    }
+    if frozen.token:
+        aws_access_credentials['AWS_SESSION_TOKEN'] = frozen.token
+    return aws_access_credentials
+
+
+def get_credentials():
     """
-    return get_req_credentials(['AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY'])
+    Resolve AWS credentials through the credential chain on first use and cache them.
+    The cache is keyed on usercred.txt's mtime; refreshable (STS) credentials renew themselves before they expire.
+    :return: botocore Credentials, or None if no source provides credentials.
+    """
+    mtime = get_cred_file_mtime()
+    with _credentials_lock:
+        if _credentials_cache['credentials'] is None or _credentials_cache['mtime'] != mtime:
+            _credentials_cache['credentials'] = get_credential_resolver().load_credentials()
+            _credentials_cache['mtime'] = mtime
+        return _credentials_cache['credentials']
 
 
 def get_rds_master_credentials():
     """
-    Retrieve RDS master username and password from usercred.txt file.
+    Retrieve RDS master username and password from usercred.txt file or environment variables.
     :return: dict with 'RDS_MASTER_USERNAME' and 'RDS_MASTER_PASSWORD'
     """
     return get_req_credentials(['RDS_MASTER_USERNAME', 'RDS_MASTER_PASSWORD'])
@@ -19,27 +63,143 @@ def get_rds_master_credentials():
 
 def get_req_credentials(credentials_list):
     """
-    Retrieve specified credentials from usercred.txt file.
+    Retrieve specified credentials from usercred.txt file, falling back to environment variables.
     :param credentials_list: List of credential keys to retrieve.
     :return: dict with requested credentials.
     """
+    file_values = read_credentials_file()
+
     credentials = {}
-    cred_file_path = os.path.join(os.path.dirname(__file__), '../../usercred.txt')
+    for cred in credentials_list:
+        value = file_values.get(cred) or os.environ.get(cred)
+        if not value:
+            raise Exception(f"Error reading credentials: {cred} not found in credentials file "
+                            f"at {CRED_FILE_PATH} or environment variables.")
+        credentials[cred] = value
+
+    return credentials
+
+
+def read_credentials_file():
+    """
+    Read usercred.txt, reusing the last parsed result while the file's mtime is unchanged.
+    :return: dict of key/value pairs in the file, empty if the file does not exist.
+    """
+    mtime = get_cred_file_mtime()
+    if mtime is None:
+        return {}
+
+    with _cred_file_lock:
+        if _cred_file_cache['mtime'] == mtime:
+            return _cred_file_cache['values']
 
+        values = {}
+        try:
+            with open(CRED_FILE_PATH, 'r') as cred_file:
+                for line in cred_file:
+                    line = line.strip()
+                    if not line or line.startswith('#'):
+                        continue
+                    key, value = line.split('=', 1)
+                    values[key.strip()] = value.strip()
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            raise Exception(f"Error reading credentials: {str(e)}")
+
+        _cred_file_cache['mtime'] = mtime
+        _cred_file_cache['values'] = values
+        return values
+
+
+def get_cred_file_mtime():
+    """
+    Get the modification time of usercred.txt, which changes when its credentials are rotated.
+    :return: mtime in nanoseconds, or None if the file does not exist.
+    """
     try:
-        with open(cred_file_path, 'r') as cred_file:
-            lines = cred_file.readlines()
-            for line in lines:
-                key, value = line.strip().split('=')
-                if key in credentials_list:
-                    credentials[key] = value
-
-        for cred in credentials_list:
-            if cred not in credentials:
-                raise Exception(f"{cred} not found in credentials file.")
+        return os.stat(CRED_FILE_PATH).st_mtime_ns
     except FileNotFoundError:
-        raise Exception(f"Credentials file not found at {cred_file_path}")
-    except Exception as e:
-        raise Exception(f"Error reading credentials: {str(e)}")
+        return None
 
-    return credentials
+
+class UserCredFileProvider(CredentialProvider):
+    """
+    botocore credential provider backed by usercred.txt.
+    If the file (or environment) sets AWS_ROLE_ARN, the file keys are used to assume that role through STS and the
+    returned credentials refresh themselves before they expire.
+    """
+    METHOD = 'usercred-file'
+    CANONICAL_NAME = 'UserCredFile'
+
+    def load(self):
+        values = read_credentials_file()
+        access_key = values.get('AWS_ACCESS_KEY_ID')
+        secret_key = values.get('AWS_SECRET_ACCESS_KEY')
+        if not access_key or not secret_key:
+            return None
+
+        base_credentials = Credentials(access_key, secret_key, values.get('AWS_SESSION_TOKEN'), method=self.METHOD)
+        role_arn = values.get('AWS_ROLE_ARN') or os.environ.get('AWS_ROLE_ARN')
+        if not role_arn:
+            return base_credentials
+
+        return assume_role_credentials(base_credentials, role_arn)
+
+
+def assume_role_credentials(base_credentials, role_arn):
+    """
+    Build refreshable credentials for a role assumed through STS.
+    botocore calls the refresh function again ahead of the expiry time, so long-running jobs keep working
+    when the temporary credentials rotate.
+    :param base_credentials: botocore Credentials used to call STS.
+    :param role_arn: ARN of the role to assume.
+    :return: botocore RefreshableCredentials.
+    """
+    sts_session = botocore.session.get_session()
+    sts_session.set_credentials(base_credentials.access_key, base_credentials.secret_key, base_credentials.token)
+    sts_client = sts_session.create_client('sts', region_name=DEFAULT_REGION)
+
+    def refresh():
+        response = sts_client.assume_role(RoleArn=role_arn,
+                                          RoleSessionName=STS_ROLE_SESSION_NAME,
+                                          DurationSeconds=STS_ROLE_DURATION_SECONDS)
+        sts_credentials = response['Credentials']
+        return {
+            'access_key': sts_credentials['AccessKeyId'],
+            'secret_key': sts_credentials['SecretAccessKey'],
+            'token': sts_credentials['SessionToken'],
+            'expiry_time': sts_credentials['Expiration'].isoformat()
+        }
+
+    return RefreshableCredentials.create_from_metadata(metadata=refresh(), refresh_using=refresh,
+                                                       method='sts-assume-role')
+
+
+def get_credential_resolver():
+    """
+    Build the credential chain: usercred.txt first, then botocore's default chain
+    (environment variables, shared credentials/config files, container and instance metadata).
+    :return: botocore CredentialResolver.
+    """
+    default_resolver = create_credential_resolver(botocore.session.get_session())
+    return CredentialResolver([UserCredFileProvider()] + default_resolver.providers)
+
+
+class _CachedCredentialProvider(CredentialProvider):
+    METHOD = 'cached-chain'
+
+    def load(self):
+        return get_credentials()
+
+
+def create_botocore_session():
+    """
+    Create a botocore session that resolves credentials lazily through the cached credential chain.
+    Nothing is read until the first client is created, and refreshable credentials are shared by every client built
+    from the session.
+    :return: botocore Session.
+    """
+    session = botocore.session.get_session()
+    session.register_component('credential_provider', CredentialResolver([_CachedCredentialProvider()]))
+    return session
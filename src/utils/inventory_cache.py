@@ -0,0 +1,146 @@
+import threading
+import time
+from collections import OrderedDict
+
+from src.utils.config import INVENTORY_CACHE_TTL_SECONDS, INVENTORY_CACHE_DEFAULT_TTL_SECONDS, \
+    INVENTORY_CACHE_MAX_ENTRIES
+
+
+def freeze(value):
+    """
+    Convert a value into a hashable form so it can be part of a cache key.
+    Dicts, lists, tuples and sets are converted recursively into tuples.
+    :param value: The value to freeze.
+    :return: Hashable equivalent of value.
+    """
+    if isinstance(value, dict):
+        return tuple(sorted((key, freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(freeze(item) for item in value))
+    return value
+
+
+class InventoryCache:
+    def __init__(self, ttls: dict = None, default_ttl: float = INVENTORY_CACHE_DEFAULT_TTL_SECONDS,
+                 max_entries: int = INVENTORY_CACHE_MAX_ENTRIES):
+        """
+        In-process cache of listing results shared by the controllers.
+        Entries expire after a per-resource-type TTL, and the least recently used entry is evicted
+        once max_entries is reached.
+        :param ttls: dict of resource type to TTL in seconds (default is INVENTORY_CACHE_TTL_SECONDS).
+        :param default_ttl: TTL in seconds for resource types missing from ttls.
+        :param max_entries: Maximum number of cached entries.
+        """
+        self.ttls = dict(INVENTORY_CACHE_TTL_SECONDS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_load(self, resource_type, region, params, loader):
+        """
+        Get a cached listing, calling loader to fetch and cache it on a miss or after it expires.
+        :param resource_type: Resource type of the listing (e.g., 'ebs_volumes').
+        :param region: Region of the listing.
+        :param params: Listing parameters that distinguish entries of the same type and region.
+        :param loader: Callable with no arguments that returns the listing.
+        :return: The cached or freshly loaded listing.
+        """
+        key = (resource_type, region, freeze(params))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = loader()
+        self.put(resource_type, region, params, value)
+        return value
+
+    def get(self, resource_type, region, params):
+        """
+        Get a cached listing without loading it on a miss.
+        :param resource_type: Resource type of the listing.
+        :param region: Region of the listing.
+        :param params: Listing parameters.
+        :return: The cached listing, or None if it is missing or expired.
+        """
+        key = (resource_type, region, freeze(params))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, resource_type, region, params, value):
+        """
+        Store a listing in the cache.
+        :param resource_type: Resource type of the listing.
+        :param region: Region of the listing.
+        :param params: Listing parameters.
+        :param value: The listing to store.
+        :return: None
+        """
+        key = (resource_type, region, freeze(params))
+        expires_at = time.monotonic() + self.ttls.get(resource_type, self.default_ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, resource_type, region=None):
+        """
+        Drop every cached listing of a resource type, e.g. after a call that changes those resources.
+        :param resource_type: Resource type to invalidate.
+        :param region: Only invalidate listings of this region (default is every region).
+        :return: Number of entries removed.
+        """
+        with self._lock:
+            keys = [key for key in self._entries
+                    if key[0] == resource_type and (region is None or key[1] == region)]
+            for key in keys:
+                del self._entries[key]
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self):
+        """
+        Drop every cached listing and reset the counters.
+        :return: None
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def stats(self):
+        """
+        Get the cache counters.
+        :return: dict with hits, misses, hit_rate, evictions, invalidations and entries.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'entries': len(self._entries)
+            }
+
+
+# shared by every controller in the process
+inventory_cache = InventoryCache()
@@ -0,0 +1,165 @@
+import itertools
+import queue
+import threading
+import time
+from enum import Enum
+
+from src.utils.config import JOB_MAX_WORKERS
+
+
+class JobStatus(Enum):
+    PENDING = 1
+    RUNNING = 2
+    SUCCEEDED = 3
+    FAILED = 4
+
+
+class Job:
+    def __init__(self, job_id, description, func, args, kwargs):
+        """
+        A long-running operation (usually a boto3 waiter) executed by the JobTracker's workers.
+        :param job_id: Sequential job number.
+        :param description: Human-readable description shown in the jobs list.
+        :param func: Callable to run.
+        :param args: Positional arguments for func.
+        :param kwargs: Keyword arguments for func.
+        """
+        self.id = job_id
+        self.description = description
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.status = JobStatus.PENDING
+        self.result = None
+        self.error = None
+        self.submitted_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+        # optional callable returning a progress description, shown while the job is not done
+        self.progress = None
+        self._done = threading.Event()
+
+    @property
+    def is_done(self):
+        return self._done.is_set()
+
+    @property
+    def elapsed_seconds(self):
+        """
+        Seconds since the job was submitted, or until it finished if it is done.
+        :return: float
+        """
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        return end - self.submitted_at
+
+    def wait(self, timeout: float = None):
+        """
+        Block until the job finishes.
+        :param timeout: Maximum seconds to wait (default is no limit).
+        :return: True if the job finished, False if the timeout expired.
+        """
+        return self._done.wait(timeout)
+
+    def run(self):
+        self.status = JobStatus.RUNNING
+        self.started_at = time.monotonic()
+        try:
+            self.result = self.func(*self.args, **self.kwargs)
+            self.status = JobStatus.SUCCEEDED
+        except Exception as e:
+            self.error = e
+            self.status = JobStatus.FAILED
+        finally:
+            self.finished_at = time.monotonic()
+            self._done.set()
+
+    def __str__(self):
+        elapsed = int(self.elapsed_seconds)
+        line = (f"Job #{self.id}: {self.description} - {self.status.name.capitalize()} "
+                f"({elapsed // 60}m {elapsed % 60:02d}s)")
+        if self.error is not None:
+            line += f" - Error: {self.error}"
+        elif self.status == JobStatus.SUCCEEDED and hasattr(self.result, 'summary'):
+            line += f" - {self.result.summary()}"
+        elif not self.is_done and self.progress is not None:
+            line += f" - {self.progress()}"
+        return line
+
+
+class JobTracker:
+    def __init__(self, max_workers: int = JOB_MAX_WORKERS):
+        """
+        Run long-running operations on a pool of background worker threads.
+        Workers are daemon threads, so exiting the application does not wait for pending jobs.
+        :param max_workers: Maximum number of jobs running at once.
+        """
+        self.max_workers = max_workers
+        self._jobs = []
+        self._queue = queue.Queue()
+        self._workers = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, description, func, *args, **kwargs):
+        """
+        Queue an operation and return straight away.
+        :param description: Human-readable description shown in the jobs list.
+        :param func: Callable to run in the background.
+        :param args: Positional arguments for func.
+        :param kwargs: Keyword arguments for func.
+        :return: Job handle.
+        """
+        with self._lock:
+            job = Job(next(self._ids), description, func, args, kwargs)
+            self._jobs.append(job)
+            if len(self._workers) < self.max_workers:
+                worker = threading.Thread(target=self._work, name=f"job-worker-{len(self._workers) + 1}",
+                                          daemon=True)
+                self._workers.append(worker)
+                worker.start()
+        self._queue.put(job)
+        return job
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            try:
+                job.run()
+            finally:
+                self._queue.task_done()
+
+    def list_jobs(self):
+        """
+        Get every submitted job, oldest first.
+        :return: List of Job objects.
+        """
+        with self._lock:
+            return list(self._jobs)
+
+    def pending_jobs(self):
+        """
+        Get the jobs that have not finished yet.
+        :return: List of Job objects.
+        """
+        return [job for job in self.list_jobs() if not job.is_done]
+
+    def finished_jobs(self):
+        """
+        Get the jobs that have finished, successfully or not.
+        :return: List of Job objects.
+        """
+        return [job for job in self.list_jobs() if job.is_done]
+
+    def clear_finished(self):
+        """
+        Forget every finished job.
+        :return: Number of jobs removed.
+        """
+        with self._lock:
+            before = len(self._jobs)
+            self._jobs = [job for job in self._jobs if not job.is_done]
+            return before - len(self._jobs)
+
+
+# shared by every menu in the process
+job_tracker = JobTracker()
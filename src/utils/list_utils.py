@@ -1,5 +1,10 @@
+import sys
+import threading
 from enum import Enum
 
+from src.utils.config import LIST_PAGE_SIZE
+from src.utils.option_index import OptionList
+
 
 class EC2ListType(Enum):
     ALL = 1
@@ -8,60 +13,50 @@ class EC2ListType(Enum):
     STOPPED = 4
 
 
+# instance states shown in the second section of a SPLIT listing
+NON_RUNNING_STATES = ['pending', 'stopping', 'stopped', 'shutting-down', 'terminated']
+
+# list type -> sections of (result key, states to fetch, title, message shown when the section is empty)
+EC2_LIST_SECTIONS = {
+    EC2ListType.ALL: [(EC2ListType.ALL, None, "EC2 Instances:", "No EC2 instances found.")],
+    EC2ListType.RUNNING: [(EC2ListType.RUNNING, ['running'], "Running EC2 Instances:", None)],
+    EC2ListType.STOPPED: [(EC2ListType.STOPPED, ['stopped'], "Stopped EC2 Instances:", None)],
+    EC2ListType.SPLIT: [
+        (EC2ListType.RUNNING, ['running'], "Running EC2 Instances:", "No running EC2 instances found."),
+        (EC2ListType.STOPPED, NON_RUNNING_STATES, "Stopped EC2 Instances:", "No stopped EC2 instances found.")
+    ]
+}
+
+PAGING_PROMPT = "[Enter] next page, [p] previous page, [f] filter, [a] show all, [q] stop listing: "
+
+
 def list_ec2_instances(ec2_controller, list_type: EC2ListType = EC2ListType.SPLIT, skip_print: bool = False):
     """
     List EC2 instances based on the specified type.
+    Instances are printed page by page while later describe_instances pages are still being fetched.
     :param ec2_controller: EC2Controller instance.
     :param list_type: EC2ListType indicating which instances to list (ALL, SPLIT, RUNNING, STOPPED).
     :param skip_print: If True, skip printing the instances to console.
-    :return: dict containing lists of EC2 instances.
+    :return: dict containing OptionLists of EC2 instance IDs, labelled with each instance's name, state and type.
     {EC2ListType.RUNNING: [...], EC2ListType.STOPPED: [...]}
     """
     try:
+        if skip_print:
+            instances = ec2_controller.get_ec2_instances(list_type=list_type)
+            return {key: instance_option_list(value) for key, value in instances.items()}
+
         region_name = ec2_controller.ec2.meta.client.meta.region_name
-        instances = ec2_controller.get_ec2_instances(list_type=list_type)
-
-        i = 1
-
-        if list_type == EC2ListType.ALL:
-            if len(instances[EC2ListType.ALL]) == 0:
-                if not skip_print: print("No EC2 instances found.")
-            else:
-                if not skip_print: print("EC2 Instances:")
-                for instance in instances[EC2ListType.ALL]:
-                    if not skip_print: print(ec2_to_string(instance, region_name, i))
-                    i += 1
-            instances[EC2ListType.ALL] = [instance.id for instance in instances[EC2ListType.ALL]]
-            return instances
-        elif list_type == EC2ListType.RUNNING or list_type == EC2ListType.STOPPED:
-            key = list_type
-            if len(instances[key]) > 0:
-                if not skip_print: print(f"{list_type.name.capitalize()} EC2 Instances:")
-                for instance in instances[key]:
-                    if not skip_print: print(ec2_to_string(instance, region_name, i))
-                    i += 1
-
-            instances[key] = [instance.id for instance in instances[key]]
-            return instances
-        elif list_type == EC2ListType.SPLIT:
-            if len(instances[EC2ListType.RUNNING]) == 0:
-                if not skip_print: print("No running EC2 instances found.")
-            else:
-                if not skip_print: print("Running EC2 Instances:")
-                for instance in instances[EC2ListType.RUNNING]:
-                    if not skip_print: print(ec2_to_string(instance, region_name, i))
-                    i += 1
-
-            if len(instances[EC2ListType.STOPPED]) == 0:
-                if not skip_print: print("No stopped EC2 instances found.")
-            else:
-                if not skip_print: print("Stopped EC2 Instances:")
-                for instance in instances[EC2ListType.STOPPED]:
-                    if not skip_print: print(ec2_to_string(instance, region_name, i))
-                    i += 1
-
-        instances[EC2ListType.RUNNING] = [instance.id for instance in instances[EC2ListType.RUNNING]]
-        instances[EC2ListType.STOPPED] = [instance.id for instance in instances[EC2ListType.STOPPED]]
+        sections = EC2_LIST_SECTIONS[list_type]
+        # start fetching every section now so later sections load while the first one is being paged
+        streams = [_BufferedStream(ec2_controller.stream_ec2_instances(states=states)) for _, states, _, _ in sections]
+        instances = {}
+        start_index = 1
+        for (key, _, title, empty_message), stream in zip(sections, streams):
+            records = render_stream(stream,
+                                    lambda instance, index: ec2_to_string(instance, region_name, index),
+                                    title, empty_message=empty_message, start_index=start_index)
+            instances[key] = instance_option_list(records)
+            start_index += len(records)
 
         return instances
     except Exception as e:
@@ -70,24 +65,248 @@ def list_ec2_instances(ec2_controller, list_type: EC2ListType = EC2ListType.SPLI
 
 
 def list_ordered_list(input_list, list_title):
-    print(list_title)
-    for i, item in enumerate(input_list, start=1):
-        print(f"{i}. {item}")
-    return input_list
+    """
+    Print a numbered list, paging through it if it is longer than LIST_PAGE_SIZE.
+    :param input_list: List or iterable (e.g., a generator of records) to print.
+    :param list_title: Title printed above the list.
+    :return: OptionList of every item, in the order they were numbered, keeping input_list's labels if it has any.
+    """
+    items = render_stream(input_list, lambda item, index: f"{index}. {item}", list_title)
+    return OptionList(items, getattr(input_list, 'labels', None))
+
+
+def instance_option_list(instances):
+    """
+    Build the selectable list of instance IDs, searchable by name, state, type, zone and IP addresses.
+    :param instances: Iterable of InstanceRecord objects.
+    :return: OptionList of instance IDs.
+    """
+    instances = list(instances)
+    labels = {
+        instance.id: (instance.name, instance.state, instance.instance_type, instance.availability_zone,
+                      instance.private_ip_address, instance.public_ip_address)
+        for instance in instances
+    }
+    return OptionList([instance.id for instance in instances], labels)
+
+
+def render_stream(items, formatter, title, empty_message: str = None, start_index: int = 1,
+                  page_size: int = LIST_PAGE_SIZE, interactive: bool = None):
+    """
+    Print items page by page while they are still being produced.
+    The items are consumed on a background thread, so the first page is shown as soon as it is available.
+    Each page is written to the console in a single block. If there is more than one page, the user can
+    move to the next or previous page, filter the items by text, show the rest, or stop listing.
+    Items keep their original number when filtered, so they can still be selected by number.
+    :param items: Iterable of items to print (e.g., a generator of records), or a _BufferedStream consuming them.
+    :param formatter: Callable (item, index) returning the line printed for the item.
+    :param title: Title printed above the first page.
+    :param empty_message: Printed instead of the title if there are no items (default is the title).
+    :param start_index: Number of the first item.
+    :param page_size: Number of items per page.
+    :param interactive: If False, print every page without prompting (default is True if stdin is a terminal).
+    :return: List of every item, in the order they were numbered.
+    """
+    if interactive is None:
+        interactive = sys.stdin.isatty()
+    stream = items if isinstance(items, _BufferedStream) else _BufferedStream(items)
+
+    if not stream.wait_for(1):
+        _write_block([empty_message or title])
+        return stream.result()
+
+    _write_block([title])
+    lines = _StreamLines(stream, formatter, start_index)
+    page_start = 0
+    while True:
+        page = lines.page(page_start, page_size)
+        _write_block(page)
+        has_next = lines.available(page_start + page_size)
+        if not has_next:
+            break
+        if not interactive:
+            page_start += page_size
+            continue
+
+        command = input(f"Showing {page_start + 1}-{page_start + len(page)} of {lines.count_label()}. "
+                        f"{PAGING_PROMPT}").strip()
+        if command.lower() == 'q':
+            break
+        if command.lower() == 'a':
+            remaining = lines.page(page_start + page_size, None)
+            for block in chunk_list(remaining, page_size):
+                _write_block(block)
+            break
+        if command.lower() == 'p':
+            page_start = max(0, page_start - page_size)
+        elif command.lower() == 'f':
+            lines.set_filter(input("Filter text (leave empty to clear): ").strip())
+            page_start = 0
+            if not lines.available(0):
+                _write_block(["No items match the filter."])
+                lines.set_filter('')
+        else:
+            page_start += page_size
+
+    return stream.result()
+
+
+def _write_block(lines):
+    if lines:
+        sys.stdout.write('\n'.join(lines) + '\n')
+        sys.stdout.flush()
+
+
+class _BufferedStream:
+    def __init__(self, items):
+        """
+        Consume an iterable on a daemon thread, buffering the items for random access.
+        :param items: Iterable to consume.
+        """
+        self.items = []
+        self.done = False
+        self.error = None
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._consume, args=(items,), daemon=True)
+        self._thread.start()
+
+    def _consume(self, items):
+        try:
+            for item in items:
+                with self._condition:
+                    self.items.append(item)
+                    self._condition.notify_all()
+        except Exception as e:
+            self.error = e
+        finally:
+            with self._condition:
+                self.done = True
+                self._condition.notify_all()
+
+    def wait_for(self, count):
+        """
+        Block until at least count items are buffered or the iterable is exhausted.
+        :param count: Number of items needed, or None for every item.
+        :return: True if at least count items are available.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self.done or (count is not None and len(self.items) >= count))
+            if self.error is not None:
+                raise self.error
+            return count is not None and len(self.items) >= count
+
+    def result(self):
+        """
+        Wait for the iterable to be exhausted.
+        :return: List of every item.
+        """
+        self.wait_for(None)
+        return list(self.items)
+
+
+class _StreamLines:
+    def __init__(self, stream, formatter, start_index):
+        """
+        Formatted, optionally filtered view of a _BufferedStream.
+        :param stream: _BufferedStream of items.
+        :param formatter: Callable (item, index) returning the line for the item.
+        :param start_index: Number of the first item.
+        """
+        self.stream = stream
+        self.formatter = formatter
+        self.start_index = start_index
+        self.filter_text = ''
+        self._lines = []
+        self._filtered = None
+
+    def _line(self, position):
+        while len(self._lines) <= position:
+            index = len(self._lines)
+            self._lines.append(self.formatter(self.stream.items[index], self.start_index + index))
+        return self._lines[position]
+
+    def set_filter(self, text):
+        """
+        Only show lines containing text (case-insensitive); waits for every item to be fetched.
+        :param text: Filter text, or an empty string to show every line.
+        :return: None
+        """
+        self.filter_text = text
+        if not text:
+            self._filtered = None
+            return
+        self.stream.wait_for(None)
+        needle = text.lower()
+        self._filtered = [line for line in (self._line(position) for position in range(len(self.stream.items)))
+                          if needle in line.lower()]
+
+    def available(self, position):
+        """
+        Check whether there is a line at position, waiting for it to be fetched if needed.
+        :param position: Zero-based line position.
+        :return: True if the line exists.
+        """
+        if self._filtered is not None:
+            return position < len(self._filtered)
+        return self.stream.wait_for(position + 1)
+
+    def page(self, start, size):
+        """
+        Get the lines of a page, waiting for them to be fetched if needed.
+        :param start: Zero-based position of the first line.
+        :param size: Number of lines, or None for every remaining line.
+        :return: List of lines.
+        """
+        if self._filtered is not None:
+            return self._filtered[start:None if size is None else start + size]
+        self.stream.wait_for(None if size is None else start + size)
+        end = len(self.stream.items) if size is None else min(start + size, len(self.stream.items))
+        return [self._line(position) for position in range(start, end)]
+
+    def count_label(self):
+        if self._filtered is not None:
+            return f"{len(self._filtered)} matching '{self.filter_text}'"
+        if self.stream.done:
+            return str(len(self.stream.items))
+        return f"{len(self.stream.items)}+ (still loading)"
 
 
 def ec2_to_string(instance, region_name, index):
     """
-    Convert an EC2 instance object to a string representation.
+    Convert an EC2 instance record to a string representation.
     :param index: Index number for display.
-    :param region_name:
-    :param instance: Boto3 EC2 instance object.
+    :param region_name: Region the instance is in.
+    :param instance: InstanceRecord object.
     :return: String representation of the EC2 instance.
     """
     return (f"{index}. Instance ID: {instance.id}, "
-            f"{("Name: " + instance.tags[0]['Value']) if instance.tags and instance.tags[0]['Value'] != '' else 'Unnamed'}, "
-            f"State: {instance.state['Name']}, "
+            f"{('Name: ' + instance.name) if instance.name else 'Unnamed'}, "
+            f"State: {instance.state}, "
             f"Instance Type: {instance.instance_type}, "
             f"Region: {region_name}, "
-            f"Launch Time: {instance.launch_time}"
+            f"Launch Time: {instance.launch_time}, "
             f"Public IP: {instance.public_ip_address if instance.public_ip_address else 'N/A'}")
+
+
+def object_to_string(obj, index):
+    """
+    Convert an S3 object record to a string representation.
+    :param obj: ObjectRecord object.
+    :param index: Index number for display.
+    :return: String representation of the object, or of the folder for a common prefix.
+    """
+    if obj.is_prefix:
+        return f"{index}. Folder: {obj.key}"
+    return (f"{index}. Key: {obj.key}, Size: {obj.size} bytes, Storage Class: {obj.storage_class}, "
+            f"Last Modified: {obj.last_modified}, ETag: {obj.etag}")
+
+
+def chunk_list(input_list, chunk_size):
+    """
+    Split a list into consecutive chunks.
+    :param input_list: The list to split.
+    :param chunk_size: Maximum number of items per chunk.
+    :return: Generator of lists with at most chunk_size items.
+    """
+    for start in range(0, len(input_list), chunk_size):
+        yield input_list[start:start + chunk_size]
@@ -0,0 +1,143 @@
+import difflib
+from bisect import bisect_left
+
+from src.utils.config import OPTION_SEARCH_LIMIT, OPTION_FUZZY_CUTOFF
+
+# match tiers, best first
+EXACT_MATCH = 0
+PREFIX_MATCH = 1
+SUBSTRING_MATCH = 2
+FUZZY_MATCH = 3
+
+
+class OptionList(list):
+    def __init__(self, options=(), labels: dict = None):
+        """
+        List of selectable options that also carries searchable labels for each option.
+        Behaves like a plain list, so callers that only need the options are unaffected.
+        :param options: The options, e.g. instance IDs.
+        :param labels: dict of option to a list of extra searchable text (e.g., Name tag, state).
+        """
+        super().__init__(options)
+        self.labels = labels or {}
+        self._option_index = None
+
+    def option_index(self):
+        """
+        Get the OptionIndex over the options and labels, building it on first use.
+        :return: OptionIndex
+        """
+        if self._option_index is None or len(self._option_index) != len(self):
+            self._option_index = OptionIndex(self, self.labels)
+        return self._option_index
+
+
+class OptionIndex:
+    def __init__(self, options, labels: dict = None):
+        """
+        Search index over a list of options.
+        Options resolve by value or list number in O(1), and free text is matched against the options and their
+        labels by prefix, substring and fuzzy matching.
+        :param options: The options, in the order they were numbered.
+        :param labels: dict of option to a list of extra searchable text.
+        """
+        labels = labels or {}
+        self.options = list(options)
+        self.labels = labels
+        self._positions = {}
+        self._folded_positions = {}
+        self._haystacks = []
+        term_positions = {}
+
+        for position, option in enumerate(self.options):
+            self._positions.setdefault(str(option), position)
+            self._folded_positions.setdefault(str(option).lower(), position)
+
+            texts = [str(option)] + [str(label) for label in labels.get(option, ()) if label]
+            self._haystacks.append(' '.join(texts).lower())
+            for text in texts:
+                text = text.lower()
+                for term in {text, *text.split()}:
+                    term_positions.setdefault(term, []).append(position)
+
+        self._terms = sorted(term_positions)
+        self._term_positions = term_positions
+        self._completions = []
+
+    def __len__(self):
+        return len(self.options)
+
+    def __iter__(self):
+        return iter(self.options)
+
+    def __contains__(self, option):
+        return str(option) in self._positions
+
+    def resolve(self, response):
+        """
+        Resolve a response given by value (case-insensitive) or by its number in the list.
+        :param response: The user's input.
+        :return: The selected option, or None if the response does not name exactly one option.
+        """
+        response = str(response).strip()
+        position = self._positions.get(response)
+        if position is None:
+            position = self._folded_positions.get(response.lower())
+        if position is None and response.isdigit() and 0 < int(response) <= len(self.options):
+            position = int(response) - 1
+        return None if position is None else self.options[position]
+
+    def search(self, text, limit: int = OPTION_SEARCH_LIMIT):
+        """
+        Rank the options matching free text.
+        Options whose value or label equals the text come first, then prefix, substring and fuzzy matches.
+        :param text: Text to search for.
+        :param limit: Maximum number of matches returned.
+        :return: List of (tier, number, option) tuples, best match first.
+        """
+        needle = str(text).strip().lower()
+        if not needle:
+            return []
+
+        best_tiers = {}
+
+        def add(positions, tier):
+            for position in positions:
+                if tier < best_tiers.get(position, FUZZY_MATCH + 1):
+                    best_tiers[position] = tier
+
+        # prefix matches are a contiguous run of the sorted terms
+        start = bisect_left(self._terms, needle)
+        for term in self._terms[start:]:
+            if not term.startswith(needle):
+                break
+            add(self._term_positions[term], EXACT_MATCH if term == needle else PREFIX_MATCH)
+
+        add((position for position, haystack in enumerate(self._haystacks) if needle in haystack), SUBSTRING_MATCH)
+
+        if not best_tiers:
+            for term in difflib.get_close_matches(needle, self._terms, n=limit, cutoff=OPTION_FUZZY_CUTOFF):
+                add(self._term_positions[term], FUZZY_MATCH)
+
+        ranked = sorted(best_tiers.items(), key=lambda item: (item[1], item[0]))[:limit]
+        return [(tier, position + 1, self.options[position]) for position, tier in ranked]
+
+    def describe(self, option):
+        """
+        Get a one-line description of an option and its labels.
+        :param option: The option.
+        :return: String such as 'i-123 (web, running)'.
+        """
+        labels = [str(label) for label in self.labels.get(option, ()) if label]
+        return f"{option} ({', '.join(labels)})" if labels else str(option)
+
+    def complete(self, text, state):
+        """
+        readline completer that completes to the options ranked by search.
+        :param text: Text typed so far.
+        :param state: Index of the completion requested by readline.
+        :return: The completion, or None when there are no more.
+        """
+        if state == 0:
+            self._completions = [str(option) for _, _, option in self.search(text)] if text else []
+        return self._completions[state] if state < len(self._completions) else None
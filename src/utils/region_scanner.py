@@ -0,0 +1,108 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.controller.EBSController import EBSController
+from src.controller.EC2Controller import EC2Controller
+from src.controller.RDSController import RDSController
+from src.controller.S3Controller import S3Controller
+from src.model.Resources import Resource
+from src.utils.config import REGION_SCAN_MAX_WORKERS
+
+# how to build each controller from a region-scoped Resource
+CONTROLLER_FACTORIES = {
+    EC2Controller: lambda res: EC2Controller(res.ec2_resource(), res.ec2_client()),
+    EBSController: lambda res: EBSController(res.ec2_resource(), res.ec2_client()),
+    RDSController: lambda res: RDSController(res.rds_client()),
+    S3Controller: lambda res: S3Controller(res.s3_resource()),
+}
+
+_regions_lock = threading.Lock()
+_enabled_regions = None
+
+
+class RegionScanResult:
+    def __init__(self):
+        """
+        Results of a multi-region scan.
+        results maps region name to the value returned by the controller method in that region,
+        errors maps region name to the exception raised there.
+        """
+        self.results = {}
+        self.errors = {}
+
+    def merged(self):
+        """
+        Merge the per-region results into one collection tagged by region.
+        List results become a list of (region, item) tuples.
+        Dict results (e.g. get_ec2_instances) become a dict of the same keys, each holding (region, item) tuples.
+        :return: list or dict of (region, item) tuples.
+        """
+        if any(isinstance(result, dict) for result in self.results.values()):
+            merged = {}
+            for region in sorted(self.results):
+                for key, items in self.results[region].items():
+                    merged.setdefault(key, []).extend((region, item) for item in items)
+            return merged
+
+        merged = []
+        for region in sorted(self.results):
+            merged.extend((region, item) for item in self.results[region])
+        return merged
+
+
+def get_enabled_regions(refresh: bool = False):
+    """
+    Get the regions enabled for the account (opt-in not required, or opted in).
+    The list is fetched once per process unless refresh is True.
+    :param refresh: If True, ask EC2 for the region list again.
+    :return: List of region names.
+    """
+    global _enabled_regions
+    with _regions_lock:
+        if _enabled_regions is None or refresh:
+            response = Resource().ec2_client().describe_regions(
+                Filters=[{'Name': 'opt-in-status', 'Values': ['opt-in-not-required', 'opted-in']}]
+            )
+            _enabled_regions = sorted(region['RegionName'] for region in response['Regions'])
+        return list(_enabled_regions)
+
+
+def scan_regions(controller_class, method_name, *args, regions=None, max_workers: int = REGION_SCAN_MAX_WORKERS,
+                 **kwargs):
+    """
+    Run a controller listing method in every region at once on a bounded thread pool.
+    Each region gets its own controller built from a region-scoped Resource, so boto3 resources are never shared
+    between threads. The scan takes about as long as the slowest region.
+    :param controller_class: Controller class to build per region (e.g., EC2Controller).
+    :param method_name: Name of the listing method to call (e.g., 'get_ec2_instances').
+    :param args: Positional arguments for the listing method.
+    :param regions: Regions to scan (default is every enabled region).
+    :param max_workers: Maximum number of regions scanned concurrently.
+    :param kwargs: Keyword arguments for the listing method.
+    :return: RegionScanResult with per-region results and errors.
+    """
+    factory = CONTROLLER_FACTORIES.get(controller_class)
+    if factory is None:
+        raise ValueError(f"Unsupported controller for region scan: {controller_class.__name__}")
+
+    if regions is None:
+        regions = get_enabled_regions()
+
+    def scan(region):
+        controller = factory(Resource(region))
+        result = getattr(controller, method_name)(*args, **kwargs)
+        # materialise lazy results inside the worker so the API calls run concurrently
+        if not isinstance(result, (list, dict)):
+            result = list(result)
+        return result
+
+    scan_result = RegionScanResult()
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(regions)))) as executor:
+        futures = {region: executor.submit(scan, region) for region in regions}
+        for region, future in futures.items():
+            try:
+                scan_result.results[region] = future.result()
+            except Exception as e:
+                scan_result.errors[region] = e
+
+    return scan_result
@@ -0,0 +1,154 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import ClientError
+
+from src.utils.config import S3_BULK_DELETE_MAX_WORKERS, S3_BULK_DELETE_MAX_ATTEMPTS, S3_BULK_DELETE_RETRY_SECONDS, \
+    S3_DELETE_BATCH_SIZE
+
+# delete_objects error codes worth another attempt; anything else (e.g., AccessDenied) is reported as is
+RETRYABLE_DELETE_ERRORS = {'SlowDown', 'InternalError', 'ServiceUnavailable', 'RequestTimeout', 'OperationAborted'}
+
+
+class S3BulkDelete:
+    def __init__(self, s3_controller, bucket_name, prefix: str = '', versions: bool = False, dry_run: bool = False,
+                 max_workers: int = S3_BULK_DELETE_MAX_WORKERS, max_attempts: int = S3_BULK_DELETE_MAX_ATTEMPTS):
+        """
+        Delete every object (and, in a versioned bucket, every version and delete marker) under a prefix.
+        Listing pages are batched into delete_objects calls of S3_DELETE_BATCH_SIZE keys, run by a pool of workers
+        while the listing goes on; at most two batches per worker wait in memory. Keys that fail with a throttling or
+        server error, and batches whose call fails on the network, are retried with exponential backoff.
+        :param s3_controller: S3Controller of the bucket.
+        :param bucket_name: Name of the bucket.
+        :param prefix: Only delete keys starting with this prefix ('' for the whole bucket).
+        :param versions: If True, delete every version and delete marker rather than only the current objects.
+        :param dry_run: If True, only count what would be deleted.
+        :param max_workers: Number of concurrent delete_objects callers.
+        :param max_attempts: Attempts per key before its error is reported.
+        """
+        self.s3_controller = s3_controller
+        self.bucket_name = bucket_name
+        self.prefix = prefix
+        self.versions = versions
+        self.dry_run = dry_run
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+        self.listed = 0
+        self.listed_bytes = 0
+        self.delete_markers = 0
+        self.deleted = 0
+        self.retried = 0
+        self.errors = {}
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def _targets(self):
+        # (key, version id) pairs to delete, counted as they are listed
+        if self.versions:
+            records = self.s3_controller.list_object_versions(self.bucket_name, self.prefix)
+        else:
+            records = self.s3_controller.list_objects_parallel(self.bucket_name, self.prefix)
+        for record in records:
+            self.listed += 1
+            self.listed_bytes += record.size or 0
+            if getattr(record, 'is_delete_marker', False):
+                self.delete_markers += 1
+            yield record.key, getattr(record, 'version_id', None)
+
+    def _batches(self):
+        batch = []
+        for target in self._targets():
+            batch.append(target)
+            if len(batch) >= S3_DELETE_BATCH_SIZE:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _delete_batch(self, batch):
+        for attempt in range(self.max_attempts):
+            if attempt:
+                time.sleep(S3_BULK_DELETE_RETRY_SECONDS * 2 ** (attempt - 1))
+            transient = False
+            try:
+                errors = self.s3_controller.delete_object_batch(self.bucket_name, batch)
+            except ClientError as e:
+                # the whole call failed (e.g., throttled past the client's own retries)
+                code = e.response.get('Error', {}).get('Code')
+                errors = {target: (code, str(e)) for target in batch}
+            except Exception as e:
+                # e.g. EndpointConnectionError or ReadTimeoutError: the batch may not have been sent, so retry it
+                errors = {target: (type(e).__name__, str(e)) for target in batch}
+                transient = True
+            retry = [target for target in batch
+                     if transient or errors.get(target, (None,))[0] in RETRYABLE_DELETE_ERRORS]
+            with self._lock:
+                self.deleted += len(batch) - len(errors)
+                if attempt < self.max_attempts - 1:
+                    self.retried += len(retry)
+                for target, (code, message) in errors.items():
+                    if target not in retry or attempt == self.max_attempts - 1:
+                        key, version_id = target
+                        self.errors[f"{key} ({version_id})" if version_id else key] = f"{code}: {message}"
+            if not retry:
+                return
+            batch = retry
+
+    def run(self):
+        """
+        List and delete (or, in a dry run, count) the objects.
+        :return: self, so a background job's result describes the deletion.
+        """
+        self.started_at = time.monotonic()
+        try:
+            if self.dry_run:
+                for _ in self._targets():
+                    pass
+                return self
+            slots = threading.BoundedSemaphore(self.max_workers * 2)
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for batch in self._batches():
+                    slots.acquire()
+                    future = executor.submit(self._delete_batch, batch)
+                    future.add_done_callback(lambda _: slots.release())
+        finally:
+            self.finished_at = time.monotonic()
+        return self
+
+    @property
+    def seconds(self):
+        """
+        :return: Seconds the deletion has taken so far.
+        """
+        if self.started_at is None:
+            return 0
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def keys_per_second(self):
+        """
+        :return: Average number of keys deleted (or counted, in a dry run) per second.
+        """
+        seconds = self.seconds
+        return (self.listed if self.dry_run else self.deleted) / seconds if seconds > 0 else 0
+
+    def summary(self):
+        """
+        Describe the progress of the deletion.
+        :return: Summary string.
+        """
+        kind = 'versions' if self.versions else 'objects'
+        size = f"{self.listed_bytes / (1024 ** 3):.2f} GiB"
+        if self.versions:
+            size += f", {self.delete_markers} delete markers"
+        if self.dry_run:
+            return f"Dry run: {self.listed} {kind} ({size}) would be deleted ({self.keys_per_second:.0f}/s)"
+        text = (f"{self.deleted} of {self.listed} {kind} deleted ({size} listed) "
+                f"in {self.seconds:.0f}s ({self.keys_per_second:.0f}/s)")
+        if self.retried:
+            text += f", {self.retried} retried"
+        if self.errors:
+            text += f", {len(self.errors)} failed"
+        return text
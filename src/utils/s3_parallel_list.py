@@ -0,0 +1,218 @@
+import threading
+from bisect import insort
+from collections import deque
+
+from src.model.Records import ObjectRecord
+from src.utils.config import S3_PARALLEL_LIST_MAX_WORKERS, S3_SHARDS_PER_WORKER, S3_SHARD_SPLIT_PAGES, \
+    S3_SHARD_SPLIT_FACTOR, S3_LIST_PAGE_SIZE, S3_SHARD_DISCOVERY_PAGES
+
+# split keys are built from characters below this code point; keys beyond it fall into the last shard of a range
+MAX_SPLIT_CHAR = 0x7f
+MIN_SPLIT_CHAR = 0x20
+
+
+def split_key_range(low, high, parts, prefix: str = ''):
+    """
+    Split the key range (low, high] into up to parts contiguous ranges, by the characters that follow the
+    longest common prefix of low and high. Adjacent characters are split one character deeper.
+    :param low: Exclusive lower bound ('' or None for the start of the prefix).
+    :param high: Inclusive upper bound (None for the end of the prefix).
+    :param parts: Number of ranges wanted.
+    :param prefix: Prefix every key starts with.
+    :return: List of (low, high) tuples covering exactly (low, high], in key order.
+    """
+    lower = max(low or '', prefix)
+    upper = high if high is not None else prefix + chr(MAX_SPLIT_CHAR)
+    if parts < 2 or lower >= upper:
+        return [(low, high)]
+
+    position = 0
+    while position < min(len(lower), len(upper)) and lower[position] == upper[position]:
+        position += 1
+    if position >= len(upper):
+        return [(low, high)]
+    base = upper[:position]
+    low_char = ord(lower[position]) if position < len(lower) else MIN_SPLIT_CHAR - 1
+    high_char = ord(upper[position])
+
+    if high_char - low_char < 2:
+        if position >= len(lower):
+            return [(low, high)]
+        # e.g. (a/x1, a/y]: split (a/x1, a/x~] one character deeper and keep (a/x~, a/y] whole
+        deeper = lower[:position + 1] + chr(MAX_SPLIT_CHAR)
+        if not lower < deeper < upper:
+            return [(low, high)]
+        return split_key_range(low, deeper, parts - 1, prefix) + [(deeper, high)]
+
+    count = min(parts - 1, high_char - low_char - 1)
+    characters = sorted({low_char + round((index + 1) * (high_char - low_char) / (count + 1))
+                         for index in range(count)})
+    bounds = [base + chr(character) for character in characters if low_char < character < high_char]
+    return list(zip([low] + bounds, bounds + [high]))
+
+
+class _Shard:
+    __slots__ = ('low', 'high', 'records', 'done')
+
+    def __init__(self, low, high):
+        self.low = low
+        self.high = high
+        self.records = deque()
+        self.done = False
+
+    def __lt__(self, other):
+        return (self.low or '') < (other.low or '')
+
+
+class ParallelLister:
+    def __init__(self, client, bucket_name, prefix: str = '', ordered: bool = False,
+                 max_workers: int = S3_PARALLEL_LIST_MAX_WORKERS, page_size: int = S3_LIST_PAGE_SIZE):
+        """
+        List a bucket with many concurrent list_objects_v2 calls, each over its own key range (shard).
+        The initial shards follow the top-level common prefixes in the first S3_SHARD_DISCOVERY_PAGES pages of a
+        delimited listing of the prefix, or the first characters of the keys if there are few. A shard still
+        truncated after S3_SHARD_SPLIT_PAGES pages is split while workers are idle, so hot ranges spread over the
+        workers.
+        :param client: boto3 S3 client.
+        :param bucket_name: The name of the S3 bucket.
+        :param prefix: Only list keys starting with this prefix.
+        :param ordered: If True, yield the objects in key order (shards ahead of the current one are buffered);
+            otherwise yield each page as soon as it arrives.
+        :param max_workers: Number of concurrent list_objects_v2 callers.
+        :param page_size: Number of keys per list_objects_v2 call.
+        """
+        self.client = client
+        self.bucket_name = bucket_name
+        self.prefix = prefix
+        self.ordered = ordered
+        self.max_workers = max_workers
+        self.page_size = page_size
+        self.pages = 0
+        self.splits = 0
+        self.shard_count = 0
+        self._shards = []
+        self._queue = deque()
+        self._busy = 0
+        self._error = None
+        self._stopped = False
+        self._condition = threading.Condition()
+
+    def _initial_shards(self):
+        # only the first pages of top-level prefixes are listed here; a truncated listing leaves the rest of the
+        # keyspace to character splits and adaptive splitting
+        common_prefixes = []
+        params = {'Bucket': self.bucket_name, 'Prefix': self.prefix, 'Delimiter': '/', 'MaxKeys': self.page_size}
+        for _ in range(S3_SHARD_DISCOVERY_PAGES):
+            response = self.client.list_objects_v2(**params)
+            common_prefixes.extend(common_prefix['Prefix'] for common_prefix in response.get('CommonPrefixes', []))
+            truncated = response.get('IsTruncated', False)
+            if not truncated:
+                break
+            params['ContinuationToken'] = response['NextContinuationToken']
+        target = self.max_workers * S3_SHARDS_PER_WORKER
+        if len(common_prefixes) < self.max_workers:
+            return split_key_range(None, None, target, self.prefix)
+        step = max(1, len(common_prefixes) // target)
+        bounds = common_prefixes[step - 1::step]
+        shards = list(zip([None] + bounds, bounds))
+        if truncated:
+            return shards + split_key_range(bounds[-1], None, self.max_workers, self.prefix)
+        return shards + [(bounds[-1], None)]
+
+    def _add_shard(self, low, high):
+        shard = _Shard(low, high)
+        insort(self._shards, shard)
+        self._queue.append(shard)
+        self.shard_count += 1
+        return shard
+
+    def _list_shard(self, shard):
+        params = {'Bucket': self.bucket_name, 'Prefix': self.prefix, 'MaxKeys': self.page_size}
+        if shard.low:
+            params['StartAfter'] = shard.low
+        pages = 0
+        while not self._stopped:
+            response = self.client.list_objects_v2(**params)
+            pages += 1
+            records = [ObjectRecord.from_response(obj) for obj in response.get('Contents', [])]
+            past_end = shard.high is not None and records and records[-1].key > shard.high
+            if past_end:
+                records = [record for record in records if record.key <= shard.high]
+            with self._condition:
+                self.pages += 1
+                shard.records.extend(records)
+                self._condition.notify_all()
+            if past_end or not response.get('IsTruncated'):
+                return
+
+            # split the rest of a hot shard while other workers have nothing to do
+            with self._condition:
+                if pages >= S3_SHARD_SPLIT_PAGES and not self._queue and self._busy < self.max_workers and records:
+                    ranges = split_key_range(records[-1].key, shard.high, S3_SHARD_SPLIT_FACTOR, self.prefix)
+                    if len(ranges) > 1:
+                        shard.high = ranges[0][1]
+                        for low, high in ranges[1:]:
+                            self._add_shard(low, high)
+                        self.splits += 1
+                        self._condition.notify_all()
+            params['ContinuationToken'] = response['NextContinuationToken']
+            params.pop('StartAfter', None)
+
+    def _work(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._queue or self._stopped or self._busy == 0)
+                if self._stopped or not self._queue:
+                    return
+                shard = self._queue.popleft()
+                self._busy += 1
+            try:
+                self._list_shard(shard)
+            except Exception as e:
+                with self._condition:
+                    self._error = self._error or e
+                    self._stopped = True
+            finally:
+                with self._condition:
+                    shard.done = True
+                    self._busy -= 1
+                    self._condition.notify_all()
+
+    def _next_records(self):
+        # wait for records to yield: the first shard's in ordered mode, any shard's otherwise
+        while True:
+            if self._error is not None:
+                raise self._error
+            if not self._shards:
+                return None
+            candidates = self._shards[:1] if self.ordered else self._shards
+            for shard in candidates:
+                if shard.records:
+                    records = list(shard.records)
+                    shard.records.clear()
+                    return records
+            finished = [shard for shard in candidates if shard.done and not shard.records]
+            for shard in finished:
+                self._shards.remove(shard)
+            if not finished:
+                self._condition.wait()
+
+    def __iter__(self):
+        with self._condition:
+            for low, high in self._initial_shards():
+                self._add_shard(low, high)
+        workers = [threading.Thread(target=self._work, name=f"s3-lister-{index}", daemon=True)
+                   for index in range(self.max_workers)]
+        for worker in workers:
+            worker.start()
+        try:
+            while True:
+                with self._condition:
+                    records = self._next_records()
+                if records is None:
+                    return
+                yield from records
+        finally:
+            with self._condition:
+                self._stopped = True
+                self._condition.notify_all()
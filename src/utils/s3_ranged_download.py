@@ -0,0 +1,238 @@
+import base64
+import hashlib
+import json
+import mmap
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import ClientError
+
+from src.utils.config import S3_RANGED_PART_SIZE_BYTES, S3_RANGED_MAX_WORKERS, S3_RANGED_MAX_ATTEMPTS, \
+    S3_RANGED_STATE_SUFFIX
+
+MIB = 1024 * 1024
+
+
+def _b64(digest):
+    return base64.b64encode(digest).decode()
+
+
+# part checksums S3 reports that can be computed without extra dependencies, as functions of the part's bytes
+PART_CHECKSUMS = {
+    'ChecksumCRC32': lambda data: _b64(zlib.crc32(data).to_bytes(4, 'big')),
+    'ChecksumSHA1': lambda data: _b64(hashlib.sha1(data).digest()),
+    'ChecksumSHA256': lambda data: _b64(hashlib.sha256(data).digest()),
+}
+
+
+def fixed_ranges(size, part_size):
+    """
+    Split an object into byte ranges of part_size bytes (the last one may be shorter).
+    :param size: Size of the object in bytes.
+    :param part_size: Size of each range in bytes.
+    :return: List of (first byte, last byte, checksum name, checksum) tuples, with no checksums.
+    """
+    return [(start, min(start + part_size, size) - 1, None, None) for start in range(0, size, part_size)]
+
+
+class RangedDownload:
+    def __init__(self, client, bucket_name, object_key, file_path, part_size: int = S3_RANGED_PART_SIZE_BYTES,
+                 max_workers: int = S3_RANGED_MAX_WORKERS, max_attempts: int = S3_RANGED_MAX_ATTEMPTS,
+                 progress=None):
+        """
+        Download one large object with concurrent Range GETs, each read straight into its slice of a pre-allocated,
+        memory-mapped destination file.
+        If the object was uploaded in parts with CRC32, SHA1 or SHA256 checksums, the ranges follow its parts and each
+        is verified against its checksum; otherwise the ranges are part_size bytes and only their lengths are checked.
+        Every GET is conditional on the object's ETag. Completed ranges are recorded in a state file next to the
+        destination, so running the download again after an interruption fetches only the missing ones.
+        :param client: boto3 S3 client.
+        :param bucket_name: The name of the S3 bucket.
+        :param object_key: The key (name) of the object to download.
+        :param file_path: The local file path to save the object as.
+        :param part_size: Size of each range, for objects without part checksums.
+        :param max_workers: Number of concurrent Range GETs.
+        :param max_attempts: Attempts per range before it is reported as failed.
+        :param progress: Optional callable taking (bytes transferred, total bytes), called as each range completes.
+        """
+        self.client = client
+        self.bucket_name = bucket_name
+        self.object_key = object_key
+        self.file_path = file_path
+        self.state_path = file_path + S3_RANGED_STATE_SUFFIX
+        self.part_size = part_size
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+        self.progress = progress
+        self.size = None
+        self.etag = None
+        self.ranges = []
+        self.completed = set()
+        self.resumed_bytes = 0
+        self.transferred = 0
+        self.errors = {}
+        self.started_at = None
+        self.finished_at = None
+        self._stopped = False
+        self._lock = threading.Lock()
+
+    def _part_ranges(self):
+        # the object's parts with their checksums, or None if any part has no checksum we can compute
+        parts = []
+        params = {'Bucket': self.bucket_name, 'Key': self.object_key, 'ObjectAttributes': ['ObjectParts'],
+                  'MaxParts': 1000}
+        try:
+            while True:
+                response = self.client.get_object_attributes(**params)
+                object_parts = response.get('ObjectParts', {})
+                parts.extend(object_parts.get('Parts', []))
+                if not object_parts.get('IsTruncated'):
+                    break
+                params['PartNumberMarker'] = object_parts['NextPartNumberMarker']
+        except ClientError:
+            return None
+
+        ranges = []
+        start = 0
+        for part in sorted(parts, key=lambda part: part['PartNumber']):
+            name = next((name for name in PART_CHECKSUMS if part.get(name)), None)
+            if name is None:
+                return None
+            ranges.append((start, start + part['Size'] - 1, name, part[name]))
+            start += part['Size']
+        return ranges if ranges and start == self.size else None
+
+    def _plan(self):
+        head = self.client.head_object(Bucket=self.bucket_name, Key=self.object_key)
+        self.size = head['ContentLength']
+        self.etag = head['ETag']
+        self.ranges = self._part_ranges() or fixed_ranges(self.size, self.part_size)
+
+    def _load_state(self):
+        try:
+            with open(self.state_path) as file:
+                state = json.load(file)
+        except (OSError, ValueError):
+            return
+        if state.get('etag') == self.etag and state.get('size') == self.size \
+                and [list(byte_range) for byte_range in self.ranges] == state.get('ranges') \
+                and os.path.isfile(self.file_path) and os.path.getsize(self.file_path) == self.size:
+            self.completed = set(state.get('completed', []))
+            self.resumed_bytes = sum(self.ranges[index][1] - self.ranges[index][0] + 1 for index in self.completed)
+
+    def _save_state(self):
+        temporary_path = f"{self.state_path}.tmp"
+        with open(temporary_path, 'w') as file:
+            json.dump({'etag': self.etag, 'size': self.size, 'ranges': self.ranges,
+                       'completed': sorted(self.completed)}, file)
+        os.replace(temporary_path, self.state_path)
+
+    def _fetch_range(self, index, mapped, view):
+        start, end, checksum_name, checksum = self.ranges[index]
+        error = None
+        for attempt in range(self.max_attempts):
+            if self._stopped:
+                return
+            try:
+                response = self.client.get_object(Bucket=self.bucket_name, Key=self.object_key,
+                                                  Range=f"bytes={start}-{end}", IfMatch=self.etag)
+                body = response['Body']
+                with view[start:end + 1] as part:
+                    offset = 0
+                    while offset < len(part):
+                        with part[offset:] as rest:
+                            read = body.readinto(rest)
+                        if not read:
+                            raise IOError(f"Range {start}-{end} ended after {offset} bytes")
+                        offset += read
+                    if checksum_name and PART_CHECKSUMS[checksum_name](part) != checksum:
+                        raise IOError(f"Range {start}-{end} does not match its {checksum_name[8:]} checksum")
+                # write the range to disk before recording it, so a resumed download can trust it
+                aligned = start - start % mmap.ALLOCATIONGRANULARITY
+                mapped.flush(aligned, end + 1 - aligned)
+                with self._lock:
+                    self.completed.add(index)
+                    self.transferred += end - start + 1
+                    transferred = self.resumed_bytes + self.transferred
+                    self._save_state()
+                if self.progress is not None:
+                    self.progress(transferred, self.size)
+                return
+            except ClientError as e:
+                # the object changed since the download started (or since the state file was written)
+                if e.response.get('Error', {}).get('Code') in ('PreconditionFailed', '412'):
+                    self._stopped = True
+                    self.errors[index] = f"{self.object_key} changed during the download"
+                    return
+                error = e
+            except Exception as e:
+                error = e
+        self.errors[index] = str(error)
+
+    def run(self):
+        """
+        Plan the ranges, resume from the state file if it matches the object, and download the missing ranges.
+        The state file is removed once every range is complete.
+        :return: self, so a background job's result describes the download.
+        """
+        self.started_at = time.monotonic()
+        try:
+            self._plan()
+            self._load_state()
+            if self.size == 0:
+                open(self.file_path, 'wb').close()
+                return self
+
+            with open(self.file_path, 'r+b' if self.completed else 'w+b') as file:
+                file.truncate(self.size)
+                if not self.completed and hasattr(os, 'posix_fallocate'):
+                    os.posix_fallocate(file.fileno(), 0, self.size)
+                with mmap.mmap(file.fileno(), self.size) as mapped, memoryview(mapped) as view:
+                    with self._lock:
+                        self._save_state()
+                    missing = [index for index in range(len(self.ranges)) if index not in self.completed]
+                    if missing:
+                        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(missing))) as executor:
+                            for index in missing:
+                                executor.submit(self._fetch_range, index, mapped, view)
+            if len(self.completed) == len(self.ranges):
+                os.remove(self.state_path)
+        finally:
+            self.finished_at = time.monotonic()
+        return self
+
+    @property
+    def seconds(self):
+        """
+        :return: Seconds the download has taken so far.
+        """
+        if self.started_at is None:
+            return 0
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def bytes_per_second(self):
+        """
+        :return: Average throughput of this run of the download in bytes per second.
+        """
+        seconds = self.seconds
+        return self.transferred / seconds if seconds > 0 else 0
+
+    def summary(self):
+        """
+        Describe the progress of the download.
+        :return: Summary string.
+        """
+        if self.size is None:
+            return "Planning ranges"
+        done = self.resumed_bytes + self.transferred
+        text = (f"{done / MIB:.1f} of {self.size / MIB:.1f} MiB, {len(self.completed)}/{len(self.ranges)} ranges "
+                f"({self.bytes_per_second / MIB:.1f} MiB/s)")
+        if self.resumed_bytes:
+            text += f", {self.resumed_bytes / MIB:.1f} MiB resumed"
+        if self.errors:
+            text += f", {len(self.errors)} failed (run again to resume)"
+        return text
@@ -0,0 +1,250 @@
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.utils.config import S3_SYNC_MAX_WORKERS, S3_SYNC_MANIFEST_DIR, S3_DELETE_BATCH_SIZE
+from src.utils.list_utils import chunk_list
+
+UPLOAD = 'upload'
+DOWNLOAD = 'download'
+
+
+class SyncManifest:
+    def __init__(self, local_dir, bucket_name, prefix, manifest_dir: str = S3_SYNC_MANIFEST_DIR):
+        """
+        Local record of the size, modification time and ETag of each file last synced between a directory and a
+        bucket prefix, so unchanged files are recognised without reading or transferring them.
+        :param local_dir: Local directory of the sync.
+        :param bucket_name: Bucket of the sync.
+        :param prefix: Key prefix of the sync.
+        :param manifest_dir: Directory holding the manifest files.
+        """
+        name = hashlib.sha256(f"{os.path.abspath(local_dir)}\n{bucket_name}\n{prefix}".encode()).hexdigest()[:32]
+        self.path = os.path.join(os.path.expanduser(manifest_dir), f"{name}.json")
+        self.entries = {}
+        self._lock = threading.Lock()
+        try:
+            with open(self.path) as file:
+                self.entries = json.load(file)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def matches(self, relative_path, size, mtime_ns, etag):
+        """
+        :return: True if the file was last synced with this size, modification time and (if known) ETag.
+        """
+        entry = self.entries.get(relative_path)
+        return (entry is not None and entry['size'] == size and entry['mtime_ns'] == mtime_ns
+                and (entry['etag'] is None or entry['etag'] == etag))
+
+    def record(self, relative_path, size, mtime_ns, etag):
+        with self._lock:
+            self.entries[relative_path] = {'size': size, 'mtime_ns': mtime_ns, 'etag': etag}
+
+    def forget(self, relative_path):
+        with self._lock:
+            self.entries.pop(relative_path, None)
+
+    def save(self):
+        """
+        Write the manifest, replacing the previous one atomically.
+        :return: None
+        """
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temporary_path = f"{self.path}.tmp"
+        with self._lock, open(temporary_path, 'w') as file:
+            json.dump(self.entries, file)
+        os.replace(temporary_path, self.path)
+
+
+def walk_local_files(local_dir):
+    """
+    List the files under a directory.
+    :param local_dir: Directory to walk.
+    :return: dict of relative path (with '/' separators) to (size, modification time in ns).
+    """
+    files = {}
+    for root, _, names in os.walk(local_dir):
+        for name in names:
+            path = os.path.join(root, name)
+            stat = os.stat(path)
+            files[os.path.relpath(path, local_dir).replace(os.sep, '/')] = (stat.st_size, stat.st_mtime_ns)
+    return files
+
+
+def file_md5(path):
+    """
+    :return: Hex MD5 of a file, read in 1 MiB blocks.
+    """
+    digest = hashlib.md5()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class S3DirectorySync:
+    def __init__(self, s3_controller, local_dir, bucket_name, prefix: str = '', direction: str = UPLOAD,
+                 delete: bool = False, profile=None, max_workers: int = S3_SYNC_MAX_WORKERS,
+                 manifest_dir: str = S3_SYNC_MANIFEST_DIR):
+        """
+        Sync a local directory and a bucket prefix in one direction.
+        Files are compared by size, modification time and ETag against a local manifest, so only new and changed
+        files are transferred, on a thread pool. A file missing from the manifest whose size matches is compared by
+        MD5 with a single-part ETag before it is transferred again.
+        :param s3_controller: S3Controller of the bucket.
+        :param local_dir: Local directory.
+        :param bucket_name: Name of the bucket.
+        :param prefix: Key prefix the directory maps to (e.g., 'builds/web/').
+        :param direction: UPLOAD (directory to bucket) or DOWNLOAD (bucket to directory).
+        :param delete: If True, delete destination files or objects that are missing from the source; objects are
+            deleted in delete_objects batches.
+        :param profile: TransferProfile for each file transfer (default is the 'default' one).
+        :param max_workers: Maximum number of concurrent file transfers.
+        :param manifest_dir: Directory holding the manifest files.
+        """
+        if direction not in (UPLOAD, DOWNLOAD):
+            raise ValueError(f"Unsupported sync direction: {direction}")
+        if direction == UPLOAD and not os.path.isdir(local_dir):
+            # an empty source would make delete remove everything under the prefix
+            raise ValueError(f"Local directory does not exist: {local_dir}")
+        if prefix and not prefix.endswith('/'):
+            prefix += '/'
+        self.s3_controller = s3_controller
+        self.local_dir = local_dir
+        self.bucket_name = bucket_name
+        self.prefix = prefix
+        self.direction = direction
+        self.delete = delete
+        self.profile = profile
+        self.max_workers = max_workers
+        self.manifest = SyncManifest(local_dir, bucket_name, prefix, manifest_dir)
+        self.transferred = []
+        self.skipped = 0
+        self.deleted = []
+        self.errors = {}
+        self.pending = 0
+        self.bytes_transferred = 0
+        self._lock = threading.Lock()
+
+    def _local_path(self, relative_path):
+        path = os.path.normpath(os.path.join(self.local_dir, relative_path))
+        if os.path.commonpath([os.path.abspath(path), os.path.abspath(self.local_dir)]) != \
+                os.path.abspath(self.local_dir):
+            raise ValueError(f"Key resolves outside the local directory: {relative_path}")
+        return path
+
+    def _list_remote(self):
+        remote = {}
+        for record in self.s3_controller.list_objects(self.bucket_name, self.prefix):
+            relative_path = record.key[len(self.prefix):]
+            if relative_path and not relative_path.endswith('/'):
+                remote[relative_path] = (record.size, record.etag)
+        return remote
+
+    def _unchanged(self, relative_path, local, remote):
+        size, mtime_ns = local
+        remote_size, etag = remote
+        if size != remote_size:
+            return False
+        if self.manifest.matches(relative_path, size, mtime_ns, etag):
+            self.manifest.record(relative_path, size, mtime_ns, etag)
+            return True
+        # a single-part upload's ETag is the MD5 of the object
+        if '-' not in etag.strip('"') and file_md5(self._local_path(relative_path)) == etag.strip('"'):
+            self.manifest.record(relative_path, size, mtime_ns, etag)
+            return True
+        return False
+
+    def _transfer(self, relative_path, remote):
+        key = self.prefix + relative_path
+        path = self._local_path(relative_path)
+        if self.direction == UPLOAD:
+            self.s3_controller.upload_object(self.bucket_name, key, path, self.profile)
+            etag = None
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.s3_controller.download_file(self.bucket_name, key, path, self.profile)
+            etag = remote[1]
+        stat = os.stat(path)
+        self.manifest.record(relative_path, stat.st_size, stat.st_mtime_ns, etag)
+        with self._lock:
+            self.transferred.append(relative_path)
+            self.bytes_transferred += stat.st_size
+            self.pending -= 1
+
+    def _delete_extra(self, extra):
+        if self.direction == UPLOAD:
+            for chunk in chunk_list(sorted(extra), S3_DELETE_BATCH_SIZE):
+                errors = self.s3_controller.delete_keys(self.bucket_name, [self.prefix + path for path in chunk])
+                for relative_path in chunk:
+                    error = errors.get(self.prefix + relative_path)
+                    if error:
+                        self.errors[relative_path] = error
+                    else:
+                        self.deleted.append(relative_path)
+                        self.manifest.forget(relative_path)
+        else:
+            for relative_path in sorted(extra):
+                try:
+                    os.remove(self._local_path(relative_path))
+                    self.deleted.append(relative_path)
+                    self.manifest.forget(relative_path)
+                except Exception as e:
+                    self.errors[relative_path] = str(e)
+
+    def run(self):
+        """
+        List both sides, transfer new and changed files, optionally delete extra ones, and save the manifest.
+        :return: self, so a background job's result describes the sync.
+        """
+        if self.direction == UPLOAD and not os.path.isdir(self.local_dir):
+            raise ValueError(f"Local directory does not exist: {self.local_dir}")
+        local = walk_local_files(self.local_dir) if os.path.isdir(self.local_dir) else {}
+        remote = self._list_remote()
+        source, destination = (local, remote) if self.direction == UPLOAD else (remote, local)
+
+        changed = []
+        for relative_path in source:
+            if relative_path in local and relative_path in remote \
+                    and self._unchanged(relative_path, local[relative_path], remote[relative_path]):
+                self.skipped += 1
+            else:
+                changed.append(relative_path)
+        self.pending = len(changed)
+
+        try:
+            if changed:
+                with ThreadPoolExecutor(max_workers=min(self.max_workers, len(changed))) as executor:
+                    futures = {relative_path: executor.submit(self._transfer, relative_path, remote.get(relative_path))
+                               for relative_path in changed}
+                    for relative_path, future in futures.items():
+                        try:
+                            future.result()
+                        except Exception as e:
+                            self.errors[relative_path] = str(e)
+                            with self._lock:
+                                self.pending -= 1
+            if self.delete:
+                self._delete_extra(set(destination) - set(source))
+        finally:
+            self.manifest.save()
+        return self
+
+    def summary(self):
+        """
+        Describe the progress of the sync.
+        :return: Summary string.
+        """
+        verb = 'uploaded' if self.direction == UPLOAD else 'downloaded'
+        text = (f"{len(self.transferred)} {verb} ({self.bytes_transferred / (1024 * 1024):.1f} MiB), "
+                f"{self.skipped} unchanged")
+        if self.pending:
+            text += f", {self.pending} to go"
+        if self.delete:
+            text += f", {len(self.deleted)} deleted"
+        if self.errors:
+            text += f", {len(self.errors)} failed"
+        return text
@@ -0,0 +1,193 @@
+import threading
+import time
+from dataclasses import dataclass
+
+from boto3.s3.transfer import TransferConfig
+
+from src.utils.config import S3_MULTIPART_THRESHOLD_BYTES, S3_MULTIPART_CHUNK_SIZE_BYTES, S3_MAX_CONCURRENCY, \
+    S3_LARGE_MULTIPART_THRESHOLD_BYTES, S3_LARGE_MULTIPART_CHUNK_SIZE_BYTES, S3_LARGE_MAX_CONCURRENCY
+
+MIB = 1024 * 1024
+
+# S3 operations timed as one part of a transfer
+PART_OPERATIONS = ('PutObject', 'UploadPart', 'GetObject')
+
+
+@dataclass(frozen=True, slots=True)
+class TransferProfile:
+    multipart_threshold: int = S3_MULTIPART_THRESHOLD_BYTES
+    multipart_chunksize: int = S3_MULTIPART_CHUNK_SIZE_BYTES
+    max_concurrency: int = S3_MAX_CONCURRENCY
+    use_threads: bool = True
+
+    def transfer_config(self):
+        """
+        :return: boto3 TransferConfig with the profile's settings.
+        """
+        return TransferConfig(multipart_threshold=self.multipart_threshold,
+                              multipart_chunksize=self.multipart_chunksize,
+                              max_concurrency=self.max_concurrency,
+                              use_threads=self.use_threads)
+
+    def __str__(self):
+        return (f"threshold {self.multipart_threshold // MIB} MiB, parts {self.multipart_chunksize // MIB} MiB, "
+                f"{self.max_concurrency if self.use_threads else 1} concurrent")
+
+
+# named profiles offered by the S3 menu; 'large' suits multi-GB objects on fast hosts
+TRANSFER_PROFILES = {
+    'default': TransferProfile(),
+    'large': TransferProfile(S3_LARGE_MULTIPART_THRESHOLD_BYTES, S3_LARGE_MULTIPART_CHUNK_SIZE_BYTES,
+                             S3_LARGE_MAX_CONCURRENCY),
+    'single-threaded': TransferProfile(use_threads=False),
+}
+
+
+@dataclass(frozen=True, slots=True)
+class TransferPart:
+    operation: str
+    part: str
+    size: int
+    seconds: float
+
+    @property
+    def bytes_per_second(self):
+        return self.size / self.seconds if self.seconds > 0 else 0
+
+
+class _TimedBody:
+    def __init__(self, body, size, on_done):
+        """
+        Proxy of a GetObject streaming body that reports when the body has been read, so a ranged download part is
+        timed until its last byte arrives rather than until its headers do.
+        """
+        self._body = body
+        self._remaining = size
+        self._on_done = on_done
+
+    def read(self, *args, **kwargs):
+        data = self._body.read(*args, **kwargs)
+        if self._on_done is not None:
+            self._remaining -= len(data)
+            if not data or self._remaining <= 0:
+                self._on_done()
+                self._on_done = None
+        return data
+
+    def __getattr__(self, name):
+        return getattr(self._body, name)
+
+
+class TransferMonitor:
+    def __init__(self, total_bytes: int = None, progress=None):
+        """
+        Progress callback and timer of one S3 transfer.
+        Pass the monitor as the Callback of a boto3 transfer; while attached to the client it also times every part
+        (PutObject, UploadPart or ranged GetObject) of the transfer's object.
+        :param total_bytes: Size of the transfer, if known.
+        :param progress: Optional callable taking (bytes transferred, total bytes or None), called on each update.
+        """
+        self.total_bytes = total_bytes
+        self.progress = progress
+        self.transferred = 0
+        self.parts = []
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def __call__(self, bytes_amount):
+        with self._lock:
+            self.transferred += bytes_amount
+            transferred = self.transferred
+        if self.progress is not None:
+            self.progress(transferred, self.total_bytes)
+
+    def attach(self, client, bucket_name, object_key):
+        """
+        Time the parts of a transfer of an object through a client's event hooks; use as a context manager around
+        the transfer.
+        :param client: boto3 S3 client used by the transfer.
+        :param bucket_name: Bucket of the object.
+        :param object_key: Key of the object.
+        :return: Context manager that records the start and end of the transfer.
+        """
+        return _AttachedMonitor(self, client, bucket_name, object_key)
+
+    def _add_part(self, operation, part, size, started):
+        with self._lock:
+            self.parts.append(TransferPart(operation, part, size or 0, time.monotonic() - started))
+
+    @property
+    def seconds(self):
+        """
+        :return: Seconds the transfer has taken so far.
+        """
+        if self.started_at is None:
+            return 0
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def bytes_per_second(self):
+        """
+        :return: Average throughput of the transfer in bytes per second.
+        """
+        seconds = self.seconds
+        return self.transferred / seconds if seconds > 0 else 0
+
+    def summary(self):
+        """
+        Describe the throughput of the transfer and the timings of its parts.
+        :return: Summary string.
+        """
+        text = (f"{self.transferred / MIB:.1f} MiB in {self.seconds:.2f}s "
+                f"({self.bytes_per_second / MIB:.1f} MiB/s)")
+        parts = sorted(self.parts, key=lambda part: part.seconds)
+        if parts:
+            text += (f", {len(parts)} part(s): fastest {parts[0].seconds:.2f}s, "
+                     f"median {parts[len(parts) // 2].seconds:.2f}s, slowest {parts[-1].seconds:.2f}s "
+                     f"({parts[-1].bytes_per_second / MIB:.1f} MiB/s)")
+        return text
+
+
+class _AttachedMonitor:
+    def __init__(self, monitor, client, bucket_name, object_key):
+        self.monitor = monitor
+        self.events = client.meta.events
+        self.bucket_name = bucket_name
+        self.object_key = object_key
+        self.unique_id = f"transfer-monitor-{id(monitor)}"
+
+    def _before_parameter_build(self, params, context, **kwargs):
+        if params.get('Bucket') == self.bucket_name and params.get('Key') == self.object_key:
+            part = params.get('PartNumber') or params.get('Range') or 'whole'
+            size = len(params['Body']) if hasattr(params.get('Body'), '__len__') else None
+            context[self.unique_id] = (part, size, time.monotonic())
+
+    def _after_call(self, model, parsed, context, **kwargs):
+        timing = context.get(self.unique_id)
+        if timing is None:
+            return
+        part, size, started = timing
+        if model.name == 'GetObject' and 'Body' in parsed:
+            size = parsed.get('ContentLength')
+            parsed['Body'] = _TimedBody(parsed['Body'], size or 0, lambda: self.monitor._add_part(
+                model.name, part, size, started))
+        else:
+            self.monitor._add_part(model.name, part, size, started)
+
+    def __enter__(self):
+        for operation in PART_OPERATIONS:
+            self.events.register(f"before-parameter-build.s3.{operation}", self._before_parameter_build,
+                                 unique_id=f"{self.unique_id}-before-{operation}")
+            self.events.register(f"after-call.s3.{operation}", self._after_call,
+                                 unique_id=f"{self.unique_id}-after-{operation}")
+        self.monitor.started_at = time.monotonic()
+        return self.monitor
+
+    def __exit__(self, *exc_info):
+        self.monitor.finished_at = time.monotonic()
+        for operation in PART_OPERATIONS:
+            self.events.unregister(f"before-parameter-build.s3.{operation}",
+                                   unique_id=f"{self.unique_id}-before-{operation}")
+            self.events.unregister(f"after-call.s3.{operation}", unique_id=f"{self.unique_id}-after-{operation}")
+        return False
@@ -0,0 +1,170 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone, timedelta
+
+from src.utils.config import SNAPSHOT_DELETE_MAX_WORKERS, SNAPSHOT_DELETE_REQUESTS_PER_SECOND
+from src.utils.rate_limiter import RateLimiter
+
+
+@dataclass(frozen=True, slots=True)
+class RetentionPolicy:
+    keep_last: int = None
+    daily: int = None
+    weekly: int = None
+    monthly: int = None
+    max_age_days: int = None
+
+    @property
+    def has_count_rules(self):
+        """
+        :return: True if any keep-last or daily/weekly/monthly rule is set.
+        """
+        return any(value for value in (self.keep_last, self.daily, self.weekly, self.monthly))
+
+    @property
+    def is_empty(self):
+        """
+        :return: True if the policy has no rules, so it would keep every snapshot.
+        """
+        return not self.has_count_rules and not self.max_age_days
+
+    def __str__(self):
+        rules = [f"{name.replace('_', ' ')}={getattr(self, name)}"
+                 for name in ('keep_last', 'daily', 'weekly', 'monthly', 'max_age_days') if getattr(self, name)]
+        return ', '.join(rules) or 'keep everything'
+
+
+class RetentionPlan:
+    def __init__(self):
+        """
+        Snapshots to keep and to delete under a RetentionPolicy.
+        keep and delete are lists of snapshot records, newest first within each group;
+        reasons maps the ID of each kept snapshot to the rules that keep it.
+        """
+        self.keep = []
+        self.delete = []
+        self.reasons = {}
+        self.groups = 0
+
+
+class RetentionResult:
+    def __init__(self, plan: RetentionPlan, dry_run: bool):
+        """
+        Outcome of applying a RetentionPlan.
+        deleted lists the IDs deleted (empty on a dry run), errors maps snapshot ID to the exception raised.
+        :param plan: The applied RetentionPlan.
+        :param dry_run: True if nothing was deleted.
+        """
+        self.plan = plan
+        self.dry_run = dry_run
+        self.deleted = []
+        self.errors = {}
+
+    def summary(self, size_of=None):
+        """
+        Describe the result in one line.
+        :param size_of: Optional callable returning a snapshot record's size in GiB.
+        :return: Summary string.
+        """
+        verb = "Would delete" if self.dry_run else "Deleted"
+        count = len(self.plan.delete) if self.dry_run else len(self.deleted)
+        text = (f"{verb} {count} snapshot(s), kept {len(self.plan.keep)} across {self.plan.groups} group(s)"
+                f"{f', {len(self.errors)} failed' if self.errors else ''}")
+        if size_of is not None:
+            deleted_ids = None if self.dry_run else set(self.deleted)
+            size = sum(size_of(snapshot) or 0 for snapshot in self.plan.delete
+                       if deleted_ids is None or snapshot.id in deleted_ids)
+            text += f", {size} GiB {'to free' if self.dry_run else 'freed'}"
+        return text + "."
+
+
+def plan_retention(snapshots, policy: RetentionPolicy, group_key, created_at, now: datetime = None):
+    """
+    Split snapshots into those to keep and those to delete, in one pass over the snapshots sorted by group and age.
+    Within each group (e.g. a volume or DB instance), a snapshot is kept if it is one of the newest keep_last, or
+    the newest of one of the most recent daily/weekly/monthly periods that have snapshots (grandfather-father-son).
+    If no count rules are set every snapshot is kept. Kept snapshots older than max_age_days are then deleted,
+    unless keep_last keeps them, so each group keeps its newest keep_last snapshots whatever their age.
+    :param snapshots: Iterable of snapshot records.
+    :param policy: RetentionPolicy to apply.
+    :param group_key: Callable returning the group of a snapshot record.
+    :param created_at: Callable returning a snapshot record's creation datetime.
+    :param now: Current time for max_age_days (default is now, UTC).
+    :return: RetentionPlan
+    """
+    now = now or datetime.now(timezone.utc)
+    max_age = timedelta(days=policy.max_age_days) if policy.max_age_days else None
+    periods = [
+        ('daily', policy.daily, lambda time: time.date()),
+        ('weekly', policy.weekly, lambda time: time.isocalendar()[:2]),
+        ('monthly', policy.monthly, lambda time: (time.year, time.month)),
+    ]
+    periods = [period for period in periods if period[1]]
+
+    plan = RetentionPlan()
+    ordered = sorted(snapshots, key=lambda snapshot: (str(group_key(snapshot)), created_at(snapshot)), reverse=True)
+    group = object()
+    for snapshot in ordered:
+        if group_key(snapshot) != group:
+            group = group_key(snapshot)
+            plan.groups += 1
+            position = 0
+            last_periods = [None] * len(periods)
+            kept_periods = [0] * len(periods)
+
+        created = created_at(snapshot)
+        reasons = []
+        if policy.keep_last and position < policy.keep_last:
+            reasons.append('last')
+        for index, (name, limit, period_of) in enumerate(periods):
+            period = period_of(created)
+            if period != last_periods[index]:
+                last_periods[index] = period
+                if kept_periods[index] < limit:
+                    kept_periods[index] += 1
+                    reasons.append(name)
+        if not policy.has_count_rules:
+            reasons.append('all')
+        if max_age is not None and now - created > max_age and 'last' not in reasons:
+            reasons = []
+        position += 1
+
+        if reasons:
+            plan.keep.append(snapshot)
+            plan.reasons[snapshot.id] = reasons
+        else:
+            plan.delete.append(snapshot)
+    return plan
+
+
+def apply_retention(plan: RetentionPlan, delete_snapshot, dry_run: bool = True,
+                    max_workers: int = SNAPSHOT_DELETE_MAX_WORKERS,
+                    requests_per_second: float = SNAPSHOT_DELETE_REQUESTS_PER_SECOND):
+    """
+    Delete the snapshots a RetentionPlan marks for deletion, concurrently and under a rate limit.
+    :param plan: RetentionPlan to apply.
+    :param delete_snapshot: Callable taking a snapshot ID that deletes it.
+    :param dry_run: If True, only report what would be deleted.
+    :param max_workers: Maximum number of concurrent delete calls.
+    :param requests_per_second: Maximum delete calls started per second.
+    :return: RetentionResult
+    """
+    result = RetentionResult(plan, dry_run)
+    if dry_run or not plan.delete:
+        return result
+
+    rate_limiter = RateLimiter(requests_per_second)
+
+    def delete(snapshot_id):
+        rate_limiter.acquire()
+        delete_snapshot(snapshot_id)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(plan.delete))) as executor:
+        futures = {snapshot.id: executor.submit(delete, snapshot.id) for snapshot in plan.delete}
+        for snapshot_id, future in futures.items():
+            try:
+                future.result()
+                result.deleted.append(snapshot_id)
+            except Exception as e:
+                result.errors[snapshot_id] = e
+    return result
@@ -1,5 +1,14 @@
 from enum import Enum
 
+from src.utils.config import OPTION_SEARCH_LIMIT
+from src.utils.option_index import OptionIndex, OptionList, EXACT_MATCH, PREFIX_MATCH
+from src.utils.snapshot_retention import RetentionPolicy
+
+try:
+    import readline
+except ImportError:  # not available on Windows
+    readline = None
+
 
 class InputType(Enum):
     STRING = 1
@@ -9,20 +18,28 @@ class InputType(Enum):
 def get_user_input(prompt, input_type: InputType = InputType.STRING, default_value='', available_options: list = None):
     """
     Get user input from the console with validation and default value support.
+    String options are picked through an OptionIndex: the user can type an option, its number, or part of the option
+    or its labels (e.g., an instance's Name tag), and is shown the ranked matches if more than one option matches.
+    Where readline is available, Tab completes to the matching options.
     :param prompt: The prompt message to display to the user.
     :param input_type: The expected type of the input (STRING, INT).
     :param default_value: The default value to use if the user provides no input.
-    :param available_options: The list of valid options for the input.
+    :param available_options: The list of valid options for the input (an OptionList or OptionIndex adds labels).
     :return: The validated user input, or False if the operation was cancelled.
     """
     try:
+        picker = None
+        if available_options is not None and input_type == InputType.STRING:
+            picker = get_option_index(available_options)
+            available_options = picker
+
         full_prompt = prompt
         if default_value:
             full_prompt += f" [Default: {default_value}]"
         if available_options and not all(isinstance(option, int) for option in available_options):
             full_prompt += f" or input the number corresponding to one of the available options"
         full_prompt += " (type 'cancel' to cancel): "
-        response = input(full_prompt).strip() or default_value
+        response = _read_input(full_prompt, picker).strip() or default_value
 
         # Allow user to cancel the operation. check if response is string before checking as ints can't be .lower()
         if isinstance(response, str) and response.lower() == 'cancel':
@@ -37,6 +54,9 @@ def get_user_input(prompt, input_type: InputType = InputType.STRING, default_val
                 print("Invalid input. Expected an integer.")
                 return get_user_input(prompt, InputType.INT, default_value, available_options)
 
+        if picker is not None:
+            return _pick_option(picker, response, prompt, default_value)
+
         # Validate against available options if provided
         if available_options is not None and response not in available_options:
             try:
@@ -59,3 +79,127 @@ def get_user_input(prompt, input_type: InputType = InputType.STRING, default_val
     except Exception as e:
         print(f"An error occurred: {e}")
         return False
+
+
+def get_option_index(available_options):
+    """
+    Get the search index for a list of options, reusing the one built for an OptionList.
+    :param available_options: list, OptionList or OptionIndex.
+    :return: OptionIndex
+    """
+    if isinstance(available_options, OptionIndex):
+        return available_options
+    if isinstance(available_options, OptionList):
+        return available_options.option_index()
+    return OptionIndex(available_options)
+
+
+def _pick_option(picker, response, prompt, default_value):
+    selected = picker.resolve(response)
+    if selected is not None:
+        if str(selected) != str(response):
+            print(f"Selected option: {selected}")
+        return selected
+
+    # a single exact label match (e.g., a Name tag) or a single prefix match is taken as the choice
+    matches = picker.search(response)
+    exact_matches = [match for match in matches if match[0] == EXACT_MATCH]
+    if len(exact_matches) == 1 or (len(matches) == 1 and matches[0][0] <= PREFIX_MATCH):
+        option = (exact_matches or matches)[0][2]
+        print(f"Selected option: {picker.describe(option)}")
+        return option
+
+    if matches:
+        print(f"Options matching '{response}':")
+        for _, number, option in matches:
+            print(f"{number}. {picker.describe(option)}")
+    elif len(picker) <= OPTION_SEARCH_LIMIT:
+        print(f"Invalid input. Available options are: {', '.join(map(str, picker))}")
+    else:
+        print(f"Invalid input. No options match '{response}'.")
+    return get_user_input(prompt, InputType.STRING, default_value, picker)
+
+
+def _read_input(full_prompt, picker):
+    if readline is None or picker is None:
+        return input(full_prompt)
+
+    # complete whole lines so options containing spaces complete as one word
+    previous_completer = readline.get_completer()
+    previous_delims = readline.get_completer_delims()
+    readline.set_completer(picker.complete)
+    readline.set_completer_delims('')
+    readline.parse_and_bind('tab: complete')
+    try:
+        return input(full_prompt)
+    finally:
+        readline.set_completer(previous_completer)
+        readline.set_completer_delims(previous_delims)
+
+
+def parse_multi_selection(response, available_options: list):
+    """
+    Parse a comma-separated selection of options, each given by value (case-insensitive) or by its number in the list.
+    :param response: The user's input, e.g. 'i-123, 2, 5' or 'all'.
+    :param available_options: The list of valid options.
+    :return: List of selected options without duplicates, or None if any entry is invalid.
+    """
+    if response.strip().lower() == 'all':
+        return list(available_options)
+
+    picker = get_option_index(available_options)
+    selected = []
+    for entry in response.split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        option = picker.resolve(entry)
+        if option is None:
+            print(f"Invalid selection: {entry}")
+            return None
+        selected.append(option)
+    return list(dict.fromkeys(selected))
+
+
+def parse_tags(response):
+    """
+    Parse tags given as comma-separated key=value pairs.
+    :param response: The user's input, e.g. 'Name=web, env=prod', or 'none' for no tags.
+    :return: dict of tag key to value, empty for 'none', or None if any pair is invalid.
+    """
+    if response.strip().lower() == 'none':
+        return {}
+
+    tags = {}
+    for pair in response.split(','):
+        pair = pair.strip()
+        if not pair:
+            continue
+        key, separator, value = pair.partition('=')
+        if not separator or not key.strip():
+            print(f"Invalid tag: {pair}. Expected key=value.")
+            return None
+        tags[key.strip()] = value.strip()
+    return tags
+
+
+def get_retention_policy():
+    """
+    Prompt for the rules of a snapshot retention policy, where 0 turns a rule off.
+    :return: RetentionPolicy, or None if cancelled.
+    """
+    rules = {}
+    for name, prompt, default_value in (
+            ('keep_last', "Keep the newest N snapshots of each source (0 for none)", 3),
+            ('daily', "Keep the newest snapshot of each of the last N days with snapshots (0 for none)", 7),
+            ('weekly', "Keep the newest snapshot of each of the last N weeks with snapshots (0 for none)", 4),
+            ('monthly', "Keep the newest snapshot of each of the last N months with snapshots (0 for none)", 6),
+            ('max_age_days', "Delete snapshots older than N days unless kept as newest (0 for no limit)", 0)):
+        value = get_user_input(prompt, InputType.INT, default_value=default_value)
+        if value is False:
+            return None
+        if value < 0:
+            print("Invalid input. Expected 0 or a positive integer.")
+            return None
+        rules[name] = value or None
+    return RetentionPolicy(**rules)
@@ -0,0 +1,282 @@
+import json
+import math
+from dataclasses import dataclass
+from datetime import datetime, timezone, timedelta
+
+from src.utils.config import EBS_METRICS_NAMESPACE, RIGHTSIZE_LOOKBACK_DAYS, RIGHTSIZE_PERIOD_SECONDS, \
+    RIGHTSIZE_PERCENTILE, RIGHTSIZE_HEADROOM, RIGHTSIZE_QUEUE_LENGTH_THRESHOLD, RIGHTSIZE_MIN_CHANGE_RATIO, \
+    GP3_BASELINE_IOPS, GP3_BASELINE_THROUGHPUT_MIBPS, GP3_MAX_IOPS, GP3_MAX_THROUGHPUT_MIBPS, GP3_MAX_IOPS_PER_GIB, \
+    GP3_MAX_THROUGHPUT_PER_IOPS, IO_MIN_IOPS
+
+# metric key: (CloudWatch metric name, statistic)
+VOLUME_METRICS = {
+    'read_ops': ('VolumeReadOps', 'Sum'),
+    'write_ops': ('VolumeWriteOps', 'Sum'),
+    'read_bytes': ('VolumeReadBytes', 'Sum'),
+    'write_bytes': ('VolumeWriteBytes', 'Sum'),
+    'queue_length': ('VolumeQueueLength', 'Average'),
+}
+
+# maximum provisioned IOPS per GiB of io1 and io2 volumes
+IO_MAX_IOPS_PER_GIB = {'io1': 50, 'io2': 500}
+# max IOPS and MiB/s of io1/io2 volumes attached to non-Block Express instances
+IO_MAX_IOPS = 64000
+IO_MAX_THROUGHPUT_MIBPS = 1000
+
+MIB = 1024 * 1024
+
+
+@dataclass(frozen=True, slots=True)
+class VolumeUsage:
+    volume_id: str
+    samples: int
+    iops: dict
+    throughput: dict
+    queue_length: dict
+
+
+@dataclass(frozen=True, slots=True)
+class VolumeRecommendation:
+    volume_id: str
+    size: int
+    current_type: str
+    current_iops: int
+    current_throughput: int
+    target_type: str
+    target_iops: int
+    target_throughput: int
+    reason: str
+    usage: VolumeUsage = None
+
+    @property
+    def changes(self):
+        """
+        modify_volume parameters that apply the recommendation, ready for EBSController.apply_volume_modifications.
+        :return: dict such as {'VolumeType': 'gp3', 'Iops': 3000, 'Throughput': 125}.
+        """
+        changes = {'VolumeType': self.target_type}
+        if self.target_type in ('gp3', 'io1', 'io2'):
+            changes['Iops'] = self.target_iops
+        if self.target_type == 'gp3':
+            changes['Throughput'] = self.target_throughput
+        return changes
+
+    def to_dict(self):
+        """
+        :return: JSON-serialisable dict of the recommendation and the usage it is based on.
+        """
+        return {
+            'VolumeId': self.volume_id,
+            'Size': self.size,
+            'CurrentVolumeType': self.current_type,
+            'CurrentIops': self.current_iops,
+            'CurrentThroughput': self.current_throughput,
+            'Changes': self.changes,
+            'Reason': self.reason,
+            'Samples': self.usage.samples if self.usage else 0,
+        }
+
+    def __str__(self):
+        current = f"{self.current_type} {self.current_iops or '-'} IOPS {self.current_throughput or '-'} MiB/s"
+        target = f"{self.target_type} {self.target_iops} IOPS {self.target_throughput} MiB/s"
+        return f"{self.volume_id} ({self.size} GiB): {current} -> {target}. {self.reason}"
+
+
+def percentiles(values, percents):
+    """
+    Nearest-rank percentiles of a series, all computed from a single sort.
+    :param values: Iterable of numbers.
+    :param percents: Percentiles to compute (0-100).
+    :return: dict of percentile to value (0 for an empty series).
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return {percent: 0 for percent in percents}
+    last = len(ordered) - 1
+    return {percent: ordered[min(last, max(0, math.ceil(percent / 100 * len(ordered)) - 1))] for percent in percents}
+
+
+def volume_capability(volume):
+    """
+    Approximate IOPS and throughput a volume can sustain with its current type and settings.
+    :param volume: VolumeRecord
+    :return: Tuple of (IOPS, MiB/s), or None for types without a performance model (st1, sc1, standard).
+    """
+    if volume.volume_type == 'gp2':
+        return min(max(3 * volume.size, 100), GP3_MAX_IOPS), 128 if volume.size <= 170 else 250
+    if volume.volume_type == 'gp3':
+        return volume.iops or GP3_BASELINE_IOPS, volume.throughput or GP3_BASELINE_THROUGHPUT_MIBPS
+    if volume.volume_type in IO_MAX_IOPS_PER_GIB:
+        iops = volume.iops or IO_MIN_IOPS
+        return iops, min(iops * GP3_MAX_THROUGHPUT_PER_IOPS, IO_MAX_THROUGHPUT_MIBPS)
+    return None
+
+
+def collect_volume_usage(cw_controller, volume_ids, start_time: datetime, end_time: datetime,
+                         period: int = RIGHTSIZE_PERIOD_SECONDS, percent: int = RIGHTSIZE_PERCENTILE):
+    """
+    Get the I/O history of many volumes with batched get_metric_data calls and summarise it into percentiles.
+    Read and write operations and bytes are added per period, then divided by the period into IOPS and MiB/s.
+    :param cw_controller: CloudWatchController of the volumes' region.
+    :param volume_ids: IDs of the EBS volumes.
+    :param start_time: Start of the history.
+    :param end_time: End of the history.
+    :param period: Seconds per data point.
+    :param percent: Percentile used for sizing, reported along with p50 and the maximum.
+    :return: dict of volume ID to VolumeUsage.
+    """
+    volume_ids = list(dict.fromkeys(volume_ids))
+    queries = [{
+        'Id': f"v{index}_{key}",
+        'MetricStat': {
+            'Metric': {'Namespace': EBS_METRICS_NAMESPACE, 'MetricName': metric_name,
+                       'Dimensions': [{'Name': 'VolumeId', 'Value': volume_id}]},
+            'Period': period,
+            'Stat': statistic
+        },
+        'ReturnData': True
+    } for index, volume_id in enumerate(volume_ids) for key, (metric_name, statistic) in VOLUME_METRICS.items()]
+    data = cw_controller.get_metric_data(queries, start_time, end_time) if queries else {}
+
+    percents = sorted({50, percent, 100})
+    usage = {}
+    for index, volume_id in enumerate(volume_ids):
+        ops, throughput = {}, {}
+        for key in ('read_ops', 'write_ops'):
+            for timestamp, value in data.get(f"v{index}_{key}", ()):
+                ops[timestamp] = ops.get(timestamp, 0) + value / period
+        for key in ('read_bytes', 'write_bytes'):
+            for timestamp, value in data.get(f"v{index}_{key}", ()):
+                throughput[timestamp] = throughput.get(timestamp, 0) + value / period / MIB
+        queue_length = [value for _, value in data.get(f"v{index}_queue_length", ())]
+        usage[volume_id] = VolumeUsage(volume_id, len(ops), percentiles(ops.values(), percents),
+                                       percentiles(throughput.values(), percents),
+                                       percentiles(queue_length, percents))
+    return usage
+
+
+def _changed(current, target):
+    return current is None or abs(target - current) > RIGHTSIZE_MIN_CHANGE_RATIO * max(current, 1)
+
+
+def recommend_volume(volume, usage: VolumeUsage = None, percent: int = RIGHTSIZE_PERCENTILE,
+                     headroom: float = RIGHTSIZE_HEADROOM,
+                     queue_length_threshold: float = RIGHTSIZE_QUEUE_LENGTH_THRESHOLD):
+    """
+    Propose the volume type, IOPS and throughput that cover a volume's usage at the sizing percentile plus headroom.
+    gp2 and magnetic volumes move to gp3 (at least the gp3 baseline, which is cheaper per GiB); gp3 and io1 volumes
+    are resized within gp3 when it can serve the load, otherwise io1/io2 IOPS are resized. A volume whose queue length
+    stays above the threshold while near its current limit is sized above that limit. st1 and sc1 volumes are skipped.
+    Without usage data, gp2 volumes move to gp3 with the same baseline performance.
+    :param volume: VolumeRecord
+    :param usage: VolumeUsage of the volume, or None if it has no history.
+    :param percent: Percentile of the usage to size for.
+    :param headroom: Factor added on top of the sized usage (e.g., 1.2 for 20%).
+    :param queue_length_threshold: Queue length above which a volume at its limit counts as under-provisioned.
+    :return: VolumeRecommendation, or None if the volume is already right-sized or cannot be sized.
+    """
+    capability = volume_capability(volume)
+    if volume.volume_type in ('st1', 'sc1') or (volume.volume_type == 'standard' and not usage):
+        return None
+    if not usage or not usage.samples:
+        if volume.volume_type != 'gp2':
+            return None
+        usage = None
+        needed_iops, needed_throughput = capability
+        reasons = ["no usage history, gp3 with the gp2 baseline"]
+    else:
+        needed_iops = math.ceil(usage.iops[percent] * headroom)
+        needed_throughput = math.ceil(usage.throughput[percent] * headroom)
+        reasons = [f"p{percent} {usage.iops[percent]:.0f} IOPS, {usage.throughput[percent]:.1f} MiB/s"]
+        if capability and usage.queue_length[percent] > queue_length_threshold:
+            current_iops, current_throughput = capability
+            if usage.iops[percent] >= 0.9 * current_iops:
+                needed_iops = max(needed_iops, math.ceil(current_iops * headroom))
+            if usage.throughput[percent] >= 0.9 * current_throughput:
+                needed_throughput = max(needed_throughput, math.ceil(current_throughput * headroom))
+            reasons.append(f"queue length {usage.queue_length[percent]:.2f} at the current limit")
+
+    # gp3 unless the load needs more than gp3 can provision, or the volume is io2 (kept for its durability)
+    iops = max(needed_iops, GP3_BASELINE_IOPS, math.ceil(needed_throughput / GP3_MAX_THROUGHPUT_PER_IOPS)
+               if needed_throughput > GP3_BASELINE_THROUGHPUT_MIBPS else 0)
+    # the per-GiB limit only caps IOPS provisioned above the baseline, which every gp3 volume gets whatever its size
+    gp3_max_iops = max(GP3_BASELINE_IOPS, min(GP3_MAX_IOPS, GP3_MAX_IOPS_PER_GIB * volume.size))
+    fits_gp3 = iops <= gp3_max_iops and needed_throughput <= GP3_MAX_THROUGHPUT_MIBPS
+    if volume.volume_type != 'io2' and fits_gp3:
+        target_type = 'gp3'
+        target_iops = iops
+        target_throughput = max(needed_throughput, GP3_BASELINE_THROUGHPUT_MIBPS)
+    else:
+        target_type = volume.volume_type if volume.volume_type in IO_MAX_IOPS_PER_GIB else 'io2'
+        target_iops = min(max(needed_iops, math.ceil(needed_throughput / GP3_MAX_THROUGHPUT_PER_IOPS), IO_MIN_IOPS),
+                          IO_MAX_IOPS_PER_GIB[target_type] * volume.size, IO_MAX_IOPS)
+        target_throughput = min(target_iops * GP3_MAX_THROUGHPUT_PER_IOPS, IO_MAX_THROUGHPUT_MIBPS)
+        if target_iops < needed_iops:
+            reasons.append(f"needs {needed_iops} IOPS, more than the volume size allows")
+            # a small volume gets more IOPS from the gp3 baseline than from io1/io2 at their per-GiB limit
+            if volume.volume_type != 'io2' and target_iops <= gp3_max_iops \
+                    and needed_throughput <= GP3_MAX_THROUGHPUT_MIBPS:
+                target_type = 'gp3'
+                target_iops = gp3_max_iops
+                target_throughput = min(max(needed_throughput, GP3_BASELINE_THROUGHPUT_MIBPS),
+                                        target_iops * GP3_MAX_THROUGHPUT_PER_IOPS)
+
+    if target_type == volume.volume_type:
+        current_iops, current_throughput = capability
+        if not _changed(current_iops, target_iops) and (target_type != 'gp3'
+                                                        or not _changed(current_throughput, target_throughput)):
+            return None
+        reasons.append("under-provisioned" if target_iops > current_iops
+                       or target_throughput > current_throughput else "over-provisioned")
+    elif target_type == 'gp3':
+        reasons.append(f"gp3 costs less than {volume.volume_type}")
+
+    return VolumeRecommendation(volume.id, volume.size, volume.volume_type, volume.iops, volume.throughput,
+                                target_type, target_iops, int(target_throughput), '; '.join(reasons), usage)
+
+
+def recommend_volumes(ebs_controller, cw_controller, volume_ids: list = None, volume_types: list = None,
+                      lookback_days: int = RIGHTSIZE_LOOKBACK_DAYS, period: int = RIGHTSIZE_PERIOD_SECONDS,
+                      percent: int = RIGHTSIZE_PERCENTILE, headroom: float = RIGHTSIZE_HEADROOM):
+    """
+    Recommend a volume type, IOPS and throughput for in-use volumes from their CloudWatch I/O history.
+    :param ebs_controller: EBSController of the region.
+    :param cw_controller: CloudWatchController of the same region.
+    :param volume_ids: Only recommend for these volumes (default is every in-use volume).
+    :param volume_types: Only recommend for volumes of these types (e.g., ['gp2']).
+    :param lookback_days: Days of history to size for.
+    :param period: Seconds per data point.
+    :param percent: Percentile of the usage to size for.
+    :param headroom: Factor added on top of the sized usage.
+    :return: List of VolumeRecommendation, for the volumes that should change.
+    """
+    volumes = ebs_controller.list_existing_volumes(states=['in-use'], volume_types=volume_types)
+    if volume_ids is not None:
+        volume_ids = set(volume_ids)
+        volumes = [volume for volume in volumes if volume.id in volume_ids]
+    end_time = datetime.now(timezone.utc)
+    usage = collect_volume_usage(cw_controller, [volume.id for volume in volumes],
+                                 end_time - timedelta(days=lookback_days), end_time, period, percent)
+    recommendations = (recommend_volume(volume, usage.get(volume.id), percent, headroom) for volume in volumes)
+    return [recommendation for recommendation in recommendations if recommendation]
+
+
+def export_recommendations(recommendations, path):
+    """
+    Write recommendations to a JSON file that load_recommendations can read back for a bulk modification.
+    :param recommendations: List of VolumeRecommendation.
+    :param path: Path of the JSON file.
+    :return: None
+    """
+    with open(path, 'w') as file:
+        json.dump([recommendation.to_dict() for recommendation in recommendations], file, indent=2)
+
+
+def load_recommendations(path):
+    """
+    Read the changes of exported recommendations.
+    :param path: Path of a JSON file written by export_recommendations.
+    :return: dict of volume ID to modify_volume parameters, for EBSController.apply_volume_modifications.
+    """
+    with open(path) as file:
+        return {entry['VolumeId']: entry['Changes'] for entry in json.load(file)}
@@ -0,0 +1,331 @@
+import threading
+import time
+from concurrent.futures import Future
+
+from botocore.exceptions import ClientError, ConnectionError as BotocoreConnectionError, HTTPClientError
+
+from src.utils.config import WAITER_MIN_DELAY_SECONDS, WAITER_MAX_DELAY_SECONDS, WAITER_BACKOFF_FACTOR, \
+    WAITER_DEFAULT_TIMEOUT_SECONDS
+from src.utils.list_utils import chunk_list
+
+# state reported for resources the describe call no longer returns
+DELETED_STATE = 'deleted'
+
+# describe error codes worth polling again; any other client error (e.g., AccessDenied) fails the waits at once
+THROTTLING_ERROR_CODES = {'Throttling', 'ThrottlingException', 'RequestLimitExceeded', 'TooManyRequestsException',
+                          'RequestThrottled', 'RequestThrottledException', 'SlowDown'}
+
+
+def is_transient_error(error):
+    """
+    Tell whether a failed AWS call is worth retrying: throttling, server errors and network failures (e.g., a
+    connection reset or read timeout).
+    :param error: Exception raised by a boto3 call.
+    :return: True if the call may succeed when retried.
+    """
+    if isinstance(error, ClientError):
+        status = error.response.get('ResponseMetadata', {}).get('HTTPStatusCode') or 0
+        return error.response.get('Error', {}).get('Code') in THROTTLING_ERROR_CODES or status >= 500
+    return isinstance(error, (BotocoreConnectionError, HTTPClientError, OSError))
+
+
+class WaitError(Exception):
+    def __init__(self, resource_id, state, message):
+        """
+        Raised by a wait future when the resource reaches a failure state or the wait times out.
+        :param resource_id: ID of the resource being waited on.
+        :param state: Last state seen for the resource (None if it was never seen).
+        :param message: Error message.
+        """
+        super().__init__(message)
+        self.resource_id = resource_id
+        self.state = state
+
+
+def _describe_ec2_instances(client, ids):
+    states = {}
+    for page in client.get_paginator('describe_instances').paginate(
+            Filters=[{'Name': 'instance-id', 'Values': ids}]):
+        for reservation in page['Reservations']:
+            for instance in reservation['Instances']:
+                states[instance['InstanceId']] = instance['State']['Name']
+    return states
+
+
+def _describe_ebs_volumes(client, ids):
+    states = {}
+    for page in client.get_paginator('describe_volumes').paginate(Filters=[{'Name': 'volume-id', 'Values': ids}]):
+        for volume in page['Volumes']:
+            states[volume['VolumeId']] = volume['State']
+    return states
+
+
+def _describe_ebs_snapshots(client, ids):
+    states = {}
+    for page in client.get_paginator('describe_snapshots').paginate(
+            Filters=[{'Name': 'snapshot-id', 'Values': ids}]):
+        for snapshot in page['Snapshots']:
+            states[snapshot['SnapshotId']] = snapshot['State']
+    return states
+
+
+def _describe_fast_snapshot_restores(client, ids):
+    # IDs are fast_restore_id() pairs, since fast snapshot restore is enabled per snapshot and Availability Zone
+    snapshot_ids = sorted({resource_id.split(':')[0] for resource_id in ids})
+    states = {}
+    for page in client.get_paginator('describe_fast_snapshot_restores').paginate(
+            Filters=[{'Name': 'snapshot-id', 'Values': snapshot_ids}]):
+        for fast_restore in page['FastSnapshotRestores']:
+            states[fast_restore_id(fast_restore['SnapshotId'], fast_restore['AvailabilityZone'])] = \
+                fast_restore['State']
+    return states
+
+
+def fast_restore_id(snapshot_id, availability_zone):
+    """
+    Build the ID used to wait for fast snapshot restore of a snapshot in an Availability Zone.
+    :param snapshot_id: ID of the EBS snapshot.
+    :param availability_zone: Availability Zone name.
+    :return: String such as 'snap-123:us-east-1a'.
+    """
+    return f"{snapshot_id}:{availability_zone}"
+
+
+def _describe_rds_instances(client, ids):
+    states = {}
+    for page in client.get_paginator('describe_db_instances').paginate(
+            Filters=[{'Name': 'db-instance-id', 'Values': ids}]):
+        for db_instance in page['DBInstances']:
+            states[db_instance['DBInstanceIdentifier']] = db_instance['DBInstanceStatus']
+    return states
+
+
+def _describe_rds_snapshots(client, ids):
+    states = {}
+    for page in client.get_paginator('describe_db_snapshots').paginate(
+            Filters=[{'Name': 'db-snapshot-id', 'Values': ids}]):
+        for db_snapshot in page['DBSnapshots']:
+            states[db_snapshot['DBSnapshotIdentifier']] = db_snapshot['Status']
+    return states
+
+
+# resource kind -> batched describe function, IDs per call and failure states per target state
+WAIT_TARGETS = {
+    'ec2_instance': {
+        'describe': _describe_ec2_instances,
+        'chunk_size': 200,
+        'failure_states': {'running': ('shutting-down', 'terminated'), 'stopped': ('terminated',)}
+    },
+    'ebs_volume': {
+        'describe': _describe_ebs_volumes,
+        'chunk_size': 200,
+        'failure_states': {'available': ('error', 'deleted'), 'in-use': ('error', 'deleted')}
+    },
+    'ebs_snapshot': {
+        'describe': _describe_ebs_snapshots,
+        'chunk_size': 200,
+        'failure_states': {'completed': ('error',)}
+    },
+    'ebs_fast_snapshot_restore': {
+        'describe': _describe_fast_snapshot_restores,
+        'chunk_size': 200,
+        'failure_states': {'enabled': ('disabling', 'disabled')}
+    },
+    'rds_instance': {
+        'describe': _describe_rds_instances,
+        'chunk_size': 100,
+        'failure_states': {'available': ('failed', 'incompatible-parameters', 'incompatible-restore',
+                                         'inaccessible-encryption-credentials')}
+    },
+    'rds_snapshot': {
+        'describe': _describe_rds_snapshots,
+        'chunk_size': 100,
+        'failure_states': {'available': ('failed', 'error')}
+    },
+}
+
+
+class _PendingWait:
+    __slots__ = ('resource_id', 'target_state', 'future', 'deadline', 'last_state')
+
+    def __init__(self, resource_id, target_state, deadline):
+        self.resource_id = resource_id
+        self.target_state = target_state
+        self.future = Future()
+        self.deadline = deadline
+        self.last_state = None
+
+
+class WaiterMultiplexer:
+    def __init__(self, min_delay: float = WAITER_MIN_DELAY_SECONDS, max_delay: float = WAITER_MAX_DELAY_SECONDS,
+                 backoff_factor: float = WAITER_BACKOFF_FACTOR):
+        """
+        Central polling scheduler for resources waiting to reach a state.
+        Waits are grouped by resource kind and client (i.e. API and region), and every tick issues one batched
+        describe call per group for all of its pending IDs. A group's delay starts at min_delay, grows by
+        backoff_factor while nothing changes (and doubles when the describe call is throttled or fails, e.g. on a
+        network error) up to max_delay, and resets when a state changes or a new wait joins the group. Describe calls
+        that are throttled or fail with a server or network error are retried until each wait's deadline; any other
+        error (e.g., AccessDenied) fails the group's waits straight away.
+        :param min_delay: Shortest delay between polls of a group, in seconds.
+        :param max_delay: Longest delay between polls of a group, in seconds.
+        :param backoff_factor: Delay multiplier applied after a poll with no state change.
+        """
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.backoff_factor = backoff_factor
+        self.describe_calls = 0
+        self._groups = {}
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def wait_for(self, client, kind, resource_id, target_state, timeout: float = WAITER_DEFAULT_TIMEOUT_SECONDS):
+        """
+        Register a wait and return a future that resolves when the resource reaches target_state.
+        :param client: boto3 client to poll with (EC2 client for EC2/EBS kinds, RDS client for RDS kinds).
+        :param kind: Resource kind, one of WAIT_TARGETS ('ec2_instance', 'ebs_volume', 'ebs_snapshot',
+        'ebs_fast_snapshot_restore', 'rds_instance', 'rds_snapshot').
+        :param resource_id: ID of the resource to wait for.
+        :param target_state: State to wait for; DELETED_STATE also matches once the resource is no longer returned.
+        :param timeout: Seconds before the future fails with WaitError.
+        :return: concurrent.futures.Future resolving to the final state, or raising WaitError.
+        """
+        if kind not in WAIT_TARGETS:
+            raise ValueError(f"Unsupported resource kind for waiting: {kind}")
+
+        now = time.monotonic()
+        wait = _PendingWait(resource_id, target_state, now + timeout)
+        with self._condition:
+            group = self._groups.get((kind, client))
+            if group is None:
+                group = {'waits': {}, 'delay': self.min_delay, 'next_poll': now + self.min_delay}
+                self._groups[(kind, client)] = group
+            group['waits'].setdefault(resource_id, []).append(wait)
+            group['delay'] = self.min_delay
+            group['next_poll'] = min(group['next_poll'], now + self.min_delay)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='waiter-multiplexer', daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        return wait.future
+
+    def wait_all(self, futures):
+        """
+        Block until every future has resolved.
+        :param futures: dict of resource ID to future returned by wait_for.
+        :return: dict of resource ID to final state; for failed or timed-out waits, the last state seen.
+        """
+        states = {}
+        for resource_id, future in futures.items():
+            try:
+                states[resource_id] = future.result()
+            except WaitError as e:
+                states[resource_id] = e.state
+        return states
+
+    def pending_count(self):
+        """
+        Get the number of waits not resolved yet.
+        :return: int
+        """
+        with self._condition:
+            return sum(len(waits) for group in self._groups.values() for waits in group['waits'].values())
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._groups:
+                    self._condition.wait()
+                now = time.monotonic()
+                due = [(key, list(group['waits'])) for key, group in self._groups.items()
+                       if group['next_poll'] <= now]
+                if not due:
+                    self._condition.wait(min(group['next_poll'] for group in self._groups.values()) - now)
+                    continue
+
+            for key, resource_ids in due:
+                self._poll(key, resource_ids)
+
+    def _poll(self, key, resource_ids):
+        kind, client = key
+        target = WAIT_TARGETS[kind]
+
+        states = {}
+        error = None
+        for chunk in chunk_list(resource_ids, target['chunk_size']):
+            try:
+                self.describe_calls += 1
+                states.update(target['describe'](client, chunk))
+            except Exception as e:
+                error = e
+                break
+        permanent = error is not None and not is_transient_error(error)
+
+        with self._condition:
+            group = self._groups[key]
+            changed = False
+            now = time.monotonic()
+            for resource_id in resource_ids:
+                remaining = []
+                for wait in group['waits'].get(resource_id, []):
+                    if permanent:
+                        wait.future.set_exception(
+                            WaitError(resource_id, wait.last_state,
+                                      f"Could not poll {resource_id} while waiting for '{wait.target_state}': "
+                                      f"{error}"))
+                        continue
+                    if error is not None:
+                        # retried until the waits' deadlines
+                        if now >= wait.deadline:
+                            wait.future.set_exception(
+                                WaitError(resource_id, wait.last_state,
+                                          f"Timed out waiting for {resource_id} to reach '{wait.target_state}' "
+                                          f"(last state: {wait.last_state}, last error: {error})"))
+                        else:
+                            remaining.append(wait)
+                        continue
+
+                    failure_states = target['failure_states'].get(wait.target_state, ())
+                    state = states.get(resource_id)
+                    # a resource seen before and no longer returned has been deleted; one never seen may not be
+                    # visible to describe calls yet
+                    if state is None and (wait.target_state == DELETED_STATE or
+                                          (DELETED_STATE in failure_states and wait.last_state is not None)):
+                        state = DELETED_STATE
+                    if state != wait.last_state:
+                        changed = True
+                        wait.last_state = state
+
+                    if state == wait.target_state:
+                        wait.future.set_result(state)
+                    elif state in failure_states:
+                        wait.future.set_exception(
+                            WaitError(resource_id, state, f"{resource_id} entered failure state '{state}' "
+                                                          f"while waiting for '{wait.target_state}'"))
+                    elif now >= wait.deadline:
+                        wait.future.set_exception(
+                            WaitError(resource_id, state, f"Timed out waiting for {resource_id} to reach "
+                                                          f"'{wait.target_state}' (last state: {state})"))
+                    else:
+                        remaining.append(wait)
+
+                if remaining:
+                    group['waits'][resource_id] = remaining
+                else:
+                    group['waits'].pop(resource_id, None)
+
+            if not group['waits']:
+                del self._groups[key]
+                return
+
+            if error is not None:
+                group['delay'] = min(group['delay'] * 2, self.max_delay)
+            elif changed:
+                group['delay'] = self.min_delay
+            else:
+                group['delay'] = min(group['delay'] * self.backoff_factor, self.max_delay)
+            group['next_poll'] = now + group['delay']
+
+
+# shared by every controller in the process
+waiter_multiplexer = WaiterMultiplexer()
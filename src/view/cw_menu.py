@@ -5,6 +5,7 @@ from src.controller.EC2Controller import EC2Controller
 from src.model.Resources import Resource
 from src.utils.config import DATETIME_FORMAT, DATETIME_COMPACT_FORMAT, DEFAULT_NAMESPACE
 from src.utils.list_utils import list_ec2_instances, EC2ListType, list_ordered_list
+from src.utils.option_index import OptionList
 from src.utils.user_input_handler import get_user_input, InputType
 from src.view.AbstractMenu import AbstractMenu
 
@@ -116,8 +117,9 @@ class CloudWatchMenu(AbstractMenu):
         print("EC2 Instances with existing DiskWriteBytes alarms:", alarmed_instances)
 
         ec2_instances = list_ec2_instances(self.ec2_controller, list_type=EC2ListType.ALL, skip_print=True)
+        all_instances = ec2_instances[EC2ListType.ALL]
         ec2_instances[EC2ListType.ALL] = list_ordered_list(
-            [inst for inst in ec2_instances[EC2ListType.ALL] if inst not in alarmed_instances],
+            OptionList([inst for inst in all_instances if inst not in alarmed_instances], all_instances.labels),
             "Available EC2 Instances for Alarm Setup:")
         if not ec2_instances[EC2ListType.ALL]:
             print("No EC2 instances available to set alarms.")
@@ -1,10 +1,16 @@
+from src.controller.CloudWatchController import CloudWatchController
 from src.controller.EBSController import EBSController
 from src.controller.EC2Controller import EC2Controller, EC2ListType
 from src.model.Resources import Resource
 from src.utils.config import DEFAULT_VOLUME_SIZE_GIB, DEFAULT_VOLUME_TYPE, DEFAULT_DEVICE_NAME, \
-    DEFAULT_AVAILABILITY_ZONE
+    DEFAULT_AVAILABILITY_ZONE, DEFAULT_SNAPSHOT_NAME, RIGHTSIZE_LOOKBACK_DAYS
+from src.utils.job_tracker import job_tracker
 from src.utils.list_utils import list_ec2_instances, list_ordered_list
-from src.utils.user_input_handler import get_user_input, InputType
+from src.utils.option_index import OptionList
+from src.utils.region_scanner import get_enabled_regions
+from src.utils.user_input_handler import get_user_input, parse_multi_selection, parse_tags, get_retention_policy, \
+    InputType
+from src.utils.volume_rightsizing import recommend_volumes, export_recommendations, load_recommendations
 from src.view.AbstractMenu import AbstractMenu
 
 
@@ -21,7 +27,14 @@ class EBSMenu(AbstractMenu):
              8: "Take snapshot of volume",
              9: "Create volume from snapshot",
              10: "Delete snapshot",
-             11: "Main menu",
+             11: "List unattached volumes",
+             12: "Snapshot all volumes of instances",
+             13: "Prune snapshots by retention policy",
+             14: "Restore volumes from multiple snapshots",
+             15: "Modify multiple volumes (size, type, IOPS, throughput)",
+             16: "Recommend volume types, IOPS and throughput from CloudWatch metrics",
+             17: "Copy snapshots to other regions",
+             18: "Main menu",
              99: "Exit"}
         super().__init__("EBS Menu", ebs_menu_options)
 
@@ -32,6 +45,7 @@ class EBSMenu(AbstractMenu):
         ec2_client = res.ec2_client()
         self.ebs_controller = EBSController(ec2, ec2_client)
         self.ec2_controller = EC2Controller(ec2, ec2_client)
+        self.cw_controller = CloudWatchController(res.cw_client())
 
     def execute_choice(self, choice):
         if choice == 1:
@@ -55,6 +69,20 @@ class EBSMenu(AbstractMenu):
         elif choice == 10:
             self.delete_snapshot()
         elif choice == 11:
+            self.list_unattached_volumes()
+        elif choice == 12:
+            self.snapshot_instances()
+        elif choice == 13:
+            self.prune_snapshots()
+        elif choice == 14:
+            self.restore_volumes()
+        elif choice == 15:
+            self.modify_volumes()
+        elif choice == 16:
+            self.recommend_volumes()
+        elif choice == 17:
+            self.copy_snapshots()
+        elif choice == 18:
             return False
         elif choice == 99 or choice == 0:
             self.exit_application()
@@ -63,19 +91,22 @@ class EBSMenu(AbstractMenu):
 
         return True
 
-    def list_volumes(self):
+    def list_volumes(self, volumes: list = None):
         """
-        List all EBS volumes in the specified region.
-        :return: List of all EBS volume IDs.
+        List EBS volumes in the specified region.
+        :param volumes: VolumeRecord objects to list (default is every volume in the region).
+        :return: OptionList of the EBS volume IDs, searchable by Name tag, state, type, zone and attached instances.
         """
         try:
-            volumes = self.ebs_controller.list_existing_volumes()
+            if volumes is None:
+                volumes = self.ebs_controller.list_existing_volumes()
             for i, volume in enumerate(volumes, start=1):
                 print(f"{i}. Volume ID: {volume.id}, Size: {volume.size} GiB, State: {volume.state}, "
                       f"Type: {volume.volume_type}, Availability Zone: {volume.availability_zone}, "
-                      f"Attachments: {volume.attachments}")
-            volume_ids = [v.id for v in volumes]
-            return volume_ids
+                      f"Attachments: {', '.join(map(str, volume.attachments)) or 'None'}")
+            return OptionList([v.id for v in volumes],
+                              {v.id: (v.tag('Name'), v.state, v.volume_type, v.availability_zone) + v.instance_ids
+                               for v in volumes})
         except Exception as e:
             print(f"Error listing volumes: {e}")
             return []
@@ -115,8 +146,12 @@ class EBSMenu(AbstractMenu):
         :return: None
         """
 
-        # get volume id
-        volumes = self.list_volumes()
+        # get volume id, only unattached volumes can be attached
+        index = self.ebs_controller.get_volume_index()
+        volumes = self.list_volumes(index.unattached())
+        if not volumes:
+            print("No unattached volumes available to attach.")
+            return
         volume_id = get_user_input("Enter Volume ID to attach", available_options=volumes)
         if not volume_id: return
 
@@ -126,8 +161,9 @@ class EBSMenu(AbstractMenu):
                                      available_options=instances[EC2ListType.ALL])
         if not instance_id: return
 
-        # get device name
-        device = get_user_input("Enter Device Name", default_value=DEFAULT_DEVICE_NAME)
+        # get device name, suggesting one the instance's attached volumes do not use
+        device = get_user_input("Enter Device Name",
+                                default_value=index.next_free_device(instance_id, DEFAULT_DEVICE_NAME))
         if not device: return
 
         # attach volume
@@ -144,16 +180,23 @@ class EBSMenu(AbstractMenu):
         :return: None
         """
 
-        # get volume id
-        volumes = self.list_volumes()
+        # get volume id, only attached volumes can be detached
+        index = self.ebs_controller.get_volume_index()
+        volumes = self.list_volumes(index.attached())
+        if not volumes:
+            print("No attached volumes available to detach.")
+            return
         volume_id = get_user_input("Enter Volume ID to detach", available_options=volumes)
         if not volume_id: return
 
-        # get instance id
-        instances = list_ec2_instances(self.ec2_controller, list_type=EC2ListType.ALL)
-        instance_id = get_user_input("Enter Instance ID to detach the volume from",
-                                     available_options=instances[EC2ListType.ALL])
-        if not instance_id: return
+        # get instance id from the volume's attachments, only asking for Multi-Attach volumes
+        instance_ids = index.instance_ids_of(volume_id)
+        if len(instance_ids) == 1:
+            instance_id = instance_ids[0]
+        else:
+            instance_ids = list_ordered_list(list(instance_ids), "Instances the volume is attached to:")
+            instance_id = get_user_input("Enter Instance ID to detach the volume from", available_options=instance_ids)
+            if not instance_id: return
 
         # detach volume
         try:
@@ -186,6 +229,165 @@ class EBSMenu(AbstractMenu):
         except Exception as e:
             print(f"Error modifying volume capacity: {e}")
 
+    def modify_volumes(self):
+        """
+        Modify several EBS volumes at once, with the same changes or from exported recommendations, and track the
+        modifications as a background job.
+        :return: The background Job, or None if cancelled or nothing was modified.
+        """
+
+        # optionally apply recommendations exported by 'Recommend volume types...'
+        path = get_user_input("Apply recommendations from a JSON file (path, or 'none')", default_value='none')
+        if not path: return None
+        if path.lower() != 'none':
+            return self._apply_recommendations_file(path)
+
+        # get volume ids, optionally only of one type (e.g., every gp2 volume for a gp3 migration)
+        current_type = get_user_input("Only list volumes of type, or 'all'", default_value='all')
+        if not current_type: return None
+        volume_types = None if current_type.lower() == 'all' else [current_type]
+        try:
+            volumes = self.list_volumes(self.ebs_controller.list_existing_volumes(volume_types=volume_types))
+        except Exception as e:
+            print(f"Error listing volumes: {e}")
+            return None
+        if not volumes:
+            print("No volumes available to modify.")
+            return None
+        selection = get_user_input("Enter the Volume IDs or numbers separated by commas, or 'all'")
+        if not selection: return None
+        volume_ids = parse_multi_selection(selection, volumes)
+        if not volume_ids: return None
+
+        # get changes, 0 or 'keep' leaves a setting unchanged
+        size = get_user_input("Enter new Volume Size in GiB (0 to keep)", InputType.INT, default_value=0)
+        if size is False: return None
+        volume_type = get_user_input("Enter new Volume Type, or 'keep'", default_value='keep',
+                                     available_options=['keep'] + self.volume_types)
+        if not volume_type: return None
+        iops = get_user_input("Enter new IOPS (0 to keep)", InputType.INT, default_value=0)
+        if iops is False: return None
+        throughput = get_user_input("Enter new throughput in MiB/s (0 to keep)", InputType.INT, default_value=0)
+        if throughput is False: return None
+
+        # modify volumes
+        print(f"Modifying {len(volume_ids)} volume(s)...")
+        try:
+            results = self.ebs_controller.modify_volumes(volume_ids, size=size or None,
+                                                         volume_type=None if volume_type == 'keep' else volume_type,
+                                                         iops=iops or None, throughput=throughput or None)
+        except Exception as e:
+            print(f"Error modifying volumes: {e}")
+            return None
+        if not results:
+            print("No changes given, nothing to modify.")
+            return None
+        for volume_id, result in results.items():
+            print(f"{volume_id}: Error: {result.error}" if result.error else f"{volume_id}: {result.state}")
+
+        return self._track_volume_modifications(results)
+
+    def _apply_recommendations_file(self, path):
+        """
+        Apply the changes of a recommendations file after confirmation, and track them as a background job.
+        :param path: Path of a JSON file written by export_recommendations.
+        :return: The background Job, or None if cancelled or nothing was modified.
+        """
+        try:
+            changes_by_volume = {volume_id: changes for volume_id, changes in load_recommendations(path).items()
+                                 if changes}
+        except Exception as e:
+            print(f"Error reading recommendations: {e}")
+            return None
+        if not changes_by_volume:
+            print("No changes recommended in the file, nothing to modify.")
+            return None
+        for volume_id, changes in changes_by_volume.items():
+            print(f"{volume_id}: {', '.join(f'{name}={value}' for name, value in changes.items())}")
+
+        confirm = get_user_input(f"Apply these {len(changes_by_volume)} recommendation(s) now? (y/n)",
+                                 default_value='n', available_options=['y', 'n'])
+        if confirm != 'y': return None
+        print(f"Modifying {len(changes_by_volume)} volume(s)...")
+        try:
+            results = self.ebs_controller.apply_volume_modifications(changes_by_volume)
+        except Exception as e:
+            print(f"Error modifying volumes: {e}")
+            return None
+        for volume_id, result in results.items():
+            print(f"{volume_id}: Error: {result.error}" if result.error else f"{volume_id}: {result.state}")
+        return self._track_volume_modifications(results)
+
+    def _track_volume_modifications(self, results):
+        """
+        Track the modifications that started as a background job.
+        :param results: dict of volume ID to VolumeModificationRecord returned by the modification.
+        :return: The background Job, or None if no modification started.
+        """
+        started = [volume_id for volume_id, result in results.items() if not result.error]
+        if not started: return None
+        tracker = self.ebs_controller.track_volume_modifications(started)
+        job = job_tracker.submit(f"Modify {len(started)} volume(s)", tracker.run)
+        job.progress = tracker.summary
+        print(f"Job #{job.id} is tracking the modifications until they complete. "
+              f"Check their progress under 'Background jobs' in the main menu.")
+        return job
+
+    def recommend_volumes(self):
+        """
+        Recommend a volume type, IOPS and throughput for in-use volumes from their CloudWatch I/O history,
+        optionally export the recommendations and apply them as a bulk modification.
+        :return: List of VolumeRecommendation, or None if cancelled or failed.
+        """
+
+        # get the volumes and history to size for
+        current_type = get_user_input("Only recommend for volumes of type, or 'all'", default_value='all')
+        if not current_type: return None
+        volume_types = None if current_type.lower() == 'all' else [current_type]
+        lookback_days = get_user_input("Enter the days of history to size for", InputType.INT,
+                                       default_value=RIGHTSIZE_LOOKBACK_DAYS)
+        if lookback_days is False: return None
+
+        # recommend
+        print("Collecting volume metrics...")
+        try:
+            recommendations = recommend_volumes(self.ebs_controller, self.cw_controller, volume_types=volume_types,
+                                                lookback_days=lookback_days)
+        except Exception as e:
+            print(f"Error recommending volume changes: {e}")
+            return None
+        if not recommendations:
+            print("Every volume is right-sized.")
+            return recommendations
+        for i, recommendation in enumerate(recommendations, start=1):
+            print(f"{i}. {recommendation}")
+
+        # export
+        path = get_user_input("Export the recommendations to a JSON file (path, or 'none')", default_value='none')
+        if not path: return recommendations
+        if path.lower() != 'none':
+            try:
+                export_recommendations(recommendations, path)
+                print(f"Exported {len(recommendations)} recommendation(s) to {path}.")
+            except Exception as e:
+                print(f"Error exporting recommendations: {e}")
+
+        # apply after confirmation
+        confirm = get_user_input(f"Apply these {len(recommendations)} recommendation(s) now? (y/n)", default_value='n',
+                                 available_options=['y', 'n'])
+        if confirm != 'y': return recommendations
+        print(f"Modifying {len(recommendations)} volume(s)...")
+        try:
+            results = self.ebs_controller.apply_volume_modifications(
+                {recommendation.volume_id: recommendation.changes for recommendation in recommendations})
+        except Exception as e:
+            print(f"Error modifying volumes: {e}")
+            return recommendations
+        for volume_id, result in results.items():
+            print(f"{volume_id}: Error: {result.error}" if result.error else f"{volume_id}: {result.state}")
+        self._track_volume_modifications(results)
+        return recommendations
+
     def delete_volume(self):
         """
         Delete an EBS volume.
@@ -206,10 +408,30 @@ class EBSMenu(AbstractMenu):
         except Exception as e:
             print(f"Error deleting volume: {e}")
 
+    def list_unattached_volumes(self):
+        """
+        List the EBS volumes that are not attached to any instance, with their total size.
+        :return: OptionList of the unattached EBS volume IDs.
+        """
+        try:
+            unattached = self.ebs_controller.get_volume_index().unattached()
+        except Exception as e:
+            print(f"Error listing unattached volumes: {e}")
+            return []
+
+        if not unattached:
+            print("No unattached volumes found.")
+            return []
+
+        print("Unattached volumes:")
+        volumes = self.list_volumes(unattached)
+        print(f"{len(unattached)} unattached volume(s), {sum(v.size or 0 for v in unattached)} GiB in total.")
+        return volumes
+
     def list_snapshots(self):
         """
         List all EBS snapshots in the specified region.
-        :return: List of all EBS snapshot IDs.
+        :return: OptionList of all EBS snapshot IDs, searchable by Name tag, volume ID, state and description.
         """
         try:
             snapshots = self.ebs_controller.list_snapshots()
@@ -217,8 +439,8 @@ class EBSMenu(AbstractMenu):
                 print(
                     f"{i}. Snapshot ID: {snapshot.id}, Volume ID: {snapshot.volume_id}, Size: {snapshot.volume_size} GiB, "
                     f"State: {snapshot.state}, Description: {snapshot.description}, Start Time: {snapshot.start_time}")
-            snapshot_ids = [s.id for s in snapshots]
-            return snapshot_ids
+            return OptionList([s.id for s in snapshots],
+                              {s.id: (s.tag('Name'), s.volume_id, s.state, s.description) for s in snapshots})
         except Exception as e:
             print(f"Error listing snapshots: {e}")
             return []
@@ -242,11 +464,108 @@ class EBSMenu(AbstractMenu):
         try:
             print(f"Taking snapshot of volume {volume_id}.")
             response = self.ebs_controller.take_snapshot_of_volume(volume_id, description)
-            print(f"Created snapshot with ID: {response.snapshot_id} for volume {volume_id}. "
+            print(f"Created snapshot with ID: {response.id} for volume {volume_id}. "
                   f"Description: {description}")
         except Exception as e:
             print(f"Error taking snapshot of volume: {e}")
 
+    def snapshot_instances(self):
+        """
+        Take crash-consistent snapshots of all volumes of several instances, picked from a list or by tag.
+        :return: SnapshotBatchResult, or None if cancelled or failed.
+        """
+
+        # get instance ids, from the list or by tag
+        select_by = get_user_input("Select instances from the list or by tag? (list/tag)", default_value='list',
+                                   available_options=['list', 'tag'])
+        if not select_by: return None
+        if select_by == 'tag':
+            tag_filter = get_user_input("Enter the tag to match as key=value")
+            if not tag_filter: return None
+            tags = parse_tags(tag_filter)
+            if not tags: return None
+            try:
+                instance_ids = [instance.id for instance in
+                                self.ec2_controller.get_ec2_instances(EC2ListType.ALL, tags=tags)[EC2ListType.ALL]]
+            except Exception as e:
+                print(f"Error listing instances by tag: {e}")
+                return None
+            print(f"{len(instance_ids)} instance(s) match {tag_filter}.")
+        else:
+            instances = list_ec2_instances(self.ec2_controller, list_type=EC2ListType.ALL)
+            available_ids = instances.get(EC2ListType.ALL, [])
+            if len(available_ids) == 0:
+                print("No EC2 instances found to snapshot.")
+                return None
+            selection = get_user_input("Enter the Instance IDs or numbers separated by commas, or 'all'")
+            if not selection: return None
+            instance_ids = parse_multi_selection(selection, available_ids)
+        if not instance_ids: return None
+
+        # get description and tags applied at creation
+        description = get_user_input("Enter Snapshot Description", default_value=DEFAULT_SNAPSHOT_NAME)
+        if not description: return None
+        tag_input = get_user_input("Enter tags for the snapshots as key=value pairs separated by commas",
+                                   default_value='none')
+        if not tag_input: return None
+        snapshot_tags = parse_tags(tag_input)
+        if snapshot_tags is None: return None
+
+        # take snapshots
+        print(f"Taking snapshots of the volumes of {len(instance_ids)} instance(s)...")
+        try:
+            result = self.ebs_controller.snapshot_instances(instance_ids, description, snapshot_tags)
+        except Exception as e:
+            print(f"Error taking snapshots: {e}")
+            return None
+        for instance_id, snapshots in result.results.items():
+            print(f"{instance_id}: {', '.join(f'{s.id} ({s.volume_id})' for s in snapshots) or 'No volumes'}")
+        for instance_id, error in result.errors.items():
+            print(f"{instance_id}: Error: {error}")
+        print(f"Created {len(result.snapshots())} snapshot(s) for {len(result.results)} instance(s), "
+              f"{len(result.errors)} failed.")
+        return result
+
+    def prune_snapshots(self):
+        """
+        Delete the EBS snapshots a retention policy does not keep, after showing a dry run.
+        :return: RetentionResult, or None if cancelled or failed.
+        """
+
+        # get retention policy
+        policy = get_retention_policy()
+        if policy is None: return None
+        if policy.is_empty:
+            print("No retention rules given, nothing to prune.")
+            return None
+
+        # show what the policy would delete
+        try:
+            result = self.ebs_controller.prune_snapshots(policy, dry_run=True)
+        except Exception as e:
+            print(f"Error planning snapshot retention: {e}")
+            return None
+        for snapshot in result.plan.delete:
+            print(f"Delete {snapshot.id} (Volume ID: {snapshot.volume_id}, Size: {snapshot.volume_size} GiB, "
+                  f"Start Time: {snapshot.start_time})")
+        print(f"Policy: {policy}. {result.summary(lambda snapshot: snapshot.volume_size)}")
+        if not result.plan.delete:
+            return result
+
+        # delete after confirmation
+        confirm = get_user_input(f"Delete these {len(result.plan.delete)} snapshot(s) now? (y/n)", default_value='n',
+                                 available_options=['y', 'n'])
+        if confirm != 'y': return result
+        try:
+            result = self.ebs_controller.apply_snapshot_retention(result.plan)
+        except Exception as e:
+            print(f"Error pruning snapshots: {e}")
+            return None
+        for snapshot_id, error in result.errors.items():
+            print(f"{snapshot_id}: Error: {error}")
+        print(result.summary(lambda snapshot: snapshot.volume_size))
+        return result
+
     def create_volume_from_snapshot(self):
         """
         Create a new EBS volume from an existing snapshot.
@@ -277,6 +596,99 @@ class EBSMenu(AbstractMenu):
         except Exception as e:
             print(f"Error creating volume from snapshot: {e}")
 
+    def restore_volumes(self):
+        """
+        Create volumes from several snapshots in one or more Availability Zones, tracked as a background job.
+        :return: The background Job, or None if cancelled.
+        """
+
+        # get snapshot ids
+        snapshots = self.list_snapshots()
+        if not snapshots:
+            print("No snapshots available to restore from.")
+            return None
+        selection = get_user_input("Enter the Snapshot IDs or numbers separated by commas, or 'all'")
+        if not selection: return None
+        snapshot_ids = parse_multi_selection(selection, snapshots)
+        if not snapshot_ids: return None
+
+        # get availability zones, each snapshot is restored once in each zone
+        zone_input = get_user_input("Enter the Availability Zones separated by commas",
+                                    default_value=DEFAULT_AVAILABILITY_ZONE)
+        if not zone_input: return None
+        availability_zones = [zone.strip() for zone in zone_input.split(',') if zone.strip()]
+
+        # get volume type
+        volume_types = list_ordered_list(self.volume_types, "Available EBS Volume Types:")
+        volume_type = get_user_input(f"Enter Volume Type", default_value=DEFAULT_VOLUME_TYPE,
+                                     available_options=volume_types)
+        if not volume_type: return None
+
+        # get tags applied at creation and whether to use fast snapshot restore
+        tag_input = get_user_input("Enter tags for the volumes as key=value pairs separated by commas",
+                                   default_value='none')
+        if not tag_input: return None
+        tags = parse_tags(tag_input)
+        if tags is None: return None
+        fast_restore = get_user_input("Enable Fast Snapshot Restore while creating the volumes? "
+                                      "(faster first reads, charged per snapshot and zone) (y/n)",
+                                      default_value='n', available_options=['y', 'n'])
+        if not fast_restore: return None
+
+        specs = [(snapshot_id, zone, volume_type) for snapshot_id in snapshot_ids for zone in availability_zones]
+        job = job_tracker.submit(f"Restore {len(specs)} volume(s) from {len(snapshot_ids)} snapshot(s)",
+                                 self.ebs_controller.restore_volumes, specs, tags,
+                                 fast_snapshot_restore=(fast_restore == 'y'))
+        print(f"Job #{job.id} is creating {len(specs)} volume(s) and waiting for them to be available. "
+              f"Check its progress under 'Background jobs' in the main menu.")
+        return job
+
+    def copy_snapshots(self):
+        """
+        Copy several snapshots to one or more other regions (e.g., for disaster recovery), as a background job.
+        :return: The background Job, or None if cancelled.
+        """
+
+        # get snapshot ids
+        snapshots = self.list_snapshots()
+        if not snapshots:
+            print("No snapshots available to copy.")
+            return None
+        selection = get_user_input("Enter the Snapshot IDs or numbers separated by commas, or 'all'")
+        if not selection: return None
+        snapshot_ids = set(parse_multi_selection(selection, snapshots) or ())
+        if not snapshot_ids: return None
+
+        # get destination regions
+        try:
+            regions = [region for region in get_enabled_regions() if region != self.ebs_controller.region]
+        except Exception as e:
+            print(f"Error listing regions: {e}")
+            return None
+        region_options = list_ordered_list(regions, "Available destination regions:")
+        region_input = get_user_input("Enter the destination regions or numbers separated by commas")
+        if not region_input: return None
+        destination_regions = parse_multi_selection(region_input, region_options)
+        if not destination_regions: return None
+
+        # get tags applied to the copies
+        tag_input = get_user_input("Enter tags for the copies as key=value pairs separated by commas",
+                                   default_value='none')
+        if not tag_input: return None
+        tags = parse_tags(tag_input)
+        if tags is None: return None
+
+        # copy snapshots
+        records = [snapshot for snapshot in self.ebs_controller.list_snapshots() if snapshot.id in snapshot_ids]
+        pipeline = self.ebs_controller.copy_snapshots(
+            records, {region: Resource(region).ec2_client() for region in destination_regions}, tags=tags)
+        job = job_tracker.submit(f"Copy {len(records)} snapshot(s) to {', '.join(destination_regions)}",
+                                 pipeline.run)
+        job.progress = pipeline.summary
+        print(f"Job #{job.id} is copying {pipeline.total_gib()} GiB in {len(pipeline.copies)} copies. "
+              f"Check its progress, throughput and ETA under 'Background jobs' in the main menu.")
+        return job
+
     def delete_snapshot(self):
         """
         Delete an EBS snapshot.
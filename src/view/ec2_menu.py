@@ -1,8 +1,12 @@
-from src.controller.EC2Controller import EC2Controller
+from datetime import datetime, timezone
+
+from src.controller.EC2Controller import EC2Controller, PartialLaunchError
 from src.model.Resources import Resource
-from src.utils.config import WINDOWS_AMI_ID, UBUNTU_AMI_ID
-from src.utils.list_utils import list_ec2_instances, EC2ListType, list_ordered_list
-from src.utils.user_input_handler import get_user_input
+from src.utils.config import WINDOWS_AMI_ID, UBUNTU_AMI_ID, DATETIME_COMPACT_FORMAT
+from src.utils.job_tracker import job_tracker
+from src.utils.list_utils import list_ec2_instances, EC2ListType, list_ordered_list, ec2_to_string
+from src.utils.region_scanner import scan_regions
+from src.utils.user_input_handler import get_user_input, parse_multi_selection, InputType
 from src.view.AbstractMenu import AbstractMenu
 
 
@@ -14,6 +18,9 @@ class EC2Menu(AbstractMenu):
              3: "Stop instance",
              4: "Launch new instance",
              5: "Terminate instance",
+             6: "List instances in all regions",
+             7: "Start/stop/terminate multiple instances",
+             8: "Launch multiple instances",
              9: "Main menu",
              99: "Exit"}
 
@@ -25,6 +32,7 @@ class EC2Menu(AbstractMenu):
         self.ec2_controller = EC2Controller(ec2_resource, ec2_client)
 
         self.OS_options = ["Windows", "Linux"]
+        self.bulk_actions = ["start", "stop", "terminate"]
 
     def execute_choice(self, choice):
         if choice == 1:
@@ -37,6 +45,12 @@ class EC2Menu(AbstractMenu):
             self.launch_instance()
         elif choice == 5:
             self.terminate_instance()
+        elif choice == 6:
+            self.list_instances_all_regions()
+        elif choice == 7:
+            self.bulk_instance_action()
+        elif choice == 8:
+            self.launch_instances()
         elif choice == 9:
             return False
         elif choice == 99 or choice == 0:
@@ -61,11 +75,14 @@ class EC2Menu(AbstractMenu):
         instance_id = get_user_input("Enter the Instance ID to start", available_options=instances[EC2ListType.STOPPED])
         if not instance_id: return
 
-        # start instance
+        # start instance and wait for it in the background
         try:
             print("Starting EC2 instance:", instance_id)
-            self.ec2_controller.start_instance(instance_id)
-            print(f"Instance {instance_id} is now running.")
+            self.ec2_controller.start_instance(instance_id, wait=False)
+            job = job_tracker.submit(f"Start EC2 instance {instance_id}",
+                                     self.ec2_controller.wait_for_instance_running, instance_id)
+            print(f"Job #{job.id} is waiting for instance {instance_id} to enter 'running' state. "
+                  f"Check its progress under 'Background jobs' in the main menu.")
         except Exception as e:
             print(f"Error starting instance {instance_id}: {e}")
 
@@ -140,3 +157,127 @@ class EC2Menu(AbstractMenu):
             print('Terminate instance request response status:', response['ResponseMetadata']['HTTPStatusCode'])
         except Exception as e:
             print(f"Error terminating instance {instance_id}: {e}")
+
+    def list_instances_all_regions(self):
+        """
+        List EC2 instances in every enabled region, scanning the regions concurrently.
+        :return: List of (region, instance ID) tuples.
+        """
+        try:
+            print("Scanning all enabled regions for EC2 instances...")
+            scan = scan_regions(EC2Controller, 'get_ec2_instances', list_type=EC2ListType.ALL)
+            for region, error in sorted(scan.errors.items()):
+                print(f"Error listing EC2 instances in {region}: {error}")
+
+            instances = scan.merged().get(EC2ListType.ALL, []) if scan.results else []
+            if len(instances) == 0:
+                print("No EC2 instances found in any region.")
+                return []
+
+            print("EC2 Instances in all regions:")
+            for i, (region, instance) in enumerate(instances, start=1):
+                print(ec2_to_string(instance, region, i))
+            return [(region, instance.id) for region, instance in instances]
+        except Exception as e:
+            print(f"Error listing EC2 instances in all regions: {e}")
+            return []
+
+    def bulk_instance_action(self):
+        """
+        Start, stop or terminate several EC2 instances with batched API calls.
+        :return: dict of instance ID to InstanceStateChangeRecord, or None if cancelled.
+        """
+
+        # get action
+        actions = list_ordered_list(self.bulk_actions, "Available actions:")
+        action = get_user_input("Enter the action", available_options=actions)
+        if not action: return None
+
+        # get instance ids
+        list_type = {'start': EC2ListType.STOPPED, 'stop': EC2ListType.RUNNING, 'terminate': EC2ListType.ALL}[action]
+        instances = list_ec2_instances(self.ec2_controller, list_type=list_type)
+        available_ids = instances.get(list_type, [])
+        if len(available_ids) == 0:
+            print(f"No EC2 instances found to {action}.")
+            return None
+        selection = get_user_input("Enter the Instance IDs or numbers separated by commas, or 'all'")
+        if not selection: return None
+        instance_ids = parse_multi_selection(selection, available_ids)
+        if not instance_ids: return None
+
+        # wait for the instances to settle or return straight away
+        wait = get_user_input("Wait for all instances to finish? (y/n)", default_value='n',
+                              available_options=['y', 'n'])
+        if not wait: return None
+
+        try:
+            print(f"Requesting {action} for {len(instance_ids)} instance(s)...")
+            results = self.ec2_controller.bulk_instance_action(action, instance_ids, wait=(wait == 'y'))
+            for instance_id, result in results.items():
+                if result.error:
+                    print(f"{instance_id}: Error: {result.error}")
+                else:
+                    print(f"{instance_id}: {result.previous_state} -> {result.current_state}")
+            failed = sum(1 for result in results.values() if result.error)
+            print(f"{len(results) - failed} instance(s) succeeded, {failed} failed.")
+            return results
+        except Exception as e:
+            print(f"Error running {action} on instances: {e}")
+            return None
+
+    def launch_instances(self):
+        """
+        Launch a batch of EC2 instances with one API call, tagged at creation.
+        :return: List of launched InstanceRecord objects, or None if cancelled or failed.
+        """
+
+        # get os, or a launch template that defines the AMI
+        launch_template_id = get_user_input("Enter a launch template ID to use, or 'none'", default_value='none')
+        if not launch_template_id: return None
+        launch_template = None
+        ami_id = None
+        if launch_template_id.lower() != 'none':
+            launch_template = {'LaunchTemplateId': launch_template_id, 'Version': '$Latest'}
+        else:
+            os_options = list_ordered_list(self.OS_options, "Available OS options:")
+            user_input = get_user_input("Enter the OS for the new EC2 instances windows or linux",
+                                        available_options=os_options)
+            if not user_input: return None
+            ami_id = WINDOWS_AMI_ID if user_input.lower() == 'windows' else UBUNTU_AMI_ID
+
+        # get number of instances
+        count = get_user_input("Enter the number of instances to launch", InputType.INT, default_value=2)
+        if not count: return None
+        if count < 1:
+            print("The number of instances must be at least 1.")
+            return None
+
+        # get name tag for the batch
+        default_name = f"batch-{datetime.now(timezone.utc).strftime(DATETIME_COMPACT_FORMAT)}"
+        name = get_user_input("Enter the Name tag for the instances", default_value=default_name)
+        if not name: return None
+
+        # track the batch until running in the background or return straight away
+        track = get_user_input("Track the instances until they are all running? (y/n)", default_value='y',
+                               available_options=['y', 'n'])
+        if not track: return None
+
+        print(f"Launching {count} EC2 instance(s)...")
+        try:
+            try:
+                instances = self.ec2_controller.launch_instances(count, ami_id=ami_id, tags={'Name': name},
+                                                                 launch_template=launch_template)
+            except PartialLaunchError as e:
+                print(f"Warning: {e}")
+                instances = e.instances
+            print(f"Launched {len(instances)} EC2 instance(s): {', '.join(instance.id for instance in instances)}")
+            if track == 'y' and instances:
+                job = job_tracker.submit(f"Launch {len(instances)} EC2 instance(s) '{name}'",
+                                         self.ec2_controller.wait_for_instance_states,
+                                         [instance.id for instance in instances], 'running')
+                print(f"Job #{job.id} is waiting for the instances to enter 'running' state. "
+                      f"Check its progress under 'Background jobs' in the main menu.")
+            return instances
+        except Exception as e:
+            print(f"Error launching instances: {e}")
+            return None
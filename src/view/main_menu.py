@@ -1,3 +1,4 @@
+from src.utils.job_tracker import job_tracker
 from src.view.AbstractMenu import AbstractMenu
 
 
@@ -9,6 +10,7 @@ class MainMenu(AbstractMenu):
              3: "S3 Storage",
              4: "Monitoring",
              5: "RDS Databases",
+             6: "Background jobs",
              99: "Exit"}
 
         super().__init__("Main Menu", main_menu_options)
@@ -24,6 +26,8 @@ class MainMenu(AbstractMenu):
             self.open_monitoring_menu()
         elif choice == 5:
             self.open_rds_menu()
+        elif choice == 6:
+            self.list_jobs()
         elif choice == 99 or choice == 0:
             self.exit_application()
         else:
@@ -55,3 +59,22 @@ class MainMenu(AbstractMenu):
         from src.view.rds_menu import RDSMenu
         rds_menu = RDSMenu()
         rds_menu.run()
+
+    @staticmethod
+    def list_jobs():
+        """
+        List pending and finished background jobs with their elapsed time.
+        :return: None
+        """
+        pending_jobs = job_tracker.pending_jobs()
+        finished_jobs = job_tracker.finished_jobs()
+        if not pending_jobs and not finished_jobs:
+            print("No background jobs.")
+            return
+
+        print("Pending Jobs:" if pending_jobs else "No pending jobs.")
+        for job in pending_jobs:
+            print(job)
+        print("Finished Jobs:" if finished_jobs else "No finished jobs.")
+        for job in finished_jobs:
+            print(job)
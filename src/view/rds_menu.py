@@ -1,8 +1,10 @@
 from src.controller.RDSController import RDSController
 from src.model.Resources import Resource
 from src.utils.config import DEFAULT_AVAILABILITY_ZONE
+from src.utils.job_tracker import job_tracker
 from src.utils.list_utils import list_ordered_list
-from src.utils.user_input_handler import get_user_input
+from src.utils.option_index import OptionList
+from src.utils.user_input_handler import get_user_input, get_retention_policy
 from src.view.AbstractMenu import AbstractMenu
 
 
@@ -17,7 +19,8 @@ class RDSMenu(AbstractMenu):
              6: "Create DB snapshot",
              7: "Delete DB snapshot",
              8: "Restore DB instance from snapshot",
-             9: "Main menu",
+             9: "Prune DB snapshots by retention policy",
+             10: "Main menu",
              99: "Exit"}
         super().__init__("RDS Menu", rds_menu_options)
 
@@ -45,6 +48,8 @@ class RDSMenu(AbstractMenu):
         elif choice == 8:
             self.restore_db_instance_from_snapshot()
         elif choice == 9:
+            self.prune_db_snapshots()
+        elif choice == 10:
             return False
         elif choice == 99 or choice == 0:
             self.exit_application()
@@ -56,16 +61,18 @@ class RDSMenu(AbstractMenu):
     def list_db_instances(self):
         """
         List all RDS DB instances in the account.
-        :return: List of RDS DB instance identifiers.
+        :return: OptionList of RDS DB instance identifiers, searchable by DB name, engine and status.
         """
         try:
             db_instances = self.rds_controller.list_db_instances()
             db_string_list = [
-                f"{db_instance['DBName']} ({db_instance['DBInstanceIdentifier']} - {db_instance['Engine']}): {db_instance['DBInstanceStatus']}"
+                f"{db_instance.db_name} ({db_instance.id} - {db_instance.engine}): {db_instance.status}"
                 for db_instance in db_instances
             ]
             list_ordered_list(db_string_list, "RDS DB Instances:")
-            return [db_instances['DBInstanceIdentifier'] for db_instances in db_instances]
+            return OptionList([db_instance.id for db_instance in db_instances],
+                              {db_instance.id: (db_instance.db_name, db_instance.engine, db_instance.status)
+                               for db_instance in db_instances})
         except Exception as e:
             print(f"Error listing DB instances: {e}")
             return []
@@ -95,11 +102,11 @@ class RDSMenu(AbstractMenu):
 
         try:
             db_instance_id = self.rds_controller.create_db_instance(db_name, db_id, db_engine, availability_zone)
-            # wait for db instance to be available
-            print("Waiting for DB instance to be available...")
-            waiter = self.rds_controller.rds_client.get_waiter('db_instance_available')
-            waiter.wait(DBInstanceIdentifier=db_instance_id)
-            print(f"DB instance '{db_instance_id}' created successfully.")
+            # wait for db instance to be available in the background
+            job = job_tracker.submit(f"Create DB instance '{db_instance_id}'",
+                                     self.rds_controller.wait_for_db_instance_available, db_instance_id)
+            print(f"DB instance '{db_instance_id}' creation requested. Job #{job.id} is waiting for it to be "
+                  f"available, check its progress under 'Background jobs' in the main menu.")
             return db_instance_id
         except Exception as e:
             print(f"Error creating DB instance: {e}")
@@ -145,11 +152,11 @@ class RDSMenu(AbstractMenu):
         # reboot db instance
         try:
             db_instance_id = self.rds_controller.reboot_db_instance(db_instance_id)
-            print("Waiting for DB instance to reboot...")
-            # wait for db instance to be available
-            waiter = self.rds_controller.rds_client.get_waiter('db_instance_available')
-            waiter.wait(DBInstanceIdentifier=db_instance_id)
-            print(f"DB instance '{db_instance_id}' rebooted successfully.")
+            # wait for db instance to be available in the background
+            job = job_tracker.submit(f"Reboot DB instance '{db_instance_id}'",
+                                     self.rds_controller.wait_for_db_instance_available, db_instance_id)
+            print(f"DB instance '{db_instance_id}' reboot requested. Job #{job.id} is waiting for it to be "
+                  f"available, check its progress under 'Background jobs' in the main menu.")
             return db_instance_id
         except Exception as e:
             print(f"Error rebooting DB instance: {e}")
@@ -167,15 +174,15 @@ class RDSMenu(AbstractMenu):
             if deletable_only:
                 db_snapshots = [
                     snap for snap in db_snapshots
-                    if snap.get('SnapshotType', 'manual') == 'manual'
+                    if snap.snapshot_type == 'manual'
                 ]
             if print_list:
                 db_snapshot_list = [
-                    f"{db_snapshot['DBSnapshotIdentifier']}"
+                    f"{db_snapshot.id}"
                     for db_snapshot in db_snapshots
                 ]
                 list_ordered_list(db_snapshot_list, "RDS DB Snapshots:")
-            return [db_snapshot['DBSnapshotIdentifier'] for db_snapshot in db_snapshots]
+            return [db_snapshot.id for db_snapshot in db_snapshots]
         except Exception as e:
             print(f"Error listing DB snapshots: {e}")
             return []
@@ -202,11 +209,11 @@ class RDSMenu(AbstractMenu):
 
         try:
             self.rds_controller.create_db_snapshot(snapshot_id, db_instance_id)
-            # wait for db snapshot to be available
-            print("Waiting for DB snapshot to be available...")
-            waiter = self.rds_controller.rds_client.get_waiter('db_snapshot_available')
-            waiter.wait(DBSnapshotIdentifier=snapshot_id)
-            print(f"DB snapshot '{snapshot_id}' created successfully.")
+            # wait for db snapshot to be available in the background
+            job = job_tracker.submit(f"Create DB snapshot '{snapshot_id}'",
+                                     self.rds_controller.wait_for_db_snapshot_available, snapshot_id)
+            print(f"DB snapshot '{snapshot_id}' creation requested. Job #{job.id} is waiting for it to be "
+                  f"available, check its progress under 'Background jobs' in the main menu.")
             return snapshot_id
         except Exception as e:
             print(f"Error creating DB snapshot: {e}")
@@ -229,16 +236,56 @@ class RDSMenu(AbstractMenu):
         # delete db snapshot
         try:
             db_snapshot_id = self.rds_controller.delete_db_snapshot(db_snapshot_id)
-            # wait for db snapshot to be deleted
-            print("Waiting for DB snapshot to be deleted...")
-            waiter = self.rds_controller.rds_client.get_waiter('db_snapshot_deleted')
-            waiter.wait(DBSnapshotIdentifier=db_snapshot_id)
-            print(f"DB snapshot '{db_snapshot_id}' deleted successfully.")
+            # wait for db snapshot to be deleted in the background
+            job = job_tracker.submit(f"Delete DB snapshot '{db_snapshot_id}'",
+                                     self.rds_controller.wait_for_db_snapshot_deleted, db_snapshot_id)
+            print(f"DB snapshot '{db_snapshot_id}' deletion requested. Job #{job.id} is waiting for it to be "
+                  f"deleted, check its progress under 'Background jobs' in the main menu.")
             return db_snapshot_id
         except Exception as e:
             print(f"Error deleting DB snapshot: {e}")
             return None
 
+    def prune_db_snapshots(self):
+        """
+        Delete the manual RDS DB snapshots a retention policy does not keep, after showing a dry run.
+        :return: RetentionResult, or None if cancelled or failed.
+        """
+
+        # get retention policy
+        policy = get_retention_policy()
+        if policy is None: return None
+        if policy.is_empty:
+            print("No retention rules given, nothing to prune.")
+            return None
+
+        # show what the policy would delete
+        try:
+            result = self.rds_controller.prune_db_snapshots(policy, dry_run=True)
+        except Exception as e:
+            print(f"Error planning DB snapshot retention: {e}")
+            return None
+        for db_snapshot in result.plan.delete:
+            print(f"Delete {db_snapshot.id} (DB instance: {db_snapshot.db_instance_id}, "
+                  f"Storage: {db_snapshot.allocated_storage} GiB, Created: {db_snapshot.create_time})")
+        print(f"Policy: {policy}. {result.summary(lambda db_snapshot: db_snapshot.allocated_storage)}")
+        if not result.plan.delete:
+            return result
+
+        # delete after confirmation
+        confirm = get_user_input(f"Delete these {len(result.plan.delete)} DB snapshot(s) now? (y/n)",
+                                 default_value='n', available_options=['y', 'n'])
+        if confirm != 'y': return result
+        try:
+            result = self.rds_controller.apply_db_snapshot_retention(result.plan)
+        except Exception as e:
+            print(f"Error pruning DB snapshots: {e}")
+            return None
+        for db_snapshot_id, error in result.errors.items():
+            print(f"{db_snapshot_id}: Error: {error}")
+        print(result.summary(lambda db_snapshot: db_snapshot.allocated_storage))
+        return result
+
     def restore_db_instance_from_snapshot(self):
         """
         Restore an RDS DB instance from an existing snapshot.
@@ -1,7 +1,17 @@
+import os
+import sys
+import threading
+import time
+
 from src.controller.S3Controller import S3Controller
 from src.model.Resources import Resource
-from src.utils.list_utils import list_ordered_list
-from src.utils.user_input_handler import get_user_input
+from src.utils.config import S3_PROGRESS_INTERVAL_SECONDS, S3_LIST_MAX_ITEMS, S3_RANGED_MAX_WORKERS
+from src.utils.job_tracker import job_tracker
+from src.utils.list_utils import list_ordered_list, render_stream, object_to_string
+from src.utils.option_index import OptionList
+from src.utils.s3_sync import UPLOAD, DOWNLOAD
+from src.utils.s3_transfer import TRANSFER_PROFILES
+from src.utils.user_input_handler import get_user_input, InputType
 from src.view.AbstractMenu import AbstractMenu
 
 
@@ -14,7 +24,10 @@ class S3Menu(AbstractMenu):
              4: "Download object",
              5: "Delete bucket",
              6: "Create bucket",
-             9: "Main menu",
+             7: "Sync local directory with bucket prefix",
+             8: "Inventory bucket (parallel listing)",
+             9: "Download large object (parallel ranges, resumable)",
+             10: "Main menu",
              99: "Exit"}
         super().__init__("S3 Menu", s3_menu_options)
 
@@ -22,6 +35,43 @@ class S3Menu(AbstractMenu):
         s3 = res.s3_resource()
         self.s3_controller = S3Controller(s3)
 
+    @staticmethod
+    def _get_transfer_profile():
+        """
+        Ask for the transfer profile to use.
+        :return: TransferProfile, or None if cancelled.
+        """
+        for name, profile in TRANSFER_PROFILES.items():
+            print(f"{name}: {profile}")
+        name = get_user_input("Enter the transfer profile", default_value='default',
+                              available_options=list(TRANSFER_PROFILES))
+        return TRANSFER_PROFILES[name] if name else None
+
+    @staticmethod
+    def _progress_printer():
+        """
+        Build a progress callback that prints the percentage done and throughput on one line,
+        at most every S3_PROGRESS_INTERVAL_SECONDS.
+        :return: Callable taking (bytes transferred, total bytes).
+        """
+        started = time.monotonic()
+        last_print = [0.0]
+        lock = threading.Lock()
+
+        def progress(transferred, total):
+            now = time.monotonic()
+            with lock:
+                if now - last_print[0] < S3_PROGRESS_INTERVAL_SECONDS and transferred != total:
+                    return
+                last_print[0] = now
+            speed = transferred / (now - started) / (1024 * 1024) if now > started else 0
+            done = f"{transferred * 100 // total}% of {total / (1024 * 1024):.1f} MiB" if total else \
+                f"{transferred / (1024 * 1024):.1f} MiB"
+            sys.stdout.write(f"\r{done}, {speed:.1f} MiB/s ")
+            sys.stdout.flush()
+
+        return progress
+
     def execute_choice(self, choice):
         if choice == 1:
             self.list_buckets()
@@ -35,7 +85,13 @@ class S3Menu(AbstractMenu):
             self.delete_bucket()
         elif choice == 6:
             self.create_bucket()
+        elif choice == 7:
+            self.sync_directory()
+        elif choice == 8:
+            self.inventory_bucket()
         elif choice == 9:
+            self.download_large_object()
+        elif choice == 10:
             return False
         elif choice == 99 or choice == 0:
             self.exit_application()
@@ -50,7 +106,7 @@ class S3Menu(AbstractMenu):
         :return: List of S3 bucket names.
         """
         try:
-            buckets = self.s3_controller.list_buckets()
+            buckets = [bucket.name for bucket in self.s3_controller.list_buckets()]
             if not buckets:
                 print("No S3 buckets found.")
             else:
@@ -62,9 +118,10 @@ class S3Menu(AbstractMenu):
 
     def list_objects_in_bucket(self, bucket_name=None):
         """
-        List all objects in a specified S3 bucket.
+        List the objects in a specified S3 bucket, page by page as they are fetched.
+        The listing can be limited to a prefix and browsed folder by folder.
         :param bucket_name: The name of the S3 bucket.
-        :return: List of object keys in the bucket.
+        :return: OptionList of the object keys listed (folders excluded).
         """
         try:
             # if bucket_name is not provided, prompt the user to select one
@@ -78,13 +135,25 @@ class S3Menu(AbstractMenu):
                 bucket_name = get_user_input("Enter the bucket name", available_options=buckets)
                 if not bucket_name: return []
 
+            # get prefix and whether to browse folder by folder
+            prefix = get_user_input("Enter the key prefix to list, or 'none' for the whole bucket",
+                                    default_value='none')
+            if not prefix: return []
+            prefix = '' if prefix.lower() == 'none' else prefix
+            folders = get_user_input("Browse folder by folder? (y/n)", default_value='y',
+                                     available_options=['y', 'n'])
+            if not folders: return []
+
             # get objects in the specified bucket
-            objects = self.s3_controller.list_objects(bucket_name)
-            if not objects:
-                print(f"No objects found in bucket '{bucket_name}'.")
-            else:
-                list_ordered_list(objects, f"Objects in bucket '{bucket_name}':")
-            return objects
+            objects = self.s3_controller.list_objects(bucket_name, prefix, delimiter='/' if folders == 'y' else None,
+                                                      max_items=S3_LIST_MAX_ITEMS)
+            records = render_stream(objects, object_to_string, f"Objects in bucket '{bucket_name}/{prefix}':",
+                                    empty_message=f"No objects found in bucket '{bucket_name}/{prefix}'.")
+            if len(records) >= S3_LIST_MAX_ITEMS:
+                print(f"Stopped after {S3_LIST_MAX_ITEMS} objects; enter a longer prefix to narrow the listing.")
+            objects = [record for record in records if not record.is_prefix]
+            return OptionList([record.key for record in objects],
+                              {record.key: (record.storage_class,) for record in objects})
         except Exception as e:
             print(f"Error listing objects in bucket: {e}")
             return []
@@ -110,12 +179,15 @@ class S3Menu(AbstractMenu):
         # get local file path to upload
         file_path = get_user_input("Enter the local file path to upload")
         if not file_path: return
+        profile = self._get_transfer_profile()
+        if not profile: return
 
         # upload object
         try:
             print(f"Uploading {file_path} to {bucket_name}/{object_key}...")
-            self.s3_controller.upload_object(bucket_name, object_key, file_path)
-            print(f"Uploaded {file_path} to {bucket_name}/{object_key}")
+            monitor = self.s3_controller.upload_object(bucket_name, object_key, file_path, profile,
+                                                       self._progress_printer())
+            print(f"\nUploaded {file_path} to {bucket_name}/{object_key}: {monitor.summary()}")
         except Exception as e:
             print(f"Error uploading object: {e}")
 
@@ -150,36 +222,99 @@ class S3Menu(AbstractMenu):
         file_extension = get_user_input("Enter the file extension for the downloaded file (e.g., txt, jpg)",
                                         default_value="")
         if not file_extension: return
+        profile = self._get_transfer_profile()
+        if not profile: return
 
         # download object
         try:
             print(f"Downloading {bucket_name}/{object_key} to {download_path} as .{file_extension}")
-            self.s3_controller.download_object(bucket_name, object_key, download_path, file_extension)
-            print(f"Downloaded {bucket_name}/{object_key} to {download_path} as .{file_extension}")
+            monitor = self.s3_controller.download_object(bucket_name, object_key, download_path, file_extension,
+                                                         profile, self._progress_printer())
+            print(f"\nDownloaded {bucket_name}/{object_key} to {download_path} as .{file_extension}: "
+                  f"{monitor.summary()}")
         except Exception as e:
             print(f"Error downloading object: {e}")
 
-    def delete_bucket(self):
+    def download_large_object(self):
         """
-        Delete a specified S3 bucket.
-        :return: None
+        Download a large object with concurrent Range GETs into a memory-mapped file, as a background job;
+        downloading it again to the same path resumes an interrupted download.
+        :return: The background Job, or None if cancelled.
         """
 
         # get bucket name
         buckets = self.list_buckets()
+        if not buckets or len(buckets) == 0:
+            print("No buckets available to download objects from.")
+            return None
+        bucket_name = get_user_input("Enter the bucket name", available_options=buckets)
+        if not bucket_name: return None
+
+        # get object name to download
+        objects = self.list_objects_in_bucket(bucket_name)
+        if not objects or len(objects) == 0:
+            print("No objects available to download.")
+            return None
+        object_key = get_user_input("Enter the object key (name)", available_options=objects)
+        if not object_key: return None
+
+        # get local file path and concurrency
+        file_path = get_user_input("Enter the local file path to save the object as (e.g., /home/user/disk.img)")
+        if not file_path: return None
+        max_workers = get_user_input("Enter the number of concurrent range requests", InputType.INT,
+                                     default_value=S3_RANGED_MAX_WORKERS)
+        if max_workers is False: return None
+
+        # download object
+        download = self.s3_controller.download_object_ranged(bucket_name, object_key, file_path,
+                                                             max_workers=max_workers)
+        job = job_tracker.submit(f"Download s3://{bucket_name}/{object_key} to {file_path}", download.run)
+        job.progress = download.summary
+        print(f"Job #{job.id} is downloading the object. Check its progress under 'Background jobs' in the main menu.")
+        return job
+
+    def delete_bucket(self):
+        """
+        Delete a bucket, or the objects under one of its prefixes, as a background job; a dry run only counts what
+        would be deleted.
+        :return: The background Job, or None if cancelled.
+        """
+
+        # get bucket name and prefix
+        buckets = self.list_buckets()
         if not buckets or len(buckets) == 0:
             print("No buckets available to delete.")
-            return
+            return None
         bucket_name = get_user_input("Enter the bucket name to delete", available_options=buckets)
-        if not bucket_name: return
+        if not bucket_name: return None
+        prefix = get_user_input("Enter the key prefix to delete, or 'none' to delete the whole bucket",
+                                default_value='none')
+        if not prefix: return None
+        prefix = '' if prefix.lower() == 'none' else prefix
+        dry_run = get_user_input("Dry run (only count the objects and versions to delete)? (y/n)", default_value='y',
+                                 available_options=['y', 'n'])
+        if not dry_run: return None
+        target = f"s3://{bucket_name}/{prefix}" if prefix else f"bucket '{bucket_name}'"
+        if dry_run == 'n':
+            confirm = get_user_input(f"Delete everything in {target}, including all versions? (y/n)",
+                                     default_value='n', available_options=['y', 'n'])
+            if confirm != 'y': return None
 
-        # delete bucket
+        # delete bucket or prefix
         try:
-            print(f"Deleting bucket '{bucket_name}'")
-            self.s3_controller.delete_bucket(bucket_name)
-            print(f"Deleted bucket: {bucket_name}")
+            deletion = self.s3_controller.bulk_delete(bucket_name, prefix, dry_run=dry_run == 'y')
         except Exception as e:
             print(f"Error deleting bucket: {e}")
+            return None
+        if dry_run == 'y' or prefix:
+            job = job_tracker.submit(f"{'Count' if dry_run == 'y' else 'Delete'} {target}", deletion.run)
+        else:
+            job = job_tracker.submit(f"Delete {target}",
+                                     lambda: self.s3_controller.delete_bucket(bucket_name, deletion))
+        job.progress = deletion.summary
+        print(f"Job #{job.id} is {'counting' if dry_run == 'y' else 'deleting'} the objects. "
+              f"Check its progress under 'Background jobs' in the main menu.")
+        return job
 
     def create_bucket(self):
         """
@@ -198,3 +333,97 @@ class S3Menu(AbstractMenu):
             print(f"Created bucket: {bucket_name}")
         except Exception as e:
             print(f"Error creating bucket: {e}")
+
+    def sync_directory(self):
+        """
+        Sync a local directory with a bucket prefix in either direction, transferring only new and changed files,
+        as a background job.
+        :return: The background Job, or None if cancelled.
+        """
+
+        # get bucket name and prefix
+        buckets = self.list_buckets()
+        if not buckets or len(buckets) == 0:
+            print("No buckets available to sync with.")
+            return None
+        bucket_name = get_user_input("Enter the bucket name", available_options=buckets)
+        if not bucket_name: return None
+        prefix = get_user_input("Enter the key prefix (e.g., builds/web/), or 'none' for the whole bucket",
+                                default_value='none')
+        if not prefix: return None
+        prefix = '' if prefix.lower() == 'none' else prefix
+
+        # get local directory and direction
+        local_dir = get_user_input("Enter the local directory")
+        if not local_dir: return None
+        direction = get_user_input(f"Enter the direction ('{UPLOAD}' to the bucket or '{DOWNLOAD}' from it)",
+                                   default_value=UPLOAD, available_options=[UPLOAD, DOWNLOAD])
+        if not direction: return None
+        if direction == UPLOAD and not os.path.isdir(local_dir):
+            print(f"Local directory does not exist: {local_dir}")
+            return None
+        delete = get_user_input("Delete files missing from the source at the destination? (y/n)", default_value='n',
+                                available_options=['y', 'n'])
+        if not delete: return None
+        if delete == 'y':
+            destination = f"s3://{bucket_name}/{prefix}" if direction == UPLOAD else local_dir
+            confirm = get_user_input(f"Permanently delete everything in {destination} that is missing from the "
+                                     f"source? (y/n)", default_value='n', available_options=['y', 'n'])
+            if confirm != 'y': return None
+        profile = self._get_transfer_profile()
+        if not profile: return None
+
+        # sync
+        try:
+            sync = self.s3_controller.sync_directory(local_dir, bucket_name, prefix, direction, delete == 'y',
+                                                     profile)
+        except Exception as e:
+            print(f"Error starting sync: {e}")
+            return None
+        job = job_tracker.submit(f"Sync {local_dir} ({direction}) s3://{bucket_name}/{prefix}", sync.run)
+        job.progress = sync.summary
+        print(f"Job #{job.id} is syncing the changed files. "
+              f"Check its progress under 'Background jobs' in the main menu.")
+        return job
+
+    def inventory_bucket(self):
+        """
+        Count the objects and bytes of a bucket per storage class, listing it with concurrent key-range shards,
+        as a background job.
+        :return: The background Job, or None if cancelled.
+        """
+
+        # get bucket name and prefix
+        buckets = self.list_buckets()
+        if not buckets or len(buckets) == 0:
+            print("No buckets available to inventory.")
+            return None
+        bucket_name = get_user_input("Enter the bucket name", available_options=buckets)
+        if not bucket_name: return None
+        prefix = get_user_input("Enter the key prefix, or 'none' for the whole bucket", default_value='none')
+        if not prefix: return None
+        prefix = '' if prefix.lower() == 'none' else prefix
+
+        lister = self.s3_controller.list_objects_parallel(bucket_name, prefix)
+        totals = {}
+        totals_lock = threading.Lock()
+
+        def summary():
+            with totals_lock:
+                snapshot = dict(totals)
+            counts = ', '.join(f"{storage_class}: {count} objects, {size / (1024 ** 3):.2f} GiB"
+                               for storage_class, (count, size) in sorted(snapshot.items()))
+            return (f"{counts or 'no objects yet'} ({lister.pages} pages over {lister.shard_count} shards, "
+                    f"{lister.splits} splits)")
+
+        def inventory():
+            for record in lister:
+                with totals_lock:
+                    count, size = totals.get(record.storage_class, (0, 0))
+                    totals[record.storage_class] = (count + 1, size + (record.size or 0))
+            return summary()
+
+        job = job_tracker.submit(f"Inventory s3://{bucket_name}/{prefix}", inventory)
+        job.progress = summary
+        print(f"Job #{job.id} is listing the bucket. Check its progress under 'Background jobs' in the main menu.")
+        return job